@@ -0,0 +1,21 @@
+"""
+screen_time 원본 세션 → 일별(KST)/누적 집계 재생성 (수동 실행용)
+- 배포 직후 한 번 실행. 집계가 없는 사용자만 만들고, 요청 경로와 같은 선점 방식을 쓰므로
+  서버가 떠 있는 동안 실행하거나 여러 번 실행해도 안전함
+- 실행: backend/app 디렉토리에서 `python backfill_screen_time.py`
+"""
+import asyncio
+
+from db.mongo import get_db
+from db.screen_time import backfill_rollups, ensure_screen_time_indexes
+
+
+async def main():
+    db = get_db()
+    await ensure_screen_time_indexes(db)
+    users, sessions = await backfill_rollups(db)
+    print(f"✅ screen_time 집계 생성 완료: 사용자 {users}명 / 세션 {sessions}건")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+벤치마크 공통 도구
+- 실행: backend/app 디렉토리에서 `python -m benchmarks.<모듈> [옵션]` (옵션은 각 모듈의 --help)
+- MONGO_URI(또는 STORAGE_BACKEND=memory)의 DB에 임시 사용자/데이터를 만들고 앱에 in-process(ASGI)로
+  요청을 보낸다. 끝나면 만든 데이터를 정리한다.
+- 결과는 JSON으로 출력한다. 지연 시간 단위는 ms, 처리량은 초당 요청 수(rps).
+"""
+import asyncio
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+from models.user import USER_COLLECTION
+
+T = TypeVar("T")
+
+# 임시 사용자 이메일 도메인 (EmailStr 검증을 통과해야 로그인/가입 요청이 422가 되지 않는다)
+EMAIL_DOMAIN = "example.com"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """nearest-rank 백분위 (샘플이 없으면 0)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+async def timed(latencies: List[float], awaitable: Awaitable[T]) -> T:
+    """awaitable을 기다린 시간(ms)을 latencies에 더하고 결과를 돌려준다"""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run_concurrently(total: int, concurrency: int, one: Callable[[int], Awaitable[Any]]) -> float:
+    """one(0..total-1)을 최대 concurrency개씩 동시에 실행하고 걸린 시간(초)을 돌려준다"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i: int):
+        async with semaphore:
+            await one(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[limited(i) for i in range(total)])
+    return time.perf_counter() - started
+
+
+def latency_summary(
+    latencies: List[float], elapsed: Optional[float] = None, pcts: Iterable[int] = (50, 99)
+) -> dict:
+    """{"rps": ..., "p50_ms": ..., "p99_ms": ...} (elapsed가 없으면 rps 생략)"""
+    summary = {}
+    if elapsed is not None:
+        summary["rps"] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    for pct in pcts:
+        summary[f"p{pct}_ms"] = round(percentile(latencies, pct), 3)
+    return summary
+
+
+@asynccontextmanager
+async def temp_user(db, **fields: Any) -> AsyncIterator[str]:
+    """bench_xxxxxxxx 사용자를 만들고 user_id를 넘긴다. 블록이 끝나면 지운다."""
+    user_id = f"bench_{uuid.uuid4().hex[:8]}"
+    await db[USER_COLLECTION].insert_one({"_id": user_id, "email": f"{user_id}@{EMAIL_DOMAIN}", "name": "bench", **fields})
+    try:
+        yield user_id
+    finally:
+        await db[USER_COLLECTION].delete_one({"_id": user_id})
+
+
+def emit(result: dict, out: Optional[str] = None) -> None:
+    """결과 JSON을 출력한다 (out이 있으면 파일에도 저장)"""
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
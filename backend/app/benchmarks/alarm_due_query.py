@@ -0,0 +1,97 @@
+"""
+"앞으로 N분 안에 울릴 시간 알림" 찾기 비용 비교: 전체 훑기 vs next_fire_at 인덱스
+- 실행: backend/app 디렉토리에서 `python -m benchmarks.alarm_due_query --sizes 1000 10000 100000 --window 60`
+- MONGO_URI의 DB에 임시 사용자 하나로 시간 알림 N건을 넣고 (시각은 하루에 고르게 분산) 끝나면 정리한다.
+
+scan    = time이 있는 알림을 모두 읽어 time/repeat_option/weekdays로 다음 시각을 계산한 뒤 걸러낸다 (기존 방식)
+indexed = db.alarms.load_due_fires (스케줄러가 쓰는 next_fire_at 범위 조회)
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from db.alarms import load_due_fires, notification_next_fire_at
+from db.indexes import apply_indexes
+from db.mongo import get_db
+from db.notifications import NOTIFICATION_COLLECTION
+
+
+def build_notifications(user_id: str, count: int, now: datetime) -> list[dict]:
+    docs = []
+    for i in range(count):
+        minute_of_day = (i * 1440) // max(1, count)
+        doc = {
+            "user_id": user_id,
+            "abc_id": f"abc_{i % 50}",
+            "time": f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}",
+            "repeat_option": "weekly" if i % 3 == 0 else "daily",
+            "weekdays": [1 + i % 7] if i % 3 == 0 else [],
+            "has_location": False,
+            "saved_at": now,
+            "updated_at": now,
+        }
+        doc["next_fire_at"] = notification_next_fire_at(doc, now)
+        docs.append(doc)
+    return docs
+
+
+async def _scan(db, user_id: str, now: datetime, until: datetime) -> int:
+    due = 0
+    async for doc in db[NOTIFICATION_COLLECTION].find(
+        {"user_id": user_id, "time": {"$exists": True}}, {"time": 1, "repeat_option": 1, "weekdays": 1}
+    ):
+        fire_at = notification_next_fire_at(doc, now)
+        if fire_at is not None and fire_at <= until:
+            due += 1
+    return due
+
+
+async def _indexed(db, user_id: str, now: datetime, until: datetime) -> int:
+    fires, _ = await load_due_fires(db, until, limit=100_000)
+    return sum(1 for f in fires if f.user_id == user_id and f.fire_at > now)
+
+
+async def _timed(fn, repeat: int) -> tuple[int, float]:
+    result = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = await fn()
+    return result, round((time.perf_counter() - started) / repeat * 1000, 2)
+
+
+async def main(sizes: list[int], window_minutes: int, repeat: int) -> list[dict]:
+    db = get_db()
+    await apply_indexes(db, [NOTIFICATION_COLLECTION])
+    results = []
+    for size in sizes:
+        user_id = f"bench_{uuid.uuid4().hex[:8]}"
+        now = datetime.now(timezone.utc)
+        until = now + timedelta(minutes=window_minutes)
+        docs = build_notifications(user_id, size, now)
+        for start in range(0, len(docs), 5000):
+            await db[NOTIFICATION_COLLECTION].insert_many(docs[start:start + 5000], ordered=False)
+        try:
+            scan_due, scan_ms = await _timed(lambda: _scan(db, user_id, now, until), repeat)
+            indexed_due, indexed_ms = await _timed(lambda: _indexed(db, user_id, now, until), repeat)
+        finally:
+            await db[NOTIFICATION_COLLECTION].delete_many({"user_id": user_id})
+        results.append({
+            "alarms": size,
+            "due": indexed_due,
+            "scan_due": scan_due,
+            "scan_ms": scan_ms,
+            "indexed_ms": indexed_ms,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--window", type=int, default=60, help="조회 구간 (분)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.sizes, args.window, args.repeat)), indent=2))
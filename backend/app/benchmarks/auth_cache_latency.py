@@ -0,0 +1,47 @@
+"""
+/schedule-events 지연 시간 비교: 인증 캐시 사용 vs 미사용
+- 실행: `python -m benchmarks.auth_cache_latency --requests 2000 --concurrency 20` (공통 사항은 benchmarks/_common.py)
+"""
+import argparse
+import asyncio
+
+import httpx
+
+import core.security as security
+from benchmarks._common import emit, latency_summary, run_concurrently, temp_user, timed
+from core.security import create_access_token
+from db.mongo import get_db
+from main import app
+
+
+async def _run(client: httpx.AsyncClient, headers: dict, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+
+    async def one(_: int):
+        r = await timed(latencies, client.get("/schedule-events", headers=headers))
+        r.raise_for_status()
+
+    elapsed = await run_concurrently(total, concurrency, one)
+    return {"requests": total, **latency_summary(latencies, elapsed)}
+
+
+async def main(total: int, concurrency: int) -> dict:
+    results = {}
+    async with temp_user(get_db()) as user_id:
+        headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            for enabled in (False, True):
+                security.settings.auth_cache_enabled = enabled
+                security._token_cache.clear()
+                security._user_exists_cache.clear()
+                await _run(client, headers, min(100, total), concurrency)  # warm-up
+                results["cache_on" if enabled else "cache_off"] = await _run(client, headers, total, concurrency)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    emit(asyncio.run(main(args.requests, args.concurrency)))
@@ -0,0 +1,115 @@
+"""
+인증 의존성 비용 비교: 라우터별 복사본(매 요청 JWT 검증) vs core.security.get_current_user_id(캐시)
+- 실행: backend/app 디렉토리에서 `python -m benchmarks.auth_dependency --calls 20000 --tokens 100`
+- micro:    의존성 함수만 반복 호출한 µs/호출 (토큰 --tokens개를 돌려 쓴다)
+- endpoint: GET /users/me 를 in-process(ASGI)로 호출한 µs/요청 (MONGO_URI의 DB에 임시 사용자를 만들고 정리한다)
+
+legacy       = 예전 라우터 복사본과 같은 코드 (매번 python-jose로 서명 검증)
+shared_nocache / shared_cached = 공용 의존성, 캐시 끔/켬
+pyjwt_nocache = JWT_BACKEND=pyjwt (PyJWT가 설치된 경우만)
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+from fastapi import Header, HTTPException
+
+import core.security as security
+from core.security import create_access_token, decode_token, get_current_user_id
+from db.mongo import get_db
+from main import app
+from models.user import USER_COLLECTION
+
+
+async def legacy_get_current_user_id(authorization: str | None = Header(default=None)) -> str:
+    # 통합 전 routers/*.py 에 복사되어 있던 의존성
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Missing bearer token")
+    token = authorization.split(" ", 1)[1].strip()
+    payload = decode_token(token)
+    if not payload or payload.get("type") != "access":
+        raise HTTPException(status_code=401, detail="Invalid access token")
+    return payload.get("sub")
+
+
+def _variants():
+    variants = [
+        ("legacy", legacy_get_current_user_id, False, "jose"),
+        ("shared_nocache", get_current_user_id, False, "jose"),
+        ("shared_cached", get_current_user_id, True, "jose"),
+    ]
+    if security.pyjwt is not None:
+        variants.append(("pyjwt_nocache", get_current_user_id, False, "pyjwt"))
+    return variants
+
+
+def _configure(cache: bool, backend: str) -> None:
+    security.settings.auth_cache_enabled = cache
+    security.settings.jwt_backend = backend
+    security._token_cache.clear()
+
+
+async def _micro(headers: list[str], calls: int) -> dict:
+    results = {}
+    for name, dependency, cache, backend in _variants():
+        _configure(cache, backend)
+        for h in headers:  # warm-up (캐시 채우기 포함)
+            await dependency(h)
+        started = time.perf_counter()
+        for i in range(calls):
+            await dependency(headers[i % len(headers)])
+        results[name] = round((time.perf_counter() - started) / calls * 1_000_000, 2)
+    return results
+
+
+async def _endpoint(headers: str, requests: int) -> dict:
+    results = {}
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for name, dependency, cache, backend in _variants():
+            _configure(cache, backend)
+            if dependency is not get_current_user_id:
+                app.dependency_overrides[get_current_user_id] = dependency
+            try:
+                for _ in range(min(50, requests)):
+                    await client.get("/users/me", headers={"Authorization": headers})
+                started = time.perf_counter()
+                for _ in range(requests):
+                    r = await client.get("/users/me", headers={"Authorization": headers})
+                    r.raise_for_status()
+                results[name] = round((time.perf_counter() - started) / requests * 1_000_000, 1)
+            finally:
+                app.dependency_overrides.pop(get_current_user_id, None)
+    return results
+
+
+async def main(calls: int, tokens: int, requests: int) -> dict:
+    original = (security.settings.auth_cache_enabled, security.settings.jwt_backend)
+    micro_headers = [f"Bearer {create_access_token(f'bench_{i}')}" for i in range(tokens)]
+
+    db = get_db()
+    user_id = f"bench_{uuid.uuid4().hex[:8]}"
+    await db[USER_COLLECTION].insert_one({"_id": user_id, "email": f"{user_id}@example.com", "name": "bench"})
+    try:
+        micro = await _micro(micro_headers, calls)
+        endpoint = await _endpoint(f"Bearer {create_access_token(user_id)}", requests)
+    finally:
+        await db[USER_COLLECTION].delete_one({"_id": user_id})
+        _configure(*original)
+
+    return {
+        "micro_us_per_call": micro,
+        "endpoint_us_per_request": endpoint,
+        "saved_us_per_request": round(endpoint["legacy"] - endpoint["shared_cached"], 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=100, help="돌려 쓸 서로 다른 토큰 수")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.calls, args.tokens, args.requests)), indent=2))
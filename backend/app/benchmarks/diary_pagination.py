@@ -0,0 +1,104 @@
+"""
+GET /diaries 응답 크기/지연 시간 비교: 전체 목록 vs 키셋 페이지 (limit)
+- 실행: `python -m benchmarks.diary_pagination --sizes 10 1000 10000 --limit 20` (공통 사항은 benchmarks/_common.py)
+- 크기마다 임시 사용자를 만들고 일기 N건을 넣는다.
+
+full       = limit 없이 전체 목록 (기존 동작)
+first_page = limit만 준 첫 페이지
+deep_page  = 커서를 따라 목록 중간쯤의 페이지 (페이지 깊이와 무관하게 비용이 같은지 확인)
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from benchmarks._common import emit, latency_summary, temp_user, timed
+from core.pagination import NEXT_CURSOR_HEADER
+from core.security import create_access_token
+from db.diaries import DIARY_COLLECTION, ensure_diary_indexes
+from db.mongo import get_db
+from main import app
+
+
+def build_diaries(user_id: str, count: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "user_id": user_id,
+            "diary_id": f"diary_{i:08x}",
+            "group_Id": i % 5,
+            "activating_events": "발표 전에 심장이 빨리 뛰었다",
+            "belief": ["실수하면 모두가 나를 비웃을 것이다"],
+            "consequence_p": ["심장 두근거림"],
+            "consequence_e": ["불안"],
+            "consequence_b": ["발표 연습을 미룸"],
+            "sudScores": [{"sud_id": f"sud_{i:08x}", "before_sud": 7, "after_sud": 4, "created_at": now}],
+            "alternativeThoughts": ["실수는 누구나 한다"],
+            "realOddness": [],
+            "confrontAvoidLogs": [],
+            "alarms": [],
+            "createdAt": now - timedelta(minutes=i),
+            "updatedAt": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+async def _measure(client: httpx.AsyncClient, headers: dict, params: dict, repeat: int) -> dict:
+    latencies: list[float] = []
+    size = 0
+    for _ in range(repeat):
+        r = await timed(latencies, client.get("/diaries", headers=headers, params=params))
+        r.raise_for_status()
+        size = len(r.content)
+    return {"bytes": size, **latency_summary(latencies)}
+
+
+async def _cursor_at(client: httpx.AsyncClient, headers: dict, limit: int, pages: int) -> str | None:
+    cursor = None
+    for _ in range(pages):
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        r = await client.get("/diaries", headers=headers, params=params)
+        r.raise_for_status()
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    return cursor
+
+
+async def main(sizes: list[int], limit: int, repeat: int) -> dict:
+    db = get_db()
+    await ensure_diary_indexes(db)
+    results = {}
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=None) as client:
+        for count in sizes:
+            async with temp_user(db) as user_id:
+                headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+                try:
+                    docs = build_diaries(user_id, count)
+                    for start in range(0, len(docs), 1000):
+                        await db[DIARY_COLLECTION].insert_many(docs[start:start + 1000])
+
+                    row = {
+                        "full": await _measure(client, headers, {}, max(1, repeat // 10)),
+                        "first_page": await _measure(client, headers, {"limit": limit}, repeat),
+                    }
+                    deep_cursor = await _cursor_at(client, headers, limit, max(1, count // limit // 2))
+                    if deep_cursor:
+                        row["deep_page"] = await _measure(
+                            client, headers, {"limit": limit, "cursor": deep_cursor}, repeat
+                        )
+                    results[str(count)] = row
+                finally:
+                    await db[DIARY_COLLECTION].delete_many({"user_id": user_id})
+    return {"limit": limit, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    emit(asyncio.run(main(args.sizes, args.limit, args.repeat)))
@@ -0,0 +1,360 @@
+"""
+API 부하 테스트 묶음: 실제 사용 흐름을 시나리오로 돌리고 엔드포인트별 처리량/지연을 JSON으로 낸다
+- 실행: `python -m benchmarks.load_suite --users 20 --diaries 200 --sessions 500 --seconds 10 --out result.json`
+  (공통 사항은 benchmarks/_common.py)
+- --base-url을 주면 in-process 대신 실행 중인 서버로 보낸다
+  (시드/정리는 어느 쪽이든 이 프로세스의 MONGO_URI / STORAGE_BACKEND DB에 직접 한다).
+- --baseline으로 이전 결과 파일을 주면 엔드포인트별 p95 / rps 비율을 함께 낸다 (릴리스 간 비교용).
+
+시드: 사용자 --users명을 가입시키고, 사용자마다 일기 --diaries건, 스크린타임 세션 --sessions건,
+      알림 --notifications건을 미리 넣는다.
+시나리오 (각각 --seconds 동안 --concurrency개 워커가 반복):
+  signup_storm        새 이메일로 가입
+  login_storm         시드 사용자로 로그인
+  diary_sud           일기 작성 → SUD 추가 → SUD 수정 → 일기 수정 → 첫 페이지 조회
+  screen_time_upload  세션 1건 업로드 + 10건 일괄 업로드
+  summary_polling     스크린타임 요약 조회
+  notification_crud   알림 생성 → 목록 → 시간 변경 → 삭제
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks._common import EMAIL_DOMAIN, emit, latency_summary, timed
+from benchmarks.diary_pagination import build_diaries
+from core.password_hasher import pwd_context
+from db.diaries import DIARY_COLLECTION
+from db.indexes import apply_indexes
+from db.mongo import get_db
+from db.screen_time import (
+    DAILY_COLLECTION,
+    SCREEN_TIME_COLLECTION,
+    TOTALS_COLLECTION,
+    dedup_key,
+    ensure_user_rollups,
+)
+from db.sync import TOMBSTONE_COLLECTION
+from main import app
+from models.user import USER_COLLECTION
+from routers.notifications import COLLECTION as NOTIFICATION_COLLECTION
+from routers.relaxation_tasks import COLLECTION as RELAXATION_COLLECTION
+
+PASSWORD = "Passw0rd!"
+
+# user_id로 지우는 컬렉션 (screen_time_totals는 _id가 user_id)
+USER_SCOPED_COLLECTIONS = (
+    DIARY_COLLECTION,
+    SCREEN_TIME_COLLECTION,
+    DAILY_COLLECTION,
+    NOTIFICATION_COLLECTION,
+    RELAXATION_COLLECTION,
+    TOMBSTONE_COLLECTION,
+    "schedule_events",
+)
+
+
+class Recorder:
+    """엔드포인트(메서드 + 경로 템플릿)별 지연/상태 코드 기록"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        r = await timed(self.latencies[label], client.request(method, url, **kwargs))
+        self.statuses[label][r.status_code] += 1
+        if r.status_code >= 400:
+            self.errors[label] += 1
+        return r
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        return {
+            label: {
+                "requests": len(samples),
+                "errors": self.errors[label],
+                "statuses": {str(code): n for code, n in sorted(self.statuses[label].items())},
+                "mean_ms": round(sum(samples) / len(samples), 3),
+                **latency_summary(samples, elapsed, pcts=(50, 95, 99)),
+            }
+            for label, samples in sorted(self.latencies.items())
+        }
+
+
+class SeedUser:
+    def __init__(self, user_id: str, email: str, token: str):
+        self.user_id = user_id
+        self.email = email
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.diary_ids: List[str] = []
+
+
+# ============= 시드 =============
+
+def _session_docs(user_id: str, count: int) -> List[dict]:
+    """최근 것부터 거꾸로 30~90분짜리 세션 (KST 자정을 넘는 세션도 섞인다)"""
+    now = datetime.now(timezone.utc)
+    docs = []
+    end = now - timedelta(minutes=5)
+    for i in range(count):
+        duration = 30 + (i * 17) % 60
+        start = end - timedelta(minutes=duration)
+        docs.append({
+            "user_id": user_id,
+            "start_time": start,
+            "end_time": end,
+            "duration_minutes": float(duration),
+            "platform": "android",
+            "created_at": end,
+            "dedup_key": dedup_key(start, end),
+        })
+        end = start - timedelta(minutes=90)
+    return docs
+
+
+async def seed(client: httpx.AsyncClient, db, run_id: str, args) -> List[SeedUser]:
+    users: List[SeedUser] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int):
+        email = f"{run_id}_seed{i}@{EMAIL_DOMAIN}"
+        async with semaphore:
+            r = await client.post("/auth/signup", json={"email": email, "password": PASSWORD, "name": "load"})
+            r.raise_for_status()
+            doc = await db[USER_COLLECTION].find_one({"email": email}, {"_id": 1})
+            user = SeedUser(doc["_id"], email, r.json()["access_token"])
+
+            diaries = build_diaries(user.user_id, args.diaries)
+            for start in range(0, len(diaries), 1000):
+                await db[DIARY_COLLECTION].insert_many(diaries[start:start + 1000])
+            user.diary_ids = [d["diary_id"] for d in diaries[:50]]
+
+            sessions = _session_docs(user.user_id, args.sessions)
+            for start in range(0, len(sessions), 1000):
+                await db[SCREEN_TIME_COLLECTION].insert_many(sessions[start:start + 1000])
+            await ensure_user_rollups(db, user.user_id)
+
+            for n in range(args.notifications):
+                r = await client.post(f"/notifications/seed{n}", headers=user.headers, json={
+                    "time": f"{8 + n % 12:02d}:00",
+                    "repeat_option": "daily",
+                    "latitude": 37.5 + n * 0.001,
+                    "longitude": 127.0,
+                    "location": f"seed {n}",
+                })
+                r.raise_for_status()
+            users.append(user)
+
+    await asyncio.gather(*[one(i) for i in range(args.users)])
+    return users
+
+
+async def cleanup(db, run_id: str, user_ids: List[str]) -> None:
+    for name in USER_SCOPED_COLLECTIONS:
+        await db[name].delete_many({"user_id": {"$in": user_ids}})
+    await db[TOTALS_COLLECTION].delete_many({"_id": {"$in": user_ids}})
+    await db[USER_COLLECTION].delete_many({"email": {"$regex": f"^{run_id}_"}})
+
+
+# ============= 시나리오 =============
+
+Scenario = Callable[[httpx.AsyncClient, Recorder, SeedUser, int], Awaitable[None]]
+
+
+async def signup_storm(client, rec, user, i):
+    email = f"{user.email.split('@')[0]}_s{i}_{uuid.uuid4().hex[:6]}@{EMAIL_DOMAIN}"
+    await rec.call(client, "POST /auth/signup", "POST", "/auth/signup",
+                   json={"email": email, "password": PASSWORD, "name": "load"})
+
+
+async def login_storm(client, rec, user, i):
+    await rec.call(client, "POST /auth/login", "POST", "/auth/login",
+                   json={"email": user.email, "password": PASSWORD})
+
+
+async def diary_sud(client, rec, user, i):
+    h = user.headers
+    r = await rec.call(client, "POST /diaries", "POST", "/diaries", headers=h, json={
+        "group_Id": i % 5,
+        "activating_events": "회의 전에 긴장됐다",
+        "belief": ["실수하면 안 된다"],
+    })
+    if r.status_code >= 400:
+        return
+    diary_id = r.json()["diaryId"]
+    r = await rec.call(client, "POST /sud-scores", "POST", "/sud-scores", headers=h,
+                       json={"diaryId": diary_id, "before_sud": i % 11})
+    if r.status_code < 400:
+        await rec.call(client, "PUT /sud-scores/{diary_id}/{sud_id}", "PUT",
+                       f"/sud-scores/{diary_id}/{r.json()['sud_id']}", headers=h, json={"after_sud": 3})
+    if user.diary_ids:
+        await rec.call(client, "PUT /diaries/{diary_id}", "PUT",
+                       f"/diaries/{user.diary_ids[i % len(user.diary_ids)]}", headers=h,
+                       json={"alternativeThoughts": [f"대안 생각 {i}"]})
+    await rec.call(client, "GET /diaries", "GET", "/diaries", headers=h, params={"limit": 20})
+
+
+async def screen_time_upload(client, rec, user, i):
+    base = datetime.now(timezone.utc) - timedelta(minutes=5)
+    tag = uuid.uuid4().hex[:8]
+    await rec.call(client, "POST /users/me/screen-time", "POST", "/users/me/screen-time", headers=user.headers, json={
+        "start_time": (base - timedelta(minutes=20)).isoformat(),
+        "end_time": base.isoformat(),
+        "client_session_id": f"{tag}_single",
+    })
+    batch = [
+        {
+            "start_time": (base - timedelta(minutes=10 * (k + 1))).isoformat(),
+            "end_time": (base - timedelta(minutes=10 * k + 1)).isoformat(),
+            "client_session_id": f"{tag}_{k}",
+        }
+        for k in range(10)
+    ]
+    await rec.call(client, "POST /users/me/screen-time/batch", "POST", "/users/me/screen-time/batch",
+                   headers=user.headers, json=batch)
+
+
+async def summary_polling(client, rec, user, i):
+    await rec.call(client, "GET /users/me/screen-time/summary", "GET", "/users/me/screen-time/summary",
+                   headers=user.headers)
+
+
+async def notification_crud(client, rec, user, i):
+    h = user.headers
+    abc_id = f"load{i}_{uuid.uuid4().hex[:6]}"
+    r = await rec.call(client, "POST /notifications/{abc_id}", "POST", f"/notifications/{abc_id}", headers=h, json={
+        "time": "09:00",
+        "repeat_option": "daily",
+        "latitude": 37.56,
+        "longitude": 126.97,
+        "location": "load",
+    })
+    await rec.call(client, "GET /notifications", "GET", "/notifications", headers=h)
+    if r.status_code >= 400:
+        return
+    setting_id = r.json()["id"]
+    await rec.call(client, "PATCH /notifications/{abc_id}/{setting_id}/time", "PATCH",
+                   f"/notifications/{abc_id}/{setting_id}/time", headers=h, json={"time": "10:30"})
+    await rec.call(client, "DELETE /notifications/{abc_id}/{setting_id}", "DELETE",
+                   f"/notifications/{abc_id}/{setting_id}", headers=h)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "signup_storm": signup_storm,
+    "login_storm": login_storm,
+    "diary_sud": diary_sud,
+    "screen_time_upload": screen_time_upload,
+    "summary_polling": summary_polling,
+    "notification_crud": notification_crud,
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, users: List[SeedUser], seconds: float, concurrency: int) -> dict:
+    rec = Recorder()
+    counter = itertools.count()
+    iterations = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(w: int):
+        nonlocal iterations
+        while time.perf_counter() < deadline:
+            i = next(counter)
+            await scenario(client, rec, users[i % len(users)], i)
+            iterations += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(w) for w in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "seconds": round(elapsed, 3),
+        "iterations_per_s": round(iterations / elapsed, 1),
+        "endpoints": rec.report(elapsed),
+    }
+
+
+def compare(current: dict, baseline: dict) -> Dict[str, dict]:
+    """엔드포인트별 현재/기준 비율 (p95 < 1 이면 빨라짐, rps > 1 이면 처리량 증가)"""
+    out: Dict[str, dict] = {}
+    for name, scenario in current["scenarios"].items():
+        base_scenario = baseline.get("scenarios", {}).get(name)
+        if not base_scenario:
+            continue
+        for label, row in scenario["endpoints"].items():
+            base = base_scenario["endpoints"].get(label)
+            if not base:
+                continue
+            out[f"{name}: {label}"] = {
+                "p95_ratio": round(row["p95_ms"] / base["p95_ms"], 3) if base["p95_ms"] else None,
+                "rps_ratio": round(row["rps"] / base["rps"], 3) if base["rps"] else None,
+            }
+    return out
+
+
+async def main(args) -> dict:
+    db = get_db()
+    await apply_indexes(db)
+    run_id = f"load_{uuid.uuid4().hex[:8]}"
+    client_args = {"base_url": args.base_url} if args.base_url else {"app": app, "base_url": "http://bench"}
+    users: List[SeedUser] = []
+    try:
+        async with httpx.AsyncClient(timeout=None, **client_args) as client:
+            started = time.perf_counter()
+            users = await seed(client, db, run_id, args)
+            seed_seconds = time.perf_counter() - started
+
+            scenarios = {}
+            for name in args.scenarios:
+                scenarios[name] = await run_scenario(client, SCENARIOS[name], users, args.seconds, args.concurrency)
+    finally:
+        await cleanup(db, run_id, [u.user_id for u in users])
+
+    result = {
+        "config": {
+            "target": args.base_url or "in-process",
+            "users": args.users,
+            "diaries_per_user": args.diaries,
+            "sessions_per_user": args.sessions,
+            "notifications_per_user": args.notifications,
+            "seconds": args.seconds,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        "scenarios": scenarios,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            result["comparison"] = compare(result, json.load(f))
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--diaries", type=int, default=200, help="사용자당 시드 일기 수")
+    parser.add_argument("--sessions", type=int, default=500, help="사용자당 시드 스크린타임 세션 수")
+    parser.add_argument("--notifications", type=int, default=5, help="사용자당 시드 알림 수")
+    parser.add_argument("--seconds", type=float, default=10.0, help="시나리오별 실행 시간")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="in-process 실행 시 bcrypt 라운드 (운영은 12)")
+    parser.add_argument("--base-url", help="실행 중인 서버 주소 (없으면 in-process)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--out", help="결과를 저장할 파일 (없으면 stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    pwd_context.update(bcrypt__rounds=args.bcrypt_rounds)
+    emit(asyncio.run(main(args)), args.out)
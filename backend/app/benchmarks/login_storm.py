@@ -0,0 +1,71 @@
+"""
+로그인 폭주 중 다른 엔드포인트 처리량 비교: bcrypt inline 실행 vs 작업 풀
+- 실행: `python -m benchmarks.login_storm --seconds 5 --logins 16` (공통 사항은 benchmarks/_common.py)
+- 각 모드마다 /health 처리량과 p99를 로그인 폭주 없음/있음 두 경우로 잰다.
+"""
+import argparse
+import asyncio
+
+import httpx
+
+from benchmarks._common import EMAIL_DOMAIN, emit, latency_summary, temp_user, timed
+from core.password_hasher import password_hasher, pwd_context
+from db.mongo import get_db
+from main import app
+
+PASSWORD = "Passw0rd!"
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    latencies: list[float] = []
+    while not stop.is_set():
+        await timed(latencies, client.get("/health"))
+        await asyncio.sleep(0)  # in-process /health는 중간에 양보하지 않아 다른 태스크(타이머)가 굶는다
+    return latencies
+
+
+async def _login_loop(client: httpx.AsyncClient, body: dict, stop: asyncio.Event, counts: dict) -> None:
+    while not stop.is_set():
+        r = await client.post("/auth/login", json=body)
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+
+
+async def _measure(client: httpx.AsyncClient, body: dict, seconds: float, logins: int) -> dict:
+    stop = asyncio.Event()
+    counts: dict = {}
+    probe = asyncio.create_task(_probe(client, stop))
+    storm = [asyncio.create_task(_login_loop(client, body, stop, counts)) for _ in range(logins)]
+    await asyncio.sleep(seconds)
+    stop.set()
+    latencies = await probe
+    await asyncio.gather(*storm)
+    return {
+        "health": latency_summary(latencies, seconds, pcts=(99,)),
+        "login_status_counts": {str(k): v for k, v in sorted(counts.items())},
+    }
+
+
+async def main(seconds: float, logins: int) -> dict:
+    results = {}
+    async with temp_user(get_db(), password_hash=pwd_context.hash(PASSWORD)) as user_id:
+        body = {"email": f"{user_id}@{EMAIL_DOMAIN}", "password": PASSWORD}
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+                for kind in ("inline", "thread"):
+                    password_hasher.executor_kind = kind
+                    results[kind] = {
+                        "idle": await _measure(client, body, seconds, 0),
+                        "login_storm": await _measure(client, body, seconds, logins),
+                        "hasher": password_hasher.stats(),
+                    }
+        finally:
+            password_hasher.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--logins", type=int, default=16, help="동시에 로그인을 반복하는 클라이언트 수")
+    args = parser.parse_args()
+    emit(asyncio.run(main(args.seconds, args.logins)))
@@ -0,0 +1,70 @@
+"""
+회원가입 처리량 + 동일 이메일 동시 가입 경쟁 확인
+- 실행: `python -m benchmarks.signup_throughput --signups 200 --concurrency 20` (공통 사항은 benchmarks/_common.py)
+- bcrypt 비용이 DB 왕복을 가리지 않도록 --bcrypt-rounds로 라운드를 낮출 수 있다 (기본 4, 운영은 12).
+
+throughput = 서로 다른 이메일 가입의 rps, p50/p99
+race       = 같은 이메일로 동시에 가입했을 때 성공(200)은 정확히 1건이어야 한다
+"""
+import argparse
+import asyncio
+import uuid
+
+import httpx
+
+from benchmarks._common import EMAIL_DOMAIN, emit, latency_summary, run_concurrently, timed
+from core.password_hasher import pwd_context
+from db.indexes import apply_indexes
+from db.mongo import get_db
+from main import app
+from models.user import USER_COLLECTION
+
+
+def _body(email: str) -> dict:
+    return {"email": email, "password": "Passw0rd!", "name": "bench"}
+
+
+async def _throughput(client: httpx.AsyncClient, run_id: str, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+
+    async def one(i: int):
+        r = await timed(latencies, client.post("/auth/signup", json=_body(f"{run_id}_{i}@{EMAIL_DOMAIN}")))
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    elapsed = await run_concurrently(total, concurrency, one)
+    return {"signups": total, "statuses": statuses, **latency_summary(latencies, elapsed)}
+
+async def _race(client: httpx.AsyncClient, run_id: str, parallel: int) -> dict:
+    body = _body(f"{run_id}_race@{EMAIL_DOMAIN}")
+    responses = await asyncio.gather(*[client.post("/auth/signup", json=body) for _ in range(parallel)])
+    statuses: dict[int, int] = {}
+    for r in responses:
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+    stored = await get_db()[USER_COLLECTION].count_documents({"email": body["email"]})
+    return {"parallel": parallel, "statuses": statuses, "stored": stored, "ok": statuses.get(200) == 1 and stored == 1}
+
+
+async def main(total: int, concurrency: int, race: int) -> dict:
+    db = get_db()
+    await apply_indexes(db, [USER_COLLECTION])
+    run_id = f"bench_{uuid.uuid4().hex[:8]}"
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=None) as client:
+            return {
+                "throughput": await _throughput(client, run_id, total, concurrency),
+                "race": await _race(client, run_id, race),
+            }
+    finally:
+        await db[USER_COLLECTION].delete_many({"email": {"$regex": f"^{run_id}_"}})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--race", type=int, default=20, help="같은 이메일 동시 가입 요청 수")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    args = parser.parse_args()
+    pwd_context.update(bcrypt__rounds=args.bcrypt_rounds)
+    emit(asyncio.run(main(args.signups, args.concurrency, args.race)))
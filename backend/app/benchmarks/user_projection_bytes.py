@@ -0,0 +1,173 @@
+"""
+users 문서 projection 전/후 전송 바이트 비교
+- 실행: backend/app 디렉토리에서 `python -m benchmarks.user_projection_bytes`
+- 기본은 오프라인 계산(BSON 인코딩 크기), `--live`를 주면 MONGO_URI의 DB에 임시 사용자를 넣고 실제 응답 크기를 잰다.
+
+before = projection 없이 find_one({"_id": ...}) 했을 때 문서 크기
+after  = 각 엔드포인트가 선언한 projection으로 가져온 문서 크기
+"""
+import argparse
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import bson
+
+from db.users import ID_ONLY, fields
+from routers.users import ME_PROJECTION
+from routers.user_data import (
+    ABC_MODELS_PROJECTION,
+    CUSTOM_TAGS_PROJECTION,
+    PRACTICE_SESSIONS_PROJECTION,
+    PROGRESS_PROJECTION,
+    SURVEYS_PROJECTION,
+    VALUE_GOAL_PROJECTION,
+    WORRY_GROUPS_PROJECTION,
+    worry_group_projection,
+)
+
+ENDPOINTS = [
+    ("auth: get_current_user", ID_ONLY),
+    ("POST /auth/login", fields("password_hash")),
+    ("GET /users/me", ME_PROJECTION),
+    ("GET /users/me/value-goal", VALUE_GOAL_PROJECTION),
+    ("GET /users/me/surveys", SURVEYS_PROJECTION),
+    ("GET /users/me/custom-tags", CUSTOM_TAGS_PROJECTION),
+    ("GET /users/me/worry-groups", WORRY_GROUPS_PROJECTION),
+    ("GET /users/me/worry-groups/{id}", worry_group_projection("7")),
+    ("GET /users/me/progress", PROGRESS_PROJECTION),
+    ("GET /users/me/abc-models", ABC_MODELS_PROJECTION),
+    ("GET /users/me/practice-sessions", PRACTICE_SESSIONS_PROJECTION),
+]
+
+
+def build_user(user_id: str, history: int) -> dict:
+    """history 크기에 비례하는 배열을 가진 합성 사용자"""
+    now = datetime.now(timezone.utc)
+    return {
+        "_id": user_id,
+        "email": f"{user_id}@bench.local",
+        "name": "벤치마크",
+        "gender": "female",
+        "password_hash": "$2b$12$" + "x" * 53,
+        "refresh_hash": "f" * 64,
+        "survey_completed": True,
+        "email_verified": False,
+        "value_goal": "가족과 더 많은 시간을 보내기",
+        "created_at": now,
+        "week_progress": [
+            {"week_number": w, "completed": w < 5, "progress_percent": 100 if w < 5 else 0}
+            for w in range(1, 9)
+        ],
+        "surveys": [
+            {"type": f"GAD7_{i}", "completed_at": now.isoformat(), "answers": {f"q{q}": q % 4 for q in range(7)}}
+            for i in range(history // 10 + 1)
+        ],
+        "custom_tags": [
+            {"chip_id": f"a_{i:04x}", "text": f"태그 {i}", "type": "A", "created_at": now}
+            for i in range(history)
+        ],
+        "worry_groups": [
+            {
+                "group_id": str(g),
+                "group_title": f"걱정 그룹 {g}",
+                "group_contents": "시험, 발표, 대인관계에 대한 걱정" * 3,
+                "character_id": g % 5,
+                "created_at": now - timedelta(days=g),
+                "archived": g % 4 == 0,
+            }
+            for g in range(1, history // 5 + 2)
+        ],
+        "abc_models": [
+            {"model_id": f"m{i}", "group_id": str(i % 7), "belief": "실수하면 모두가 나를 싫어할 것이다",
+             "alternative_thoughts": ["실수는 누구나 한다"] * 3, "created_at": now}
+            for i in range(history)
+        ],
+        "practice_sessions": [
+            {
+                "session_id": f"session_{i:08x}",
+                "week_number": 3 + (i % 3) * 2,
+                "negative_items": ["도움이 되지 않는 생각"] * 5,
+                "positive_items": ["도움이 되는 생각"] * 5,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(history)
+        ],
+    }
+
+
+def _matches(elem: dict, condition: dict) -> bool:
+    for key, expected in condition.items():
+        if isinstance(expected, dict) and "$in" in expected:
+            if elem.get(key) not in expected["$in"]:
+                return False
+        elif elem.get(key) != expected:
+            return False
+    return True
+
+
+def apply_projection(doc: dict, projection: dict) -> dict:
+    """find()의 inclusion projection + $elemMatch 동작을 흉내낸다"""
+    out = {"_id": doc["_id"]} if projection.get("_id", 1) else {}
+    for key, spec in projection.items():
+        if key == "_id" or key not in doc:
+            continue
+        if isinstance(spec, dict) and "$elemMatch" in spec:
+            match = next((e for e in doc[key] if isinstance(e, dict) and _matches(e, spec["$elemMatch"])), None)
+            if match is not None:
+                out[key] = [match]
+        else:
+            out[key] = doc[key]
+    return out
+
+
+def measure_offline(user: dict) -> list[dict]:
+    full = len(bson.encode(user))
+    return [
+        {"endpoint": name, "before_bytes": full, "after_bytes": len(bson.encode(apply_projection(user, proj)))}
+        for name, proj in ENDPOINTS
+    ]
+
+
+async def measure_live(user: dict) -> list[dict]:
+    from db.mongo import get_db
+
+    db = get_db()
+    await db["users"].insert_one(user)
+    try:
+        full = len(bson.encode(await db["users"].find_one({"_id": user["_id"]})))
+        rows = []
+        for name, proj in ENDPOINTS:
+            doc = await db["users"].find_one({"_id": user["_id"]}, proj)
+            rows.append({"endpoint": name, "before_bytes": full, "after_bytes": len(bson.encode(doc))})
+        return rows
+    finally:
+        await db["users"].delete_one({"_id": user["_id"]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=200, help="배열 항목 수 (태그/세션/모델 등)")
+    parser.add_argument("--live", action="store_true", help="로컬 MongoDB에 임시 문서를 넣고 실측")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    user = build_user(f"bench_{uuid.uuid4().hex[:8]}", args.history)
+    rows = asyncio.run(measure_live(user)) if args.live else measure_offline(user)
+    for row in rows:
+        row["saved_pct"] = round(100 * (1 - row["after_bytes"] / row["before_bytes"]), 1)
+
+    if args.json:
+        print(json.dumps({"history": args.history, "live": args.live, "results": rows}, ensure_ascii=False, indent=2))
+        return
+
+    print(f"history={args.history} ({'live' if args.live else 'offline'})")
+    print(f"{'endpoint':<36}{'before':>10}{'after':>10}{'saved':>8}")
+    for row in rows:
+        print(f"{row['endpoint']:<36}{row['before_bytes']:>10}{row['after_bytes']:>10}{row['saved_pct']:>7}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+등록된 쿼리 모양이 COLLSCAN 없이 인덱스를 타는지 확인 (수동 실행/CI용)
+- MONGO_URI를 로컬 mongod로 지정해서 실행: 레지스트리의 인덱스를 만든 뒤 쿼리마다 explain()
+- COLLSCAN이 하나라도 있으면 종료 코드 1
+- --migrate: 기존 인덱스와 정의가 다른 인덱스를 지우고 다시 만든다 (앱 시작 시에는 경고만 남김)
+- unique 인덱스를 만들지 못하면 키가 겹치는 문서를 보여주고 종료 코드 1 (앱도 이 상태로는 시작하지 않는다)
+- 실행: backend/app 디렉토리에서 `python check_indexes.py [--json]`
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+import main  # noqa: F401  라우터 import → 인덱스/쿼리 등록
+from db.indexes import apply_indexes, check_query_plans, failed_unique_indexes, find_duplicate_keys
+from db.mongo import get_db
+
+
+async def run(migrate: bool = False) -> tuple:
+    db = get_db()
+    result = await apply_indexes(db, migrate=migrate)
+    for collection, names in result.items():
+        for name in names:
+            if name.startswith("!"):
+                print(f"⚠️ {collection} {name[1:]}", file=sys.stderr)
+    broken = []
+    for spec in failed_unique_indexes(result):
+        duplicates = await find_duplicate_keys(db, spec)
+        broken.append(f"{spec.collection}.{spec.name}")
+        print(f"❌ {spec.collection}.{spec.name} 겹치는 키 {len(duplicates)}건 (최대 20건 표시)", file=sys.stderr)
+        for row in duplicates:
+            print(f"   {row['key']} x{row['count']}: {row['ids']}", file=sys.stderr)
+    return await check_query_plans(db), broken
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    parser.add_argument("--migrate", action="store_true", help="정의가 바뀐 인덱스를 지우고 다시 만든다")
+    args = parser.parse_args()
+
+    report, broken_unique = asyncio.run(run(args.migrate))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        for row in report:
+            mark = "❌" if row["collscan"] else "✅"
+            print(f"{mark} {row['collection']:<24}{row['query']:<40}{' > '.join(row['stages'])}")
+
+    collscans = [row["query"] for row in report if row["collscan"]]
+    if collscans:
+        print(f"⚠️ COLLSCAN {len(collscans)}건: {collscans}", file=sys.stderr)
+        sys.exit(1)
+    if broken_unique:
+        print(f"⚠️ unique 인덱스 없음: {broken_unique}", file=sys.stderr)
+        sys.exit(1)
@@ -8,12 +8,41 @@ load_dotenv()
 class Settings(BaseModel):
     mongo_uri: str = os.getenv("MONGO_URI", "mongodb://115.145.134.180:9013/")
     mongo_db: str = os.getenv("DB_NAME", "flutter_test")
+    # 저장소: mongo(기본) | memory(프로세스 내 인메모리 엔진, 테스트/벤치마크용)
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "mongo").lower()
     jwt_secret: str = os.getenv("JWT_SECRET", "CHANGE_ME_SECRET")
     jwt_refresh_secret: str = os.getenv("JWT_REFRESH_SECRET", "CHANGE_ME_REFRESH")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
     refresh_token_expire_days: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
     email_verification_expire_minutes: int = int(os.getenv("EMAIL_VERIFICATION_EXPIRE_MINUTES", "30"))
     reset_token_expire_minutes: int = int(os.getenv("RESET_TOKEN_EXPIRE_MINUTES", "30"))
+    # 인증 캐시: 검증된 access token payload(토큰 기준) / 사용자 존재 여부
+    auth_cache_enabled: bool = os.getenv("AUTH_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+    auth_cache_max_entries: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    auth_user_cache_ttl_seconds: int = int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+    # access token 서명 검증 구현: jose(기본) | pyjwt(설치되어 있을 때만, 없으면 jose)
+    jwt_backend: str = os.getenv("JWT_BACKEND", "jose").lower()
+    # bcrypt 해시 작업 풀: thread | process | inline(이벤트 루프에서 바로 실행, 비교용)
+    password_hash_executor: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    # /sync 삭제 기록(톰스톤) 보관 기간: 이보다 오래된 토큰은 전체 동기화
+    sync_tombstone_ttl_days: int = int(os.getenv("SYNC_TOMBSTONE_TTL_DAYS", "30"))
+    # 요청/MongoDB 계측: /metrics(Prometheus), Server-Timing 응답 헤더
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+    server_timing_enabled: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() not in ("0", "false", "no")
+    # 시간 알림 스케줄러: next_fire_at 인덱스로 곧 울릴 알림만 읽어 sink(log, webhook)로 보낸다
+    alarm_scheduler_enabled: bool = os.getenv("ALARM_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+    alarm_sinks: list[str] = [s.strip() for s in os.getenv("ALARM_SINKS", "log").split(",") if s.strip()]
+    alarm_webhook_url: str | None = os.getenv("ALARM_WEBHOOK_URL")
+    alarm_timezone: str = os.getenv("ALARM_TIMEZONE", "Asia/Seoul")
+    alarm_lookahead_seconds: int = int(os.getenv("ALARM_LOOKAHEAD_SECONDS", "300"))
+    alarm_batch_size: int = int(os.getenv("ALARM_BATCH_SIZE", "1000"))
+    # 서버가 내려가 있던 동안 지난 알림은 이 시간(초)보다 늦었으면 보내지 않고 다음 시각으로 넘긴다
+    alarm_late_grace_seconds: int = int(os.getenv("ALARM_LATE_GRACE_SECONDS", "600"))
+    # 걱정 그룹별 일기 통계 캐시 (일기 쓰기 때 무효화, TTL은 다른 워커의 쓰기를 반영하는 상한)
+    worry_group_stats_cache_ttl_seconds: int = int(os.getenv("WORRY_GROUP_STATS_CACHE_TTL_SECONDS", "300"))
+    worry_group_stats_cache_max_entries: int = int(os.getenv("WORRY_GROUP_STATS_CACHE_MAX_ENTRIES", "10000"))
     api_port: int = int(os.getenv("API_PORT", "8050"))
     cors_origins: list[str] = os.getenv("CORS_ORIGINS", "http://localhost:56000,http://127.0.0.1:56000,http://localhost:*").split(",")
 
@@ -0,0 +1,258 @@
+"""
+요청 타이밍 / MongoDB 명령 계측
+- MetricsMiddleware: 라우트(경로 템플릿)별 지연 시간/응답 크기 히스토그램, Server-Timing 헤더
+- MongoCommandListener: PyMongo 명령 수/시간/응답 바이트를 명령별로 세고,
+  contextvars로 현재 요청에도 붙인다 (Motor는 executor 호출 시 context를 복사한다)
+- render_prometheus(): /metrics 용 Prometheus text format (0.0.4)
+
+prometheus_client 없이 필요한 만큼만 구현한다. 리스너 콜백은 Motor의 스레드 풀에서
+불리므로 값 갱신은 락으로 보호한다.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import bson
+from pymongo import monitoring
+
+SERVER_TIMING_HEADER = "Server-Timing"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 초 단위 (Prometheus 기본값)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels: str) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(**labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # labels -> [bucket counts..., sum, count]
+        self._values: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(**labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for labels, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(float(bound))
+                yield f"{self.name}_bucket{_format_labels(labels, ('le', le))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(float(row[-2]))}"
+            yield f"{self.name}_count{_format_labels(labels)} {row[-1]}"
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", LATENCY_BUCKETS
+)
+HTTP_RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes", "HTTP response body size by route", SIZE_BUCKETS
+)
+HTTP_MONGO_COMMANDS = Histogram(
+    "http_request_mongodb_commands", "MongoDB commands issued per request by route",
+    (1, 2, 4, 8, 16, 32, 64, 128),
+)
+HTTP_MONGO_SECONDS = Counter(
+    "http_request_mongodb_seconds_total", "MongoDB command time attributed to requests by route"
+)
+HTTP_MONGO_BYTES = Counter(
+    "http_request_mongodb_reply_bytes_total", "MongoDB reply bytes attributed to requests by route"
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by command", LATENCY_BUCKETS
+)
+MONGO_COMMAND_BYTES = Counter(
+    "mongodb_command_reply_bytes_total", "MongoDB reply bytes by command"
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands by command"
+)
+ALARM_FIRES = Counter(
+    "alarm_scheduler_fires_total", "Scheduled alarms handled by the scheduler by source and result"
+)
+
+REGISTRY = (
+    HTTP_REQUEST_SECONDS,
+    HTTP_RESPONSE_BYTES,
+    HTTP_MONGO_COMMANDS,
+    HTTP_MONGO_SECONDS,
+    HTTP_MONGO_BYTES,
+    MONGO_COMMAND_SECONDS,
+    MONGO_COMMAND_BYTES,
+    MONGO_COMMAND_FAILURES,
+    ALARM_FIRES,
+)
+
+
+def render_prometheus() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# ============= 요청 단위 MongoDB 집계 =============
+
+class RequestDbStats:
+    __slots__ = ("commands", "seconds", "reply_bytes", "_lock")
+
+    def __init__(self):
+        self.commands = 0
+        self.seconds = 0.0
+        self.reply_bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, reply_bytes: int) -> None:
+        with self._lock:
+            self.commands += 1
+            self.seconds += seconds
+            self.reply_bytes += reply_bytes
+
+
+_current_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """명령별 지연/응답 크기 기록 + 현재 요청(contextvar)에 누적"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        seconds = event.duration_micros / 1_000_000
+        reply_bytes = len(bson.encode(event.reply)) if event.reply else 0
+        MONGO_COMMAND_SECONDS.observe(seconds, command=event.command_name)
+        MONGO_COMMAND_BYTES.inc(reply_bytes, command=event.command_name)
+        stats = _current_db_stats.get()
+        if stats is not None:
+            stats.add(seconds, reply_bytes)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        seconds = event.duration_micros / 1_000_000
+        MONGO_COMMAND_SECONDS.observe(seconds, command=event.command_name)
+        MONGO_COMMAND_FAILURES.inc(command=event.command_name)
+        stats = _current_db_stats.get()
+        if stats is not None:
+            stats.add(seconds, 0)
+
+
+mongo_command_listener = MongoCommandListener()
+
+
+# ============= ASGI 미들웨어 =============
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    순수 ASGI 미들웨어 (BaseHTTPMiddleware와 달리 응답 본문을 버퍼링하지 않는다)
+    - 응답 헤더를 보낼 때 Server-Timing(app, db)을 붙인다
+    - 응답이 끝나면 라우트별 히스토그램에 기록한다
+    """
+
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats()
+        token = _current_db_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+        body_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, body_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    app_ms = (time.perf_counter() - started) * 1000
+                    value = (
+                        f'app;dur={app_ms:.2f}, '
+                        f'db;dur={stats.seconds * 1000:.2f};desc="{stats.commands} cmds, {stats.reply_bytes} B"'
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (SERVER_TIMING_HEADER.lower().encode(), value.encode())
+                    ]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_db_stats.reset(token)
+            route = _route_label(scope)
+            labels = {"method": scope["method"], "route": route, "status": str(status_code)}
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, **labels)
+            HTTP_RESPONSE_BYTES.observe(body_bytes, method=scope["method"], route=route)
+            HTTP_MONGO_COMMANDS.observe(stats.commands, method=scope["method"], route=route)
+            HTTP_MONGO_SECONDS.inc(stats.seconds, method=scope["method"], route=route)
+            HTTP_MONGO_BYTES.inc(stats.reply_bytes, method=scope["method"], route=route)
@@ -0,0 +1,68 @@
+"""
+키셋(cursor) 페이지네이션 헬퍼
+- 커서는 마지막 항목의 (정렬 키, 고유 ID)를 base64로 감싼 불투명 문자열이다.
+- skip 없이 인덱스 범위 조건으로 다음 페이지를 읽으므로 페이지 깊이와 무관하게 비용이 같다.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def encode_cursor(sort_value: datetime, item_id: Any) -> str:
+    raw = json.dumps({"t": _as_utc(sort_value).isoformat(), "id": str(item_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _as_utc(datetime.fromisoformat(data["t"])), str(data["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(
+    sort_field: str,
+    id_field: str,
+    cursor: Optional[str],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    id_type: Callable[[str], Any] = str,
+) -> Dict[str, Any]:
+    """
+    (sort_field desc, id_field desc) 정렬 기준으로 커서 이후 항목만 고르는 조건.
+    since는 포함(>=), until은 제외(<)한다. id_type은 커서의 ID 문자열을 저장 타입으로 바꾼다 (예: ObjectId).
+    """
+    clauses = []
+    time_range: Dict[str, Any] = {}
+    if since is not None:
+        time_range["$gte"] = _as_utc(since)
+    if until is not None:
+        time_range["$lt"] = _as_utc(until)
+    if time_range:
+        clauses.append({sort_field: time_range})
+    if cursor:
+        last_value, raw_id = decode_cursor(cursor)
+        try:
+            last_id = id_type(raw_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        clauses.append({
+            "$or": [
+                {sort_field: {"$lt": last_value}},
+                {sort_field: last_value, id_field: {"$lt": last_id}},
+            ]
+        })
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
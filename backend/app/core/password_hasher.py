@@ -0,0 +1,131 @@
+"""
+bcrypt 해시/검증을 이벤트 루프 밖(스레드 또는 프로세스 풀)에서 실행
+- 한 번에 ~200ms씩 루프를 막지 않도록 signup/login/비밀번호 변경에서 사용
+- 대기 중인 작업 수가 상한을 넘으면 바로 503을 돌려준다 (backpressure)
+"""
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from core.config import get_settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# 지연 시간 히스토그램 구간 (ms)
+LATENCY_BUCKETS_MS = (50, 100, 200, 400, 800, 1600, 3200)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    # 프로세스 풀에서도 pickle 가능하도록 모듈 최상위 함수로 둔다
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+class PasswordHasher:
+    def __init__(self, executor_kind: str, workers: int, max_pending: int):
+        self.executor_kind = executor_kind
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.rejected = 0
+        self.completed = 0
+        self.hash_ms_sum = 0.0
+        self.wait_ms_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.executor_kind == "inline":
+            result, hash_ms = _timed(fn, *args)
+            self._record(hash_ms, hash_ms)
+            return result
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_ms = await loop.run_in_executor(self._get_executor(), _timed, fn, *args)
+        finally:
+            self.pending -= 1
+        self._record(hash_ms, (time.perf_counter() - started) * 1000)
+        return result
+
+    def _record(self, hash_ms: float, total_ms: float) -> None:
+        self.completed += 1
+        self.hash_ms_sum += hash_ms
+        self.wait_ms_sum += max(0.0, total_ms - hash_ms)
+        for idx, bound in enumerate(LATENCY_BUCKETS_MS):
+            if total_ms <= bound:
+                self.latency_buckets[idx] += 1
+                break
+        else:
+            self.latency_buckets[-1] += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit(_verify, password, hashed)
+
+    def stats(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queue_depth": self.pending,
+            "queue_depth_max": self.max_pending_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_hash_ms": round(self.hash_ms_sum / completed, 2),
+            "avg_wait_ms": round(self.wait_ms_sum / completed, 2),
+            "latency_ms_buckets": {
+                **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.latency_buckets)},
+                "le_inf": self.latency_buckets[-1],
+            },
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_settings = get_settings()
+password_hasher = PasswordHasher(
+    executor_kind=_settings.password_hash_executor,
+    workers=_settings.password_hash_workers,
+    max_pending=_settings.password_hash_max_pending,
+)
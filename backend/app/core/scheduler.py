@@ -0,0 +1,216 @@
+"""
+시간 알림 스케줄러 (ALARM_SCHEDULER_ENABLED=true 일 때 앱과 함께 실행)
+- next_fire_at 인덱스로 lookahead 안에 울릴 알림만 읽어 최소 힙에 넣고, 가장 이른 시각까지 잠들었다가 깨어나 보낸다.
+- 보내기 직전에 next_fire_at을 다음 시각으로 넘기는 데(claim) 성공한 경우만 보낸다.
+  여러 프로세스가 같이 떠 있어도 한 번만 나가고, 그 사이 수정/삭제된 알림은 건너뛴다.
+- 알림 생성/수정 API는 notify_changed()로 힙을 다시 채우게 한다 (lookahead 안쪽으로 당겨진 경우만).
+- 보낼 곳(sink)은 ALARM_SINKS로 고른다: log(기본), webhook(ALARM_WEBHOOK_URL로 JSON POST).
+"""
+import asyncio
+import heapq
+import itertools
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from core.config import get_settings
+from core.metrics import ALARM_FIRES
+from db.alarms import AlarmFire, claim_fire, load_due_fires
+
+settings = get_settings()
+
+
+class AlarmSink(ABC):
+    """알림을 내보낼 곳. send를 구현하지 않은 sink는 만들 때(build_sinks) 바로 TypeError가 난다."""
+    name = "sink"
+
+    @abstractmethod
+    async def send(self, fire: AlarmFire) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class LogSink(AlarmSink):
+    name = "log"
+
+    async def send(self, fire: AlarmFire) -> None:
+        target = fire.alarm_id or fire.ref_id
+        print(f"🔔 알림 발송 [{fire.source}] user={fire.user_id} id={target} at={fire.fire_at.isoformat()}")
+
+
+class WebhookSink(AlarmSink):
+    """알림마다 JSON 한 건을 POST 한다 (로컬 푸시 서버/테스트용 수신기)"""
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, fire: AlarmFire) -> None:
+        response = await self._client.post(self.url, json=fire.to_message())
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def build_sinks(names: List[str], webhook_url: Optional[str] = None) -> List[AlarmSink]:
+    sinks: List[AlarmSink] = []
+    for name in names:
+        if name == "log":
+            sinks.append(LogSink())
+        elif name == "webhook":
+            if not webhook_url:
+                print("⚠️ ALARM_SINKS에 webhook이 있지만 ALARM_WEBHOOK_URL이 없어 건너뜁니다")
+                continue
+            sinks.append(WebhookSink(webhook_url))
+        else:
+            print(f"⚠️ 알 수 없는 알림 sink: {name}")
+    return sinks
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class AlarmScheduler:
+    def __init__(self, lookahead_seconds: int, batch_size: int, late_grace_seconds: int):
+        self.lookahead = timedelta(seconds=max(1, lookahead_seconds))
+        self.batch_size = max(1, batch_size)
+        self.late_grace = timedelta(seconds=max(0, late_grace_seconds))
+        self.db = None
+        self.sinks: List[AlarmSink] = []
+        # (발송 시각, 순번, 알림). 같은 key가 다시 들어오면 _queued 값과 다른 예전 항목은 꺼낼 때 버린다.
+        self._heap: List[Tuple[datetime, int, AlarmFire]] = []
+        self._queued: Dict[str, datetime] = {}
+        self._seq = itertools.count()
+        self._loaded_until: Optional[datetime] = None
+        self._next_refill: Optional[datetime] = None
+        self._refill_requested = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+        self.skipped = 0
+        self.late = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, db, sinks: List[AlarmSink]) -> None:
+        self.db = db
+        self.sinks = sinks
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for sink in self.sinks:
+            await sink.close()
+
+    def notify_changed(self, fire_at: Optional[datetime]) -> None:
+        """알림 시각이 바뀌었을 때 호출. 이미 읽어 둔 구간 안이면 다음 루프에서 다시 읽는다."""
+        if not self.running or fire_at is None:
+            return
+        if self._loaded_until is None or fire_at <= self._loaded_until:
+            self._refill_requested = True
+            self._wakeup.set()
+
+    async def refill(self, now: datetime) -> int:
+        fires, complete_until = await load_due_fires(self.db, now + self.lookahead, self.batch_size)
+        added = 0
+        for fire in fires:
+            if self._queued.get(fire.key) == fire.fire_at:
+                continue
+            self._queued[fire.key] = fire.fire_at
+            heapq.heappush(self._heap, (fire.fire_at, next(self._seq), fire))
+            added += 1
+        self._loaded_until = complete_until
+        # 다 못 읽었으면(배치 상한) 읽은 구간 끝에서, 아니면 lookahead 절반마다 다시 읽는다
+        self._next_refill = min(now + self.lookahead / 2, max(complete_until, now))
+        self._refill_requested = False
+        return added
+
+    async def dispatch_due(self, now: datetime) -> int:
+        sent = 0
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, fire = heapq.heappop(self._heap)
+            if self._queued.get(fire.key) != fire_at:
+                continue
+            del self._queued[fire.key]
+            if not await claim_fire(self.db, fire, now):
+                self.skipped += 1
+                ALARM_FIRES.inc(source=fire.source, result="skipped")
+                continue
+            if now - fire_at > self.late_grace:
+                self.late += 1
+                ALARM_FIRES.inc(source=fire.source, result="late")
+                continue
+            for sink in self.sinks:
+                try:
+                    await sink.send(fire)
+                except Exception as e:
+                    self.failed += 1
+                    ALARM_FIRES.inc(source=fire.source, result=f"failed_{sink.name}")
+                    print(f"⚠️ 알림 발송 실패 ({sink.name}): {e}")
+            self.fired += 1
+            sent += 1
+            ALARM_FIRES.inc(source=fire.source, result="fired")
+        return sent
+
+    def _sleep_seconds(self, now: datetime) -> float:
+        wake_at = self._next_refill
+        if self._heap and (wake_at is None or self._heap[0][0] < wake_at):
+            wake_at = self._heap[0][0]
+        return max(0.0, (wake_at - now).total_seconds()) if wake_at else self.lookahead.total_seconds()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                now = _utcnow()
+                if self._refill_requested or self._next_refill is None or now >= self._next_refill:
+                    await self.refill(now)
+                await self.dispatch_due(_utcnow())
+                timeout = self._sleep_seconds(_utcnow())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ 알림 스케줄러 오류 (잠시 후 다시 시도): {e}")
+                self._next_refill = None
+                timeout = 5.0
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": len(self._queued),
+            "next_fire_at": self._heap[0][0].isoformat() if self._heap else None,
+            "loaded_until": self._loaded_until.isoformat() if self._loaded_until else None,
+            "fired": self.fired,
+            "skipped": self.skipped,
+            "late": self.late,
+            "failed": self.failed,
+            "sinks": [sink.name for sink in self.sinks],
+        }
+
+
+alarm_scheduler = AlarmScheduler(
+    lookahead_seconds=settings.alarm_lookahead_seconds,
+    batch_size=settings.alarm_batch_size,
+    late_grace_seconds=settings.alarm_late_grace_seconds,
+)
@@ -1,22 +1,43 @@
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import Depends, Header, HTTPException
+from core.cache import TTLCache
 from core.config import get_settings
+from core.password_hasher import password_hasher
 from db.mongo import get_db
+from db.users import load_user
 import uuid
 import hashlib
+import time
+
+try:
+    # 선택 의존성: JWT_BACKEND=pyjwt일 때 검증에 사용 (python-jose보다 HS256 검증이 빠르다)
+    import jwt as pyjwt
+except ModuleNotFoundError:  # pragma: no cover
+    pyjwt = None
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 settings = get_settings()
 
 ALGORITHM = "HS256"
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# 검증이 끝난 access token payload (key: 토큰 문자열, 토큰 만료 시각까지만 보관)
+_token_cache = TTLCache(
+    maxsize=settings.auth_cache_max_entries,
+    ttl=settings.access_token_expire_minutes * 60,
+)
+# 존재가 확인된 사용자 (key: user_id). 없는 사용자는 캐시하지 않는다.
+# 계정 삭제/정지처럼 인증 상태를 바꾸는 쓰기를 추가하면 그 경로에서 이 캐시를 지워야 한다.
+_user_exists_cache = TTLCache(
+    maxsize=settings.auth_cache_max_entries,
+    ttl=settings.auth_user_cache_ttl_seconds,
+)
+
+async def hash_password_async(password: str) -> str:
+    """bcrypt 해시를 작업 풀에서 실행 (풀이 가득 차면 503)"""
+    return await password_hasher.hash(password)
 
-def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await password_hasher.verify(password, hashed)
 
 def _create_token(data: dict, expires_delta: timedelta, secret: str) -> str:
     to_encode = data.copy()
@@ -36,14 +57,46 @@ def create_email_verification_token(sub: str) -> str:
 def create_password_reset_token(sub: str) -> str:
     return _create_token({"sub": sub, "type": "reset"}, timedelta(minutes=settings.reset_token_expire_minutes), settings.jwt_secret)
 
+def _use_pyjwt() -> bool:
+    return settings.jwt_backend == "pyjwt" and pyjwt is not None
+
 def decode_token(token: str, refresh: bool = False):
     secret = settings.jwt_refresh_secret if refresh else settings.jwt_secret
+    if _use_pyjwt():
+        try:
+            return pyjwt.decode(token, secret, algorithms=[ALGORITHM])
+        except pyjwt.PyJWTError:
+            return None
     try:
         payload = jwt.decode(token, secret, algorithms=[ALGORITHM])
         return payload
     except JWTError:
         return None
 
+def decode_access_token(token: str):
+    """
+    access token 검증 결과를 토큰 문자열 기준으로 캐시한다 (LRU, 토큰 만료 시각까지).
+    같은 토큰이 다시 오면 파싱/서명/클레임 검증을 모두 건너뛰고 저장된 payload를 돌려준다.
+    """
+    if not settings.auth_cache_enabled:
+        return decode_token(token)
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return cached
+    payload = decode_token(token)
+    if payload and payload.get("type") == "access":
+        _token_cache.set(token, payload, ttl=payload.get("exp", 0) - time.time())
+    return payload
+
+async def user_exists(db, user_id: str) -> bool:
+    """인증 의존성에서 쓰는 사용자 존재 확인 (있는 사용자만 캐시됨)"""
+    if settings.auth_cache_enabled and _user_exists_cache.get(user_id):
+        return True
+    exists = await load_user(db, user_id) is not None
+    if exists and settings.auth_cache_enabled:
+        _user_exists_cache.set(user_id, True)
+    return exists
+
 def hash_refresh_token(token: str) -> str:
     """Store only hash of refresh token for security (rotation support)."""
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
@@ -51,23 +104,32 @@ def hash_refresh_token(token: str) -> str:
 def verify_refresh_token(raw_token: str, stored_hash: str) -> bool:
     return hash_refresh_token(raw_token) == stored_hash
 
-async def get_current_user(
-    authorization: str | None = Header(default=None),
-    db=Depends(get_db),
-):
+async def get_current_user_id(authorization: str | None = Header(default=None)) -> str:
     """
-    FastAPI dependency that validates the Bearer token and returns the Mongo user document.
+    Bearer access token에서 user_id만 꺼내는 공용 인증 의존성 (DB 조회 없음).
+    FastAPI가 요청 안에서 의존성 결과를 재사용하므로 토큰 검증은 요청당 한 번이고,
+    검증 결과는 decode_access_token의 캐시에 남아 다음 요청에서도 재사용된다.
     """
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing bearer token")
     token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
+    payload = decode_access_token(token)
     if not payload or payload.get("type") != "access":
         raise HTTPException(status_code=401, detail="Invalid access token")
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="Token missing subject")
-    user = await db["users"].find_one({"_id": user_id})
-    if not user:
+    return user_id
+
+async def get_current_user(
+    user_id: str = Depends(get_current_user_id),
+    db=Depends(get_db),
+):
+    """
+    FastAPI dependency that validates the Bearer token and returns `{"_id": user_id}`.
+    Token verification and the user existence check are served from in-process caches;
+    handlers fetch the fields they need via `db.users.load_user`.
+    """
+    if not await user_exists(db, user_id):
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+    return {"_id": user_id}
@@ -0,0 +1,38 @@
+"""
+큰 목록 응답을 한 번에 만들지 않고 JSON 배열로 흘려보내는 헬퍼
+- 커서에서 한 건씩 읽어 직렬화한 즉시 내보내므로 전체 dict 목록을 메모리에 쌓지 않는다.
+- 본문 형식은 일반 JSONResponse와 같은 JSON 배열이다.
+"""
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Callable
+
+from fastapi.responses import StreamingResponse
+
+# 작은 항목을 하나씩 내보내면 청크가 너무 잘게 쪼개지므로 어느 정도 모아서 보낸다
+CHUNK_BYTES = 64 * 1024
+
+
+def _dumps(item: Any) -> str:
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+
+
+async def _json_array(items: AsyncIterable[Any], serialize: Callable[[Any], Any]) -> AsyncIterator[bytes]:
+    buffer = ["["]
+    size = 1
+    first = True
+    async for item in items:
+        text = _dumps(serialize(item))
+        if not first:
+            text = "," + text
+        first = False
+        buffer.append(text)
+        size += len(text)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    buffer.append("]")
+    yield "".join(buffer).encode()
+
+
+def stream_json_array(items: AsyncIterable[Any], serialize: Callable[[Any], Any]) -> StreamingResponse:
+    return StreamingResponse(_json_array(items, serialize), media_type="application/json")
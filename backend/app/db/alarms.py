@@ -0,0 +1,277 @@
+"""
+시간 알림의 다음 발송 시각(next_fire_at) 관리
+- notification_settings 문서와 diaries.alarms[] 항목에 다음 발송 시각(UTC)을 저장하고 인덱스로 찾는다.
+  ("앞으로 N분 안에 울릴 알림"을 전체 문서를 읽어 time/repeat_option/weekdays를 계산하지 않고 범위 조회로 찾는다)
+- 계산 규칙은 앱(lib/data/notification_provider.dart)과 같다.
+  시각은 ALARM_TIMEZONE(기본 Asia/Seoul) 기준, weekdays는 1=월 … 7=일, weekly인데 요일이 없으면 매일,
+  none은 한 번만 울린다 (발송 후 next_fire_at = None).
+- 발송은 next_fire_at을 조건으로 다음 시각으로 바꾸는 데 성공한 쪽만 한다 (claim_fire).
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, UpdateOne
+
+from core.config import get_settings
+from db.diaries import DIARY_COLLECTION
+from db.indexes import register_index, register_query
+from db.notifications import NOTIFICATION_COLLECTION
+
+try:
+    from zoneinfo import ZoneInfo
+except ModuleNotFoundError:  # pragma: no cover
+    ZoneInfo = None
+
+SOURCE_NOTIFICATION = "notification"
+SOURCE_DIARY_ALARM = "diary_alarm"
+
+# 알림 시각을 바꾸는 필드 (이 필드가 바뀌면 next_fire_at을 다시 계산한다)
+NOTIFICATION_SCHEDULE_FIELDS = ("time", "repeat_option", "weekdays")
+DIARY_ALARM_SCHEDULE_FIELDS = ("time", "repeat_option", "weekDays")
+
+
+def _get_alarm_tz():
+    name = get_settings().alarm_timezone
+    if ZoneInfo is not None:
+        try:
+            return ZoneInfo(name)
+        except Exception:
+            pass
+    return timezone(timedelta(hours=9))
+
+
+ALARM_TZ = _get_alarm_tz()
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _parse_time(value: Any) -> Optional[Tuple[int, int]]:
+    if not isinstance(value, str):
+        return None
+    parts = value.split(":")
+    if len(parts) < 2:
+        return None
+    try:
+        hour, minute = int(parts[0]), int(parts[1])
+    except ValueError:
+        return None
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None
+    return hour, minute
+
+
+def _repeat(value: Any) -> str:
+    lower = str(value or "none").lower()
+    return lower if lower in ("daily", "weekly") else "none"
+
+
+def compute_next_fire_at(
+    time_value: Any, repeat_option: Any, weekdays: Any, after: datetime
+) -> Optional[datetime]:
+    """after 이후(초과) 첫 발송 시각 (UTC). 시각이 없거나 잘못됐으면 None"""
+    parsed = _parse_time(time_value)
+    if parsed is None:
+        return None
+    days = None
+    if _repeat(repeat_option) == "weekly" and weekdays:
+        days = {int(d) for d in weekdays if str(d).isdigit()}
+    local_after = _as_utc(after).astimezone(ALARM_TZ)
+    for offset in range(8):
+        day = local_after.date() + timedelta(days=offset)
+        if days is not None and day.isoweekday() not in days:
+            continue
+        candidate = datetime.combine(day, time(*parsed), tzinfo=ALARM_TZ)
+        if candidate > local_after:
+            return candidate.astimezone(timezone.utc)
+    return None
+
+
+def notification_next_fire_at(doc: dict, after: datetime) -> Optional[datetime]:
+    return compute_next_fire_at(doc.get("time"), doc.get("repeat_option"), doc.get("weekdays"), after)
+
+
+def diary_alarm_next_fire_at(alarm: dict, after: datetime) -> Optional[datetime]:
+    return compute_next_fire_at(alarm.get("time"), alarm.get("repeat_option"), alarm.get("weekDays"), after)
+
+
+def fill_alarm_fire_times(alarms: List[dict], now: datetime) -> List[dict]:
+    """next_fire_at이 없는 일기 알림 항목만 계산해서 채운다 (이미 있는 값은 그대로 둔다)"""
+    for alarm in alarms:
+        if "next_fire_at" not in alarm:
+            alarm["next_fire_at"] = diary_alarm_next_fire_at(alarm, now)
+    return alarms
+
+
+register_index(NOTIFICATION_COLLECTION, [("next_fire_at", ASCENDING)])
+register_index(DIARY_COLLECTION, [("alarms.next_fire_at", ASCENDING)])
+
+register_query(
+    "scheduler notifications due", NOTIFICATION_COLLECTION,
+    {"next_fire_at": {"$lte": datetime(2025, 1, 1)}}, sort=[("next_fire_at", ASCENDING)],
+)
+register_query("scheduler diary alarms due", DIARY_COLLECTION, {"alarms.next_fire_at": {"$lte": datetime(2025, 1, 1)}})
+
+
+@dataclass
+class AlarmFire:
+    """발송 예정 한 건. key는 (출처, 문서, 알림 항목) 단위로 고유하다."""
+    source: str
+    user_id: str
+    ref_id: Any
+    fire_at: datetime
+    alarm_id: Optional[str] = None
+    schedule: Dict[str, Any] = field(default_factory=dict)
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}:{self.ref_id}:{self.alarm_id or ''}"
+
+    def next_after(self, now: datetime) -> Optional[datetime]:
+        """발송 후 다음 시각. 지난 발송분은 몰아서 보내지 않는다."""
+        if _repeat(self.schedule.get("repeat_option")) == "none":
+            return None
+        return compute_next_fire_at(
+            self.schedule.get("time"), self.schedule.get("repeat_option"), self.schedule.get("weekdays"),
+            max(self.fire_at, now),
+        )
+
+    def to_message(self) -> dict:
+        return {
+            "source": self.source,
+            "user_id": self.user_id,
+            "id": str(self.ref_id),
+            "alarm_id": self.alarm_id,
+            "fire_at": self.fire_at.isoformat(),
+            **self.payload,
+        }
+
+
+async def load_due_fires(db, until: datetime, limit: int) -> Tuple[List[AlarmFire], datetime]:
+    """
+    until까지 울릴 알림을 시각순으로 읽는다 (출처별 최대 limit건).
+    한 출처라도 limit에 걸리면 그 출처의 마지막 시각까지만 빠짐없이 읽은 것이므로 그 시각을 함께 돌려준다.
+    """
+    until = _as_utc(until)
+    complete_until = until
+    fires: List[AlarmFire] = []
+
+    cursor = db[NOTIFICATION_COLLECTION].find(
+        {"next_fire_at": {"$lte": until}},
+        {"user_id": 1, "abc_id": 1, "next_fire_at": 1, "time": 1, "repeat_option": 1, "weekdays": 1,
+         "description": 1, "location": 1, "has_location": 1},
+    ).sort("next_fire_at", ASCENDING).limit(limit)
+    notifications = await cursor.to_list(length=limit)
+    for doc in notifications:
+        fires.append(AlarmFire(
+            source=SOURCE_NOTIFICATION,
+            user_id=doc["user_id"],
+            ref_id=doc["_id"],
+            fire_at=_as_utc(doc["next_fire_at"]),
+            schedule={k: doc.get(k) for k in NOTIFICATION_SCHEDULE_FIELDS},
+            payload={
+                "abc_id": doc.get("abc_id"),
+                "description": doc.get("description"),
+                "location": doc.get("location"),
+                "has_location": doc.get("has_location", False),
+            },
+        ))
+    if len(notifications) >= limit:
+        complete_until = min(complete_until, fires[-1].fire_at)
+
+    # 배열 필드 정렬은 문서 안 최솟값(None 포함) 기준이라, 알림 항목 단위로 펼친 뒤 정렬한다
+    due = {"alarms.next_fire_at": {"$lte": until}}
+    pipeline = [
+        {"$match": due},
+        {"$project": {"user_id": 1, "diary_id": 1, "alarms": 1}},
+        {"$unwind": "$alarms"},
+        {"$match": {**due, "alarms.alarm_id": {"$exists": True}}},
+        {"$sort": {"alarms.next_fire_at": ASCENDING}},
+        {"$limit": limit},
+    ]
+    rows = await db[DIARY_COLLECTION].aggregate(pipeline).to_list(length=limit)
+    diary_fires: List[AlarmFire] = []
+    for row in rows:
+        alarm = row["alarms"]
+        diary_fires.append(AlarmFire(
+            source=SOURCE_DIARY_ALARM,
+            user_id=row["user_id"],
+            ref_id=row["_id"],
+            alarm_id=alarm["alarm_id"],
+            fire_at=_as_utc(alarm["next_fire_at"]),
+            schedule={
+                "time": alarm.get("time"),
+                "repeat_option": alarm.get("repeat_option"),
+                "weekdays": alarm.get("weekDays"),
+            },
+            payload={"diary_id": row.get("diary_id"), "location_desc": alarm.get("location_desc")},
+        ))
+    if len(rows) >= limit:
+        complete_until = min(complete_until, diary_fires[-1].fire_at)
+
+    fires.extend(diary_fires)
+    fires.sort(key=lambda f: f.fire_at)
+    return [f for f in fires if f.fire_at <= complete_until], complete_until
+
+
+async def claim_fire(db, fire: AlarmFire, now: datetime) -> bool:
+    """
+    next_fire_at이 아직 fire.fire_at일 때만 다음 시각으로 넘긴다.
+    실패하면 다른 워커가 이미 보냈거나, 그 사이 알림이 수정/삭제된 것이다.
+    """
+    next_at = fire.next_after(now)
+    if fire.source == SOURCE_NOTIFICATION:
+        result = await db[NOTIFICATION_COLLECTION].update_one(
+            {"_id": fire.ref_id, "next_fire_at": fire.fire_at},
+            {"$set": {"next_fire_at": next_at}},
+        )
+    else:
+        result = await db[DIARY_COLLECTION].update_one(
+            {"_id": fire.ref_id, "alarms": {"$elemMatch": {"alarm_id": fire.alarm_id, "next_fire_at": fire.fire_at}}},
+            {"$set": {"alarms.$.next_fire_at": next_at}},
+        )
+    return result.modified_count == 1
+
+
+async def backfill_next_fire_at(db, batch_size: int = 500) -> int:
+    """next_fire_at이 없는 기존 알림을 채운다 (재실행해도 안전). 갱신한 문서/항목 수를 반환한다."""
+    now = datetime.now(timezone.utc)
+    updated = 0
+
+    collection = db[NOTIFICATION_COLLECTION]
+    ops = []
+    async for doc in collection.find({"next_fire_at": {"$exists": False}}, {"time": 1, "repeat_option": 1, "weekdays": 1}):
+        ops.append(UpdateOne(
+            {"_id": doc["_id"], "next_fire_at": {"$exists": False}},
+            {"$set": {"next_fire_at": notification_next_fire_at(doc, now)}},
+        ))
+        if len(ops) >= batch_size:
+            updated += (await collection.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        updated += (await collection.bulk_write(ops, ordered=False)).modified_count
+
+    # 일기 알림은 항목 단위로 채운다 (그 사이 사용자가 알림 목록을 바꿔도 다른 항목을 덮어쓰지 않도록)
+    collection = db[DIARY_COLLECTION]
+    ops = []
+    cursor = collection.find(
+        {"alarms": {"$elemMatch": {"alarm_id": {"$exists": True}, "next_fire_at": {"$exists": False}}}},
+        {"alarms": 1},
+    )
+    async for diary in cursor:
+        for alarm in diary.get("alarms") or []:
+            if not isinstance(alarm, dict) or not alarm.get("alarm_id") or "next_fire_at" in alarm:
+                continue
+            ops.append(UpdateOne(
+                {"_id": diary["_id"], "alarms": {"$elemMatch": {"alarm_id": alarm["alarm_id"], "next_fire_at": {"$exists": False}}}},
+                {"$set": {"alarms.$.next_fire_at": diary_alarm_next_fire_at(alarm, now)}},
+            ))
+        if len(ops) >= batch_size:
+            updated += (await collection.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        updated += (await collection.bulk_write(ops, ordered=False)).modified_count
+    return updated
@@ -0,0 +1,280 @@
+"""
+diaries 컬렉션 관리
+- 일기는 users 문서의 diaries 배열이 아니라 별도 컬렉션에 (user_id, diary_id) 단위로 저장한다.
+- 기존 users.diaries 배열은 온라인 마이그레이션으로 옮긴다 (중단 후 재실행해도 안전).
+- 걱정 그룹별 일기 통계(개수/마지막 작성/평균 SUD)는 한 번의 집계로 만들고 사용자 단위로 캐시한다.
+  일기/SUD를 쓰는 경로는 invalidate_group_stats()를 호출한다.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from core.cache import TTLCache
+from core.config import get_settings
+from db.indexes import apply_indexes, register_index, register_query, retire_index
+from models.user import USER_COLLECTION
+
+DIARY_COLLECTION = "diaries"
+
+settings = get_settings()
+
+# key: user_id, value: {str(group_Id): 통계}
+_group_stats_cache = TTLCache(
+    maxsize=settings.worry_group_stats_cache_max_entries,
+    ttl=settings.worry_group_stats_cache_ttl_seconds,
+)
+
+# 이 프로세스에서 이미 마이그레이션 여부를 확인한 사용자
+_ready_users: set[str] = set()
+
+
+def _coerce_datetime(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _first_datetime(*values: Any) -> Optional[datetime]:
+    for value in values:
+        if isinstance(value, ObjectId):
+            return value.generation_time
+        value = _coerce_datetime(value)
+        if isinstance(value, datetime):
+            return value
+    return None
+
+
+def _build_migrated_doc(user_id: str, diary: Dict[str, Any], index: int, fallback: datetime) -> Dict[str, Any]:
+    """
+    fallback: createdAt / created_at / updatedAt / _id 시각이 모두 없거나 읽을 수 없을 때 쓸 시각.
+    목록 키셋 페이지네이션이 createdAt($lt 날짜)에 기대므로 createdAt은 항상 날짜로 저장한다.
+    """
+    doc = dict(diary)
+    legacy_id = doc.pop("_id", None)
+    # diary_id가 없는 과거 데이터는 배열 위치로 고정 ID를 부여해 재실행 시에도 같은 키가 되도록 한다
+    doc["diary_id"] = doc.get("diary_id") or f"diary_legacy_{index:04d}"
+    doc["user_id"] = user_id
+    created = _first_datetime(doc.get("createdAt"), doc.get("created_at"), doc.get("updatedAt"), legacy_id) or fallback
+    doc["createdAt"] = created
+    doc["updatedAt"] = _first_datetime(doc.get("updatedAt")) or created
+    return doc
+
+
+register_index(DIARY_COLLECTION, [("user_id", ASCENDING), ("diary_id", ASCENDING)], unique=True, name="user_diary_unique")
+# 목록 키셋 페이지네이션 정렬 (createdAt desc, diary_id desc)과 동일한 순서
+register_index(DIARY_COLLECTION, [("user_id", ASCENDING), ("createdAt", DESCENDING), ("diary_id", DESCENDING)])
+# 초기 버전의 (user_id, createdAt desc) 인덱스는 위 인덱스의 접두사라 중복
+retire_index(DIARY_COLLECTION, "user_id_1_createdAt_-1")
+register_index(DIARY_COLLECTION, [("user_id", ASCENDING), ("group_Id", ASCENDING)])
+# /sync 변경분 조회
+register_index(DIARY_COLLECTION, [("user_id", ASCENDING), ("updatedAt", ASCENDING)])
+
+register_query(
+    "GET /diaries", DIARY_COLLECTION,
+    {"user_id": "u", "createdAt": {"$lt": datetime(2025, 1, 1)}},
+    sort=[("createdAt", DESCENDING), ("diary_id", DESCENDING)],
+)
+register_query("GET /diaries?group_id", DIARY_COLLECTION, {"user_id": "u", "group_Id": 1})
+register_query(
+    "GET /diaries/confront-avoid-logs", DIARY_COLLECTION, {"user_id": "u", "confrontAvoidLogs": {"$type": "object"}}
+)
+register_query("GET /diaries/{id}", DIARY_COLLECTION, {"user_id": "u", "diary_id": "d"})
+register_query("GET /users/me/worry-groups?with_stats", DIARY_COLLECTION, {"user_id": "u"})
+register_query("GET /sync diaries", DIARY_COLLECTION, {"user_id": "u", "updatedAt": {"$gte": datetime(2025, 1, 1)}})
+
+
+async def ensure_diary_indexes(db) -> None:
+    await apply_indexes(db, [DIARY_COLLECTION])
+
+
+async def migrate_user_diaries(db, user_id: str) -> int:
+    """
+    한 사용자의 users.diaries 배열을 diaries 컬렉션으로 옮기고 배열을 제거한다.
+
+    - $setOnInsert upsert라서 이미 옮겨진 일기(이후 수정된 것 포함)는 덮어쓰지 않는다.
+    - 옮기는 도중 배열이 바뀌면 $unset이 매칭되지 않으므로 다시 읽어서 반복한다.
+    """
+    migrated = 0
+    while True:
+        user = await db[USER_COLLECTION].find_one({"_id": user_id}, {"diaries": 1, "created_at": 1})
+        if not user or "diaries" not in user:
+            return migrated
+
+        raw = user.get("diaries")
+        embedded = raw if isinstance(raw, list) else []
+        # 시각 정보가 하나도 없는 일기: 가입 시각, 그것도 없으면 지금 (한 번 저장되면 바뀌지 않는다)
+        fallback = _first_datetime(user.get("created_at")) or datetime.now(timezone.utc)
+        ops = [
+            UpdateOne(
+                {"user_id": user_id, "diary_id": doc["diary_id"]},
+                {"$setOnInsert": doc},
+                upsert=True,
+            )
+            for doc in (
+                _build_migrated_doc(user_id, diary, idx, fallback)
+                for idx, diary in enumerate(embedded)
+                if isinstance(diary, dict)
+            )
+        ]
+        if ops:
+            await db[DIARY_COLLECTION].bulk_write(ops, ordered=False)
+
+        guard = {"$size": len(embedded)} if isinstance(raw, list) else {"$exists": True}
+        result = await db[USER_COLLECTION].update_one(
+            {"_id": user_id, "diaries": guard},
+            {
+                "$unset": {"diaries": ""},
+                "$set": {"diaries_migrated_at": datetime.now(timezone.utc)},
+            },
+        )
+        migrated += len(ops)
+        if result.modified_count:
+            invalidate_group_stats(user_id)
+            return migrated
+
+
+async def ensure_user_diaries(db, user_id: str) -> bool:
+    """
+    요청 경로에서 호출: 아직 옮겨지지 않은 사용자라면 즉시 마이그레이션한다.
+    사용자가 없으면 False를 반환한다. 확인 결과는 프로세스 단위로 기억한다.
+    """
+    if user_id in _ready_users:
+        return True
+    user = await db[USER_COLLECTION].find_one(
+        {"_id": user_id},
+        {"_id": 1, "diaries": {"$slice": 0}},
+    )
+    if not user:
+        return False
+    if "diaries" in user:
+        await migrate_user_diaries(db, user_id)
+    _ready_users.add(user_id)
+    return True
+
+
+def _sud_values(field: str) -> Dict[str, Any]:
+    """sudScores 항목들의 field 값 배열 (값이 없거나 null인 항목은 뺀다)"""
+    return {
+        "$filter": {
+            "input": {"$map": {"input": {"$ifNull": ["$sudScores", []]}, "as": "s", "in": f"$$s.{field}"}},
+            "cond": {"$ne": ["$$this", None]},
+        }
+    }
+
+
+def _average(total: Any, count: int) -> Any:
+    return round(total / count, 2) if count else None
+
+
+def group_stats_pipeline(user_id: str) -> list:
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$project": {
+            "_id": 0,
+            "group_Id": 1,
+            "createdAt": 1,
+            "before": _sud_values("before_sud"),
+            "after": _sud_values("after_sud"),
+        }},
+        {"$group": {
+            "_id": "$group_Id",
+            "diary_count": {"$sum": 1},
+            "last_diary_at": {"$max": "$createdAt"},
+            "before_sum": {"$sum": {"$sum": "$before"}},
+            "before_count": {"$sum": {"$size": "$before"}},
+            "after_sum": {"$sum": {"$sum": "$after"}},
+            "after_count": {"$sum": {"$size": "$after"}},
+        }},
+    ]
+
+
+async def diary_group_stats(db, user_id: str) -> Dict[str, Dict[str, Any]]:
+    """
+    걱정 그룹별 일기 통계 {str(group_Id): {diary_count, last_diary_at, avg_before_sud, avg_after_sud}}.
+    평균 SUD는 그룹 안 일기들의 모든 SUD 기록에 대한 평균이다.
+    """
+    cached = _group_stats_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    async for row in db[DIARY_COLLECTION].aggregate(group_stats_pipeline(user_id)):
+        if row["_id"] is None:
+            continue
+        last = _coerce_datetime(row.get("last_diary_at"))
+        stats[str(row["_id"])] = {
+            "diary_count": row["diary_count"],
+            "last_diary_at": last.isoformat() if isinstance(last, datetime) else last,
+            "avg_before_sud": _average(row["before_sum"], row["before_count"]),
+            "avg_after_sud": _average(row["after_sum"], row["after_count"]),
+        }
+    _group_stats_cache.set(user_id, stats)
+    return stats
+
+
+def invalidate_group_stats(user_id: str) -> None:
+    """일기 생성/수정, SUD 추가/수정 뒤에 호출 (이 프로세스의 캐시만 지운다)"""
+    _group_stats_cache.pop(user_id)
+
+
+async def repair_created_at(db, batch_size: int = 500) -> int:
+    """
+    createdAt이 날짜가 아닌(없거나 문자열) 일기를 고친다: createdAt 문자열 → updatedAt → 문서 _id 시각.
+    예전 마이그레이션이 문자열/빈 createdAt을 그대로 옮긴 경우 키셋 목록에서 빠지거나 커서가 꼬인다.
+    """
+    repaired = 0
+    while True:
+        docs = await (
+            db[DIARY_COLLECTION]
+            .find({"createdAt": {"$not": {"$type": "date"}}}, {"createdAt": 1, "created_at": 1, "updatedAt": 1, "user_id": 1})
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            return repaired
+        ops = []
+        for doc in docs:
+            created = _first_datetime(doc.get("createdAt"), doc.get("created_at"), doc.get("updatedAt"), doc["_id"])
+            updated = _first_datetime(doc.get("updatedAt")) or created
+            ops.append(UpdateOne(
+                {"_id": doc["_id"], "createdAt": doc.get("createdAt")},
+                {"$set": {"createdAt": created, "updatedAt": updated}},
+            ))
+            invalidate_group_stats(doc["user_id"])
+        result = await db[DIARY_COLLECTION].bulk_write(ops, ordered=False)
+        repaired += result.modified_count
+
+
+async def migrate_embedded_diaries(db, batch_size: int = 100) -> int:
+    """
+    diaries 배열이 남아 있는 모든 사용자를 _id 순서로 옮긴 뒤 createdAt이 날짜가 아닌 일기를 고친다.
+    옮겨진 사용자는 배열이 제거되므로 중단 후 다시 실행하면 남은 사용자부터 이어서 처리된다.
+    """
+    total = 0
+    last_id = None
+    while True:
+        query: Dict[str, Any] = {"diaries": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await (
+            db[USER_COLLECTION]
+            .find(query, {"_id": 1})
+            .sort("_id", ASCENDING)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            await repair_created_at(db)
+            return total
+        for user in batch:
+            total += await migrate_user_diaries(db, user["_id"])
+            _ready_users.add(user["_id"])
+        last_id = batch[-1]["_id"]
@@ -0,0 +1,188 @@
+"""
+인덱스 레지스트리
+- 각 라우터/db 모듈이 import 시점에 자기 컬렉션의 인덱스와 대표 쿼리 모양을 등록한다.
+- 앱 시작 시 apply_indexes()로 한 번에 생성한다 (이미 있으면 아무 일도 하지 않음).
+  같은 이름으로 정의만 바뀐 인덱스는 시작 시 건드리지 않고 경고만 남긴다.
+  지우고 다시 만드는 건 `python check_indexes.py --migrate`로 명시적으로 실행한다.
+- retire_index()로 등록한 더 이상 쓰지 않는 인덱스는 apply_indexes()가 지운다.
+- unique 인덱스는 중복 방지를 DB에 맡기므로(가입 이메일 등) 만들지 못하면 앱을 띄우지 않는다.
+  failed_unique_indexes()로 실패한 것을 찾고 find_duplicate_keys()로 겹치는 문서를 보여준다.
+- check_query_plans()는 등록된 쿼리를 explain()해서 COLLSCAN이 나오는 쿼리를 찾는다.
+  실행: backend/app 디렉토리에서 `python check_indexes.py`
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo.errors import OperationFailure
+
+Keys = Sequence[Tuple[str, int]]
+
+# 같은 이름/키로 옵션만 바뀐 인덱스: migrate=True일 때만 지우고 다시 만든다
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+INDEX_NOT_FOUND = 27
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    options: Dict[str, Any] = field(default_factory=dict, hash=False, compare=False)
+
+    @property
+    def name(self) -> str:
+        return self.options.get("name") or "_".join(f"{k}_{d}" for k, d in self.keys)
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    name: str
+    collection: str
+    filter: Dict[str, Any] = field(hash=False, compare=False)
+    sort: Optional[Tuple[Tuple[str, int], ...]] = None
+
+
+_indexes: Dict[Tuple[str, str], IndexSpec] = {}
+_queries: List[QueryShape] = []
+_retired: Dict[Tuple[str, str], None] = {}
+
+
+def register_index(collection: str, keys: Keys, **options: Any) -> None:
+    spec = IndexSpec(collection, tuple((k, d) for k, d in keys), options)
+    _indexes[(collection, spec.name)] = spec
+
+
+def retire_index(collection: str, name: str) -> None:
+    """예전에 만들었지만 이제 다른 인덱스와 겹치는 인덱스 (있으면 지운다)"""
+    _retired[(collection, name)] = None
+
+
+def register_query(name: str, collection: str, filter: Dict[str, Any], sort: Optional[Keys] = None) -> None:
+    """대표 쿼리 모양 등록 (값은 아무 예시 값이면 된다)"""
+    _queries.append(QueryShape(name, collection, filter, tuple(sort) if sort else None))
+
+
+def registered_indexes(collections: Optional[Iterable[str]] = None) -> List[IndexSpec]:
+    wanted = set(collections) if collections is not None else None
+    return [s for s in _indexes.values() if wanted is None or s.collection in wanted]
+
+
+def registered_queries() -> List[QueryShape]:
+    return list(_queries)
+
+
+async def _create(db, spec: IndexSpec, migrate: bool = False) -> None:
+    options = {"name": spec.name, **spec.options}
+    try:
+        await db[spec.collection].create_index(list(spec.keys), **options)
+    except OperationFailure as e:
+        if not migrate or e.code not in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT):
+            raise
+        # 지우고 다시 만드는 동안 이 인덱스를 쓰는 쿼리는 COLLSCAN이 되므로 명시적으로 요청할 때만
+        await db[spec.collection].drop_index(spec.name)
+        await db[spec.collection].create_index(list(spec.keys), **options)
+
+
+async def _drop_retired(db, collection: str, name: str) -> bool:
+    try:
+        await db[collection].drop_index(name)
+    except OperationFailure as e:
+        if e.code != INDEX_NOT_FOUND:
+            raise
+        return False
+    return True
+
+
+async def apply_indexes(
+    db, collections: Optional[Iterable[str]] = None, migrate: bool = False
+) -> Dict[str, List[str]]:
+    """
+    등록된 인덱스를 만든다. 컬렉션별 (생성/확인된 인덱스 이름 목록)을 반환한다.
+    한 컬렉션에서 실패해도 나머지는 계속 진행하고, 실패는 "!이름: 오류", 지운 retired 인덱스는 "-이름"으로 표시한다.
+    기존 인덱스와 정의가 다르면 migrate=True일 때만 다시 만들고, 아니면 실패로 표시하고 넘어간다.
+    """
+    wanted = set(collections) if collections is not None else None
+    result: Dict[str, List[str]] = {}
+    for spec in registered_indexes(wanted):
+        names = result.setdefault(spec.collection, [])
+        try:
+            await _create(db, spec, migrate)
+            names.append(spec.name)
+        except OperationFailure as e:
+            if e.code in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT):
+                names.append(f"!{spec.name}: 기존 인덱스와 정의가 다름 (check_indexes.py --migrate로 재생성)")
+            else:
+                names.append(f"!{spec.name}: {e}")
+        except Exception as e:
+            names.append(f"!{spec.name}: {e}")
+    for collection, name in _retired:
+        if wanted is not None and collection not in wanted:
+            continue
+        try:
+            if await _drop_retired(db, collection, name):
+                result.setdefault(collection, []).append(f"-{name}")
+        except Exception as e:
+            result.setdefault(collection, []).append(f"!{name}: {e}")
+    return result
+
+
+def failed_unique_indexes(result: Dict[str, List[str]]) -> List[IndexSpec]:
+    """apply_indexes() 결과에서 만들지 못한 unique 인덱스"""
+    failed = {
+        (collection, name[1:].split(":", 1)[0])
+        for collection, names in result.items()
+        for name in names
+        if name.startswith("!")
+    }
+    return [s for s in _indexes.values() if s.options.get("unique") and (s.collection, s.name) in failed]
+
+
+async def find_duplicate_keys(db, spec: IndexSpec, limit: int = 20) -> List[Dict[str, Any]]:
+    """unique 인덱스 키가 겹치는 문서 묶음 ({"key": ..., "count": n, "ids": [...]})"""
+    pipeline: List[Dict[str, Any]] = []
+    if spec.options.get("partialFilterExpression"):
+        pipeline.append({"$match": spec.options["partialFilterExpression"]})
+    pipeline += [
+        {"$group": {
+            "_id": {k.replace(".", "_"): f"${k}" for k, _ in spec.keys},
+            "count": {"$sum": 1},
+            "ids": {"$push": "$_id"},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ]
+    rows = await db[spec.collection].aggregate(pipeline).to_list(None)
+    return [{"key": row["_id"], "count": row["count"], "ids": [str(i) for i in row["ids"]]} for row in rows]
+
+
+def _plan_stages(plan: Any) -> Iterable[str]:
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+async def explain_query(db, shape: QueryShape) -> List[str]:
+    cursor = db[shape.collection].find(shape.filter)
+    if shape.sort:
+        cursor = cursor.sort(list(shape.sort))
+    explained = await cursor.explain()
+    return list(_plan_stages(explained.get("queryPlanner", {}).get("winningPlan", {})))
+
+
+async def check_query_plans(db) -> List[Dict[str, Any]]:
+    """등록된 쿼리마다 winning plan의 stage 목록과 COLLSCAN 여부를 돌려준다"""
+    report = []
+    for shape in registered_queries():
+        stages = await explain_query(db, shape)
+        report.append({
+            "query": shape.name,
+            "collection": shape.collection,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
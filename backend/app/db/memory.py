@@ -0,0 +1,1399 @@
+"""
+인메모리 스토리지 엔진 (STORAGE_BACKEND=memory)
+- 라우터가 쓰는 Motor API(find/find_one/update_one/aggregate/bulk_write ...)와
+  쿼리/업데이트/집계 연산자 중 이 프로젝트에서 쓰는 것만 구현한다.
+- 부하 테스트/프로파일링에서 DB 지연을 빼고 파이썬 쪽 비용만 보거나,
+  MongoDB 없이 라우터를 돌려볼 때 사용한다. 운영용이 아님.
+
+저장 형태는 BSON과 맞춘다: datetime은 UTC naive + 밀리초 단위, tuple은 list.
+unique / partial / TTL 인덱스는 동작하고, 나머지 인덱스는 explain() 결과에만 쓰인다.
+"""
+import asyncio
+import copy
+import functools
+import math
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+_MISSING = object()
+
+# MongoDB가 $nearSphere 거리 계산에 쓰는 지구 반지름 (m)
+EARTH_RADIUS_M = 6_378_100.0
+
+INDEX_OPTIONS_CONFLICT = 85
+DUPLICATE_KEY = 11000
+
+
+# ============= 값 변환 / 비교 =============
+
+def _to_bson(value: Any) -> Any:
+    """저장 전 값 정규화: Motor가 돌려주는 모양(naive UTC datetime, 밀리초)으로 맞춘다"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, dict):
+        return {k: _to_bson(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_bson(v) for v in value]
+    return value
+
+
+def _type_rank(value: Any) -> int:
+    # BSON 비교 순서: null < 숫자 < 문자열 < 객체 < 배열 < ObjectId < bool < 날짜
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _compare(a: Any, b: Any) -> int:
+    """정렬/$max/집계 비교용 전체 순서"""
+    ra, rb = _type_rank(a), _type_rank(b)
+    if ra != rb:
+        return -1 if ra < rb else 1
+    if ra == 1:
+        return 0
+    if ra == 4:
+        for (ka, va), (kb, vb) in zip(a.items(), b.items()):
+            c = _compare(ka, kb) or _compare(va, vb)
+            if c:
+                return c
+        return (len(a) > len(b)) - (len(a) < len(b))
+    if ra == 5:
+        for va, vb in zip(a, b):
+            c = _compare(va, vb)
+            if c:
+                return c
+        return (len(a) > len(b)) - (len(a) < len(b))
+    try:
+        return (a > b) - (a < b)
+    except TypeError:
+        return 0
+
+
+def _equals(a: Any, b: Any) -> bool:
+    if a is _MISSING:
+        a = None
+    if b is _MISSING:
+        b = None
+    return _type_rank(a) == _type_rank(b) and _compare(a, b) == 0
+
+
+# ============= 경로 =============
+
+def _resolve(value: Any, parts: List[str]) -> List[Any]:
+    """점 경로의 후보 값 목록. 중간에 배열이 있으면 각 요소로 펼친다 (MongoDB 규칙)."""
+    if not parts:
+        return [value]
+    head, rest = parts[0], parts[1:]
+    if isinstance(value, dict):
+        return _resolve(value[head], rest) if head in value else [_MISSING]
+    if isinstance(value, list):
+        if head.isdigit():
+            idx = int(head)
+            return _resolve(value[idx], rest) if idx < len(value) else [_MISSING]
+        found = [
+            v
+            for item in value
+            if isinstance(item, (dict, list))
+            for v in _resolve(item, parts)
+            if v is not _MISSING
+        ]
+        return found or [_MISSING]
+    return [_MISSING]
+
+
+def _get_path(doc: Any, path: str) -> Any:
+    values = _resolve(doc, path.split("."))
+    if len(values) == 1:
+        return values[0]
+    return values
+
+
+def _set_path(doc: dict, parts: List[str], value: Any) -> None:
+    target: Any = doc
+    for i, part in enumerate(parts[:-1]):
+        nxt = parts[i + 1]
+        if isinstance(target, list):
+            idx = int(part)
+            while len(target) <= idx:
+                target.append(None)
+            if not isinstance(target[idx], (dict, list)):
+                target[idx] = [] if nxt.isdigit() else {}
+            target = target[idx]
+        else:
+            if not isinstance(target.get(part), (dict, list)):
+                target[part] = {}
+            target = target[part]
+    last = parts[-1]
+    if isinstance(target, list):
+        idx = int(last)
+        while len(target) <= idx:
+            target.append(None)
+        target[idx] = value
+    else:
+        target[last] = value
+
+
+def _unset_path(doc: dict, parts: List[str]) -> None:
+    target: Any = doc
+    for part in parts[:-1]:
+        if isinstance(target, list) and part.isdigit() and int(part) < len(target):
+            target = target[int(part)]
+        elif isinstance(target, dict) and part in target:
+            target = target[part]
+        else:
+            return
+    last = parts[-1]
+    if isinstance(target, dict):
+        target.pop(last, None)
+    elif isinstance(target, list) and last.isdigit() and int(last) < len(target):
+        target[int(last)] = None
+
+
+def _get_exact(doc: Any, parts: List[str]) -> Any:
+    target = doc
+    for part in parts:
+        if isinstance(target, dict) and part in target:
+            target = target[part]
+        elif isinstance(target, list) and part.isdigit() and int(part) < len(target):
+            target = target[int(part)]
+        else:
+            return _MISSING
+    return target
+
+
+# ============= 지리 =============
+
+def _point(value: Any) -> Optional[Tuple[float, float]]:
+    """GeoJSON Point 또는 [경도, 위도] → (경도, 위도)"""
+    if isinstance(value, dict) and value.get("type") == "Point":
+        value = value.get("coordinates")
+    if isinstance(value, list) and len(value) == 2 and all(isinstance(v, (int, float)) for v in value):
+        return float(value[0]), float(value[1])
+    return None
+
+
+def _sphere_distance(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    (lng1, lat1), (lng2, lat2) = a, b
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _near_distance(values: List[Any], arg: dict) -> Optional[float]:
+    center = _point(arg.get("$geometry"))
+    distances = [
+        _sphere_distance(center, p)
+        for p in (_point(v) for v in values if v is not _MISSING)
+        if p is not None
+    ]
+    if center is None or not distances:
+        return None
+    distance = min(distances)
+    if distance > arg.get("$maxDistance", float("inf")) or distance < arg.get("$minDistance", 0):
+        return None
+    return distance
+
+
+def _near_clause(query: dict) -> Optional[Tuple[str, dict]]:
+    for key, cond in (query or {}).items():
+        if isinstance(cond, dict):
+            for op in ("$nearSphere", "$near"):
+                if op in cond:
+                    return key, cond[op]
+    return None
+
+
+# ============= 쿼리 매칭 =============
+
+def _expand(values: List[Any]) -> Iterator[Any]:
+    for v in values:
+        yield v
+        if isinstance(v, list):
+            yield from v
+
+
+_NUMBER_TYPES = ("double", "int")
+
+
+def _bson_type(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, datetime):
+        return "date"
+    return "unknown"
+
+
+def _is_operator_dict(value: Any) -> bool:
+    return isinstance(value, dict) and bool(value) and all(k.startswith("$") for k in value)
+
+
+def _match_regex(value: Any, pattern: Any, options: str = "") -> bool:
+    if not isinstance(value, str):
+        return False
+    if isinstance(pattern, re.Pattern):
+        return bool(pattern.search(value))
+    flags = re.IGNORECASE if "i" in options else 0
+    if "m" in options:
+        flags |= re.MULTILINE
+    return bool(re.search(pattern, value, flags))
+
+
+_RANGE_OPS: Dict[str, Callable[[int], bool]] = {
+    "$gt": lambda c: c > 0,
+    "$gte": lambda c: c >= 0,
+    "$lt": lambda c: c < 0,
+    "$lte": lambda c: c <= 0,
+}
+
+
+def _match_op(values: List[Any], op: str, arg: Any, cond: dict) -> bool:
+    if op == "$eq":
+        if arg is None:
+            return any(v is _MISSING or v is None for v in _expand(values))
+        return any(_equals(v, arg) for v in _expand(values))
+    if op == "$ne":
+        return not _match_op(values, "$eq", arg, cond)
+    if op in _RANGE_OPS:
+        check = _RANGE_OPS[op]
+        return any(
+            v is not _MISSING and _type_rank(v) == _type_rank(arg) and check(_compare(v, arg))
+            for v in _expand(values)
+        )
+    if op == "$in":
+        return any(_match_op(values, "$eq", a, cond) for a in arg)
+    if op == "$nin":
+        return not _match_op(values, "$in", arg, cond)
+    if op == "$exists":
+        return any(v is not _MISSING for v in values) == bool(arg)
+    if op == "$size":
+        return any(isinstance(v, list) and len(v) == arg for v in values)
+    if op == "$all":
+        return all(_match_op(values, "$eq", a, cond) for a in arg)
+    if op == "$elemMatch":
+        return any(
+            isinstance(v, list) and any(_match_element(e, arg) for e in v)
+            for v in values
+        )
+    if op == "$regex":
+        return any(_match_regex(v, arg, cond.get("$options", "")) for v in _expand(values))
+    if op == "$options":
+        return True
+    if op == "$type":
+        names = arg if isinstance(arg, list) else [arg]
+        return any(_bson_type(v) in names or (_bson_type(v) in _NUMBER_TYPES and "number" in names) for v in _expand(values) if v is not _MISSING)
+    if op in ("$nearSphere", "$near"):
+        return _near_distance(values, arg) is not None
+    if op == "$geoWithin":
+        if "$centerSphere" not in arg:
+            raise OperationFailure("memory engine: only $geoWithin.$centerSphere is supported")
+        center, radius = arg["$centerSphere"]
+        return _near_distance(values, {"$geometry": center, "$maxDistance": radius * EARTH_RADIUS_M}) is not None
+    if op == "$not":
+        if isinstance(arg, dict):
+            return not all(_match_op(values, k, a, arg) for k, a in arg.items())
+        return not _match_op(values, "$regex", arg, {})
+    raise OperationFailure(f"memory engine: unsupported query operator {op}")
+
+
+def _match_element(element: Any, cond: Any) -> bool:
+    if _is_operator_dict(cond) and not any(k in ("$and", "$or", "$nor") for k in cond):
+        return all(_match_op([element], op, arg, cond) for op, arg in cond.items())
+    return isinstance(element, dict) and matches(element, cond)
+
+
+def _match_field(doc: dict, path: str, cond: Any) -> bool:
+    values = _resolve(doc, path.split("."))
+    if _is_operator_dict(cond):
+        return all(_match_op(values, op, arg, cond) for op, arg in cond.items())
+    if isinstance(cond, re.Pattern):
+        return any(_match_regex(v, cond) for v in _expand(values))
+    return _match_op(values, "$eq", cond, {})
+
+
+def matches(doc: dict, query: Optional[dict]) -> bool:
+    for key, cond in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, q) for q in cond):
+                return False
+        elif key == "$expr":
+            if not _truthy(_eval(cond, doc, {})):
+                return False
+        elif key == "$comment":
+            continue
+        elif not _match_field(doc, key, cond):
+            return False
+    return True
+
+
+# ============= 정렬 / projection =============
+
+def _normalize_sort(key_or_list: Any, direction: Optional[int] = None) -> List[Tuple[str, int]]:
+    if key_or_list is None:
+        return []
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [(k, d) for k, d in key_or_list]
+
+
+def _sort_docs(docs: List[dict], spec: List[Tuple[str, int]]) -> List[dict]:
+    if not spec:
+        return docs
+
+    def cmp(a: dict, b: dict) -> int:
+        for field, direction in spec:
+            c = _compare(_sort_value(a, field, direction), _sort_value(b, field, direction))
+            if c:
+                return c if direction >= 0 else -c
+        return 0
+
+    return sorted(docs, key=functools.cmp_to_key(cmp))
+
+
+def _sort_value(doc: dict, field: str, direction: int) -> Any:
+    value = _get_path(doc, field)
+    if value is _MISSING:
+        return None
+    if isinstance(value, list) and value:
+        # 배열은 오름차순이면 최소값, 내림차순이면 최대값 기준
+        pick = min if direction >= 0 else max
+        return pick(value, key=functools.cmp_to_key(_compare))
+    return value
+
+
+def _project(doc: dict, projection: Any) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {k: 1 for k in projection}
+    specs = {k: v for k, v in projection.items() if k != "_id"}
+    include_id = bool(projection.get("_id", 1))
+    inclusion = any(
+        (isinstance(v, dict) and "$elemMatch" in v) or (not isinstance(v, dict) and v)
+        for v in specs.values()
+    ) or (bool(projection.get("_id")) and "_id" in projection and bool(specs))
+
+    if inclusion:
+        out: dict = {}
+        if include_id and "_id" in doc:
+            out["_id"] = copy.deepcopy(doc["_id"])
+        for key, spec in specs.items():
+            value = _get_exact(doc, key.split("."))
+            if value is _MISSING:
+                continue
+            if isinstance(spec, dict):
+                value = _project_operator(value, spec)
+                if value is _MISSING:
+                    continue
+            _set_path(out, key.split("."), copy.deepcopy(value))
+        return out
+
+    out = copy.deepcopy(doc)
+    if not include_id:
+        out.pop("_id", None)
+    for key, spec in specs.items():
+        if isinstance(spec, dict):
+            value = _get_exact(out, key.split("."))
+            if value is not _MISSING:
+                _set_path(out, key.split("."), _project_operator(value, spec))
+        elif not spec:
+            _unset_path(out, key.split("."))
+    return out
+
+
+def _project_operator(value: Any, spec: dict) -> Any:
+    if "$elemMatch" in spec:
+        if not isinstance(value, list):
+            return _MISSING
+        for item in value:
+            if _match_element(item, spec["$elemMatch"]):
+                return [item]
+        return _MISSING
+    if "$slice" in spec:
+        if not isinstance(value, list):
+            return value
+        arg = spec["$slice"]
+        if isinstance(arg, list):
+            skip, limit = arg
+            start = skip if skip >= 0 else max(0, len(value) + skip)
+            return value[start:start + limit]
+        return value[:arg] if arg >= 0 else value[arg:]
+    raise OperationFailure(f"memory engine: unsupported projection {spec}")
+
+
+# ============= 업데이트 =============
+
+def _positional_paths(doc: dict, path: str, array_filters: List[dict], query: dict) -> List[List[str]]:
+    """$ / $[] / $[name] 이 들어간 경로를 실제 인덱스 경로들로 펼친다"""
+    parts = path.split(".")
+    results: List[List[str]] = [[]]
+    for i, part in enumerate(parts):
+        if not (part == "$" or part.startswith("$[")):
+            results = [r + [part] for r in results]
+            continue
+        expanded: List[List[str]] = []
+        for prefix in results:
+            array = _get_exact(doc, prefix)
+            if not isinstance(array, list):
+                continue
+            if part == "$":
+                idx = _first_query_match(array, ".".join(prefix), query)
+                if idx is not None:
+                    expanded.append(prefix + [str(idx)])
+                continue
+            name = part[2:-1]
+            for idx, item in enumerate(array):
+                if not name or _array_filter_matches(item, name, array_filters):
+                    expanded.append(prefix + [str(idx)])
+        results = expanded
+    return results
+
+
+def _array_filter_matches(item: Any, name: str, array_filters: List[dict]) -> bool:
+    for flt in array_filters:
+        conditions = {k: v for k, v in flt.items() if k == name or k.startswith(name + ".")}
+        if not conditions:
+            continue
+        for key, cond in conditions.items():
+            if key == name:
+                if not _match_element(item, cond):
+                    return False
+            elif not (isinstance(item, dict) and _match_field(item, key[len(name) + 1:], cond)):
+                return False
+        return True
+    return False
+
+
+def _first_query_match(array: List[Any], array_path: str, query: dict) -> Optional[int]:
+    for key, cond in (query or {}).items():
+        if key == array_path and isinstance(cond, dict) and "$elemMatch" in cond:
+            for idx, item in enumerate(array):
+                if _match_element(item, cond["$elemMatch"]):
+                    return idx
+        elif key.startswith(array_path + "."):
+            sub = key[len(array_path) + 1:]
+            for idx, item in enumerate(array):
+                if isinstance(item, dict) and _match_field(item, sub, cond):
+                    return idx
+        elif key == array_path:
+            for idx, item in enumerate(array):
+                if _match_element(item, cond) if isinstance(cond, dict) else _equals(item, cond):
+                    return idx
+    return None
+
+
+def _pull_matches(item: Any, cond: Any) -> bool:
+    if isinstance(cond, dict):
+        return _match_element(item, cond)
+    return _equals(item, cond)
+
+
+def _apply_push(current: Any, value: Any, unique: bool = False) -> List[Any]:
+    array = list(current) if isinstance(current, list) else []
+    if isinstance(value, dict) and "$each" in value:
+        items = value["$each"]
+        position = value.get("$position")
+    else:
+        items, position = [value], None
+    if unique:
+        items = [v for v in items if not any(_equals(v, e) for e in array)]
+    if position is None:
+        array.extend(items)
+    else:
+        array[position:position] = items
+    if isinstance(value, dict) and "$sort" in value:
+        spec = value["$sort"]
+        if isinstance(spec, dict):
+            array = _sort_docs(array, list(spec.items()))
+        else:
+            array = sorted(array, key=functools.cmp_to_key(_compare), reverse=spec < 0)
+    if isinstance(value, dict) and "$slice" in value:
+        n = value["$slice"]
+        array = array[:n] if n >= 0 else array[n:]
+    return array
+
+
+def apply_update(
+    doc: dict,
+    update: Any,
+    *,
+    inserting: bool = False,
+    array_filters: Optional[List[dict]] = None,
+    query: Optional[dict] = None,
+) -> None:
+    if isinstance(update, list):
+        raise OperationFailure("memory engine: pipeline updates are not supported")
+    if not any(k.startswith("$") for k in update):
+        keep_id = doc.get("_id")
+        doc.clear()
+        doc.update(copy.deepcopy(update))
+        if keep_id is not None:
+            doc["_id"] = keep_id
+        return
+
+    filters = array_filters or []
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            for parts in _positional_paths(doc, path, filters, query or {}):
+                current = _get_exact(doc, parts)
+                if op in ("$set", "$setOnInsert"):
+                    _set_path(doc, parts, copy.deepcopy(value))
+                elif op == "$unset":
+                    _unset_path(doc, parts)
+                elif op == "$inc":
+                    _set_path(doc, parts, (0 if current in (_MISSING, None) else current) + value)
+                elif op == "$mul":
+                    _set_path(doc, parts, (0 if current in (_MISSING, None) else current) * value)
+                elif op in ("$max", "$min"):
+                    better = _compare(value, current) > 0 if op == "$max" else _compare(value, current) < 0
+                    if current is _MISSING or better:
+                        _set_path(doc, parts, copy.deepcopy(value))
+                elif op == "$push":
+                    _set_path(doc, parts, _apply_push(current, copy.deepcopy(value)))
+                elif op == "$addToSet":
+                    _set_path(doc, parts, _apply_push(current, copy.deepcopy(value), unique=True))
+                elif op == "$pull":
+                    if isinstance(current, list):
+                        _set_path(doc, parts, [i for i in current if not _pull_matches(i, value)])
+                elif op == "$pop":
+                    if isinstance(current, list) and current:
+                        _set_path(doc, parts, current[1:] if value < 0 else current[:-1])
+                elif op == "$currentDate":
+                    _set_path(doc, parts, _to_bson(datetime.now(timezone.utc)))
+                elif op == "$rename":
+                    if current is not _MISSING:
+                        _unset_path(doc, parts)
+                        _set_path(doc, value.split("."), current)
+                else:
+                    raise OperationFailure(f"memory engine: unsupported update operator {op}")
+
+
+def _upsert_seed(query: dict) -> dict:
+    """upsert로 새로 만들 문서의 초기값: 필터의 equality 조건"""
+    seed: dict = {}
+    for key, cond in (query or {}).items():
+        if key == "$and":
+            for sub in cond:
+                seed.update(_upsert_seed(sub))
+        elif key.startswith("$"):
+            continue
+        elif _is_operator_dict(cond):
+            if "$eq" in cond:
+                _set_path(seed, key.split("."), copy.deepcopy(cond["$eq"]))
+        else:
+            _set_path(seed, key.split("."), copy.deepcopy(cond))
+    return seed
+
+
+# ============= 집계 표현식 =============
+
+def _truthy(value: Any) -> bool:
+    return value not in (None, False, 0, _MISSING)
+
+
+def _eval(expr: Any, doc: Any, variables: Dict[str, Any]) -> Any:
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, _, rest = expr[2:].partition(".")
+        base = doc if name in ("ROOT", "CURRENT") else variables.get(name, _MISSING)
+        return _get_path(base, rest) if rest else base
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = _get_path(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, list):
+        return [_eval(e, doc, variables) for e in expr]
+    if isinstance(expr, dict):
+        if len(expr) == 1:
+            op, arg = next(iter(expr.items()))
+            if op.startswith("$"):
+                return _eval_operator(op, arg, doc, variables)
+        return {k: _eval(v, doc, variables) for k, v in expr.items()}
+    return expr
+
+
+def _args(arg: Any, doc: Any, variables: Dict[str, Any]) -> List[Any]:
+    values = _eval(arg if isinstance(arg, list) else [arg], doc, variables)
+    return [None if v is _MISSING else v for v in values]
+
+
+def _numbers(values: Iterable[Any]) -> List[float]:
+    return [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+
+
+def _eval_operator(op: str, arg: Any, doc: Any, variables: Dict[str, Any]) -> Any:
+    if op == "$literal":
+        return arg
+    if op in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$cmp"):
+        a, b = _args(arg, doc, variables)
+        c = _compare(a, b)
+        return {
+            "$eq": c == 0, "$ne": c != 0, "$gt": c > 0, "$gte": c >= 0,
+            "$lt": c < 0, "$lte": c <= 0, "$cmp": c,
+        }[op]
+    if op == "$ifNull":
+        for value in _args(arg, doc, variables):
+            if value is not None:
+                return value
+        return None
+    if op == "$and":
+        return all(_truthy(v) for v in _args(arg, doc, variables))
+    if op == "$or":
+        return any(_truthy(v) for v in _args(arg, doc, variables))
+    if op == "$not":
+        return not _truthy(_args(arg, doc, variables)[0])
+    if op == "$cond":
+        if isinstance(arg, dict):
+            cond, then, other = arg["if"], arg["then"], arg["else"]
+        else:
+            cond, then, other = arg
+        return _eval(then if _truthy(_eval(cond, doc, variables)) else other, doc, variables)
+    if op == "$in":
+        needle, haystack = _args(arg, doc, variables)
+        return any(_equals(needle, v) for v in haystack or [])
+    if op == "$size":
+        value = _args(arg, doc, variables)[0]
+        return len(value) if isinstance(value, list) else 0
+    if op in ("$filter", "$map"):
+        array = _eval(arg["input"], doc, variables) or []
+        name = arg.get("as", "this")
+        out = []
+        for item in array:
+            scope = {**variables, name: item}
+            if op == "$filter":
+                if _truthy(_eval(arg["cond"], doc, scope)):
+                    out.append(item)
+            else:
+                out.append(_eval(arg["in"], doc, scope))
+        return out
+    if op == "$arrayElemAt":
+        array, idx = _args(arg, doc, variables)
+        try:
+            return array[idx]
+        except (IndexError, TypeError):
+            return _MISSING
+    if op in ("$first", "$last"):
+        array = _args(arg, doc, variables)[0]
+        if not isinstance(array, list) or not array:
+            return None
+        return array[0] if op == "$first" else array[-1]
+    if op == "$concatArrays":
+        return [item for array in _args(arg, doc, variables) for item in (array or [])]
+    if op in ("$sum", "$avg", "$max", "$min"):
+        values = _args(arg, doc, variables)
+        if len(values) == 1 and isinstance(values[0], list):
+            values = values[0]
+        return _accumulate(op, values)
+    if op == "$add":
+        values = _args(arg, doc, variables)
+        base = next((v for v in values if isinstance(v, datetime)), None)
+        total = sum(_numbers(values))
+        return base + timedelta(milliseconds=total) if base else total
+    if op == "$subtract":
+        a, b = _args(arg, doc, variables)
+        if isinstance(a, datetime) and isinstance(b, datetime):
+            return (a - b).total_seconds() * 1000
+        if isinstance(a, datetime):
+            return a - timedelta(milliseconds=b)
+        return None if a is None or b is None else a - b
+    if op == "$multiply":
+        result = 1
+        for v in _args(arg, doc, variables):
+            if v is None:
+                return None
+            result *= v
+        return result
+    if op == "$divide":
+        a, b = _args(arg, doc, variables)
+        return None if a is None or not b else a / b
+    if op == "$round":
+        values = _args(arg, doc, variables)
+        return None if values[0] is None else round(values[0], values[1] if len(values) > 1 else 0)
+    if op == "$floor":
+        value = _args(arg, doc, variables)[0]
+        return None if value is None else math.floor(value)
+    if op == "$toString":
+        value = _args(arg, doc, variables)[0]
+        return None if value is None else str(value)
+    if op == "$concat":
+        values = _args(arg, doc, variables)
+        return None if any(v is None or v is _MISSING for v in values) else "".join(values)
+    if op == "$convert":
+        target = arg.get("to")
+        if target not in ("date", "int"):
+            raise OperationFailure(f"memory engine: unsupported $convert target {target}")
+        value = _eval(arg["input"], doc, variables)
+        if value is None or value is _MISSING:
+            return _to_bson(_eval(arg.get("onNull"), doc, variables))
+        if target == "int":
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                if "onError" in arg:
+                    return _eval(arg["onError"], doc, variables)
+                raise OperationFailure(f"memory engine: cannot convert {value!r} to int")
+        if isinstance(value, datetime):
+            return value
+        try:
+            return _to_bson(datetime.fromisoformat(str(value).replace("Z", "+00:00")))
+        except ValueError:
+            if "onError" in arg:
+                return _to_bson(_eval(arg["onError"], doc, variables))
+            raise OperationFailure(f"memory engine: cannot convert {value!r} to date")
+    if op == "$dateToString":
+        date = _eval(arg["date"], doc, variables)
+        if not isinstance(date, datetime):
+            return None
+        tz = arg.get("timezone")
+        if tz:
+            from zoneinfo import ZoneInfo
+            date = date.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(tz))
+        return date.strftime(arg.get("format", "%Y-%m-%dT%H:%M:%S.%LZ").replace("%L", "000"))
+    raise OperationFailure(f"memory engine: unsupported expression operator {op}")
+
+
+def _accumulate(op: str, values: List[Any]) -> Any:
+    present = [v for v in values if v is not None and v is not _MISSING]
+    if op == "$sum":
+        return sum(_numbers(present))
+    if op == "$avg":
+        nums = _numbers(present)
+        return sum(nums) / len(nums) if nums else None
+    if op in ("$max", "$min"):
+        if not present:
+            return None
+        pick = max if op == "$max" else min
+        return pick(present, key=functools.cmp_to_key(_compare))
+    raise OperationFailure(f"memory engine: unsupported accumulator {op}")
+
+
+# ============= 집계 파이프라인 =============
+
+def _group(docs: List[dict], spec: dict) -> List[dict]:
+    groups: Dict[Any, dict] = {}
+    order: List[Any] = []
+    key_expr = spec["_id"]
+    for doc in docs:
+        key = _eval(key_expr, doc, {})
+        hashable = repr(key)
+        if hashable not in groups:
+            groups[hashable] = {"_id": key, "__values": {name: [] for name in spec if name != "_id"}}
+            order.append(hashable)
+        for name, acc in spec.items():
+            if name == "_id":
+                continue
+            (op, arg), = acc.items()
+            groups[hashable]["__values"][name].append(1 if op == "$count" else _eval(arg, doc, {}))
+
+    out = []
+    for hashable in order:
+        group = groups[hashable]
+        row = {"_id": group["_id"]}
+        for name, acc in spec.items():
+            if name == "_id":
+                continue
+            (op, _), = acc.items()
+            values = group["__values"][name]
+            if op == "$count":
+                row[name] = len(values)
+            elif op == "$first":
+                row[name] = values[0] if values else None
+            elif op == "$last":
+                row[name] = values[-1] if values else None
+            elif op == "$push":
+                row[name] = [v for v in values if v is not _MISSING]
+            elif op == "$addToSet":
+                uniq: List[Any] = []
+                for v in values:
+                    if v is not _MISSING and not any(_equals(v, u) for u in uniq):
+                        uniq.append(v)
+                row[name] = uniq
+            else:
+                row[name] = _accumulate(op, values)
+        out.append(row)
+    return out
+
+
+def _project_stage(docs: List[dict], spec: dict, add_fields: bool = False) -> List[dict]:
+    out = []
+    plain_inclusion = not add_fields and all(
+        not isinstance(v, (dict, str, list)) for k, v in spec.items() if k != "_id"
+    )
+    for doc in docs:
+        if plain_inclusion:
+            out.append(_project(doc, spec))
+            continue
+        if add_fields:
+            row = copy.deepcopy(doc)
+        else:
+            row = {"_id": copy.deepcopy(doc["_id"])} if spec.get("_id", 1) and "_id" in doc else {}
+            excluded = [k for k, v in spec.items() if v in (0, False)]
+            if excluded and len(excluded) == len(spec):
+                row = _project(doc, spec)
+                out.append(row)
+                continue
+        for key, value in spec.items():
+            if key == "_id" and value in (0, 1, True, False):
+                continue
+            if value in (1, True) and not add_fields:
+                existing = _get_exact(doc, key.split("."))
+                if existing is not _MISSING:
+                    _set_path(row, key.split("."), copy.deepcopy(existing))
+                continue
+            if value in (0, False):
+                continue
+            result = _eval(value, doc, {})
+            if result is not _MISSING:
+                _set_path(row, key.split("."), result)
+        out.append(row)
+    return out
+
+
+def _unwind(docs: List[dict], spec: Any) -> List[dict]:
+    if isinstance(spec, str):
+        spec = {"path": spec}
+    path = spec["path"].lstrip("$")
+    keep_empty = spec.get("preserveNullAndEmptyArrays", False)
+    index_field = spec.get("includeArrayIndex")
+    out = []
+    for doc in docs:
+        value = _get_exact(doc, path.split("."))
+        if isinstance(value, list) and value:
+            for position, item in enumerate(value):
+                row = copy.deepcopy(doc)
+                _set_path(row, path.split("."), copy.deepcopy(item))
+                if index_field:
+                    row[index_field] = position
+                out.append(row)
+        elif keep_empty:
+            out.append(copy.deepcopy(doc))
+        elif value is not _MISSING and value is not None and not isinstance(value, list):
+            out.append(copy.deepcopy(doc))
+    return out
+
+
+def run_pipeline(docs: List[dict], pipeline: List[dict]) -> List[dict]:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [d for d in docs if matches(d, _to_bson(spec))]
+        elif name == "$project":
+            docs = _project_stage(docs, spec)
+        elif name in ("$addFields", "$set"):
+            docs = _project_stage(docs, spec, add_fields=True)
+        elif name == "$unset":
+            fields = [spec] if isinstance(spec, str) else spec
+            docs = [_project(d, {f: 0 for f in fields}) for d in docs]
+        elif name == "$group":
+            docs = _group(docs, spec)
+        elif name == "$sort":
+            docs = _sort_docs(docs, list(spec.items()))
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$unwind":
+            docs = _unwind(docs, spec)
+        elif name == "$count":
+            docs = [{spec: len(docs)}] if docs else []
+        elif name == "$facet":
+            docs = [{key: run_pipeline([copy.deepcopy(d) for d in docs], sub) for key, sub in spec.items()}]
+        elif name == "$replaceRoot":
+            docs = [_eval(spec["newRoot"], d, {}) for d in docs]
+        else:
+            raise OperationFailure(f"memory engine: unsupported pipeline stage {name}")
+    return docs
+
+
+# ============= 컬렉션 / 커서 =============
+
+class MemoryCursor:
+    def __init__(self, collection: "MemoryCollection", query: dict, projection: Any = None):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[List[dict]] = None
+
+    def sort(self, key_or_list: Any, direction: Optional[int] = None) -> "MemoryCursor":
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, count: int) -> "MemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._limit = count
+        return self
+
+    def _materialize(self) -> List[dict]:
+        if self._results is None:
+            docs = self._collection._matching(self._query)
+            docs = _sort_docs(docs, self._sort)[self._skip:]
+            if self._limit:
+                docs = docs[: abs(self._limit)]
+            self._results = [_project(d, self._projection) for d in docs]
+        return self._results
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        await asyncio.sleep(0)
+        docs = self._materialize()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await asyncio.sleep(0)
+        for doc in self._materialize():
+            yield doc
+
+    async def explain(self) -> dict:
+        return {"queryPlanner": {"winningPlan": self._collection._plan(self._query, self._sort)}}
+
+
+class MemoryAggregateCursor:
+    def __init__(self, docs: List[dict]):
+        self._docs = docs
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        await asyncio.sleep(0)
+        return self._docs if length is None else self._docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await asyncio.sleep(0)
+        for doc in self._docs:
+            yield doc
+
+
+class MemoryCollection:
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._docs: Dict[Any, dict] = {}
+        self._indexes: Dict[str, dict] = {"_id_": {"key": [("_id", 1)], "unique": True}}
+
+    # ----- 내부 -----
+
+    def _expire(self) -> None:
+        for index in self._indexes.values():
+            seconds = index.get("expireAfterSeconds")
+            if seconds is None:
+                continue
+            field = index["key"][0][0]
+            cutoff = _to_bson(datetime.now(timezone.utc)) - timedelta(seconds=seconds)
+            for key, doc in list(self._docs.items()):
+                value = doc.get(field)
+                if isinstance(value, datetime) and value < cutoff:
+                    del self._docs[key]
+
+    def _matching(self, query: Optional[dict]) -> List[dict]:
+        self._expire()
+        query = _to_bson(query or {})
+        if "_id" in query and not isinstance(query["_id"], dict):
+            doc = self._docs.get(self._id_key(query["_id"]))
+            return [doc] if doc is not None and matches(doc, query) else []
+        docs = [d for d in self._docs.values() if matches(d, query)]
+        near = _near_clause(query)
+        if near:
+            # $near / $nearSphere 결과는 가까운 순
+            path, arg = near
+            docs.sort(key=lambda d: _near_distance(_resolve(d, path.split(".")), arg))
+        return docs
+
+    @staticmethod
+    def _id_key(value: Any) -> Any:
+        return repr(value) if isinstance(value, (dict, list)) else value
+
+    def _check_unique(self, doc: dict, ignore_key: Any = _MISSING) -> None:
+        for name, index in self._indexes.items():
+            if not index.get("unique") or name == "_id_":
+                continue
+            partial = index.get("partialFilterExpression")
+            if partial and not matches(doc, partial):
+                continue
+            fields = [f for f, _ in index["key"]]
+            values = [_get_path(doc, f) for f in fields]
+            values = [None if v is _MISSING else v for v in values]
+            for key, other in self._docs.items():
+                if key == ignore_key or (partial and not matches(other, partial)):
+                    continue
+                other_values = [_get_path(other, f) for f in fields]
+                if all(_equals(a, b) for a, b in zip(values, other_values)):
+                    raise DuplicateKeyError(
+                        f"E11000 duplicate key error collection: {self.name} index: {name}",
+                        DUPLICATE_KEY,
+                        {
+                            "keyPattern": dict(index["key"]),
+                            "keyValue": dict(zip(fields, values)),
+                        },
+                    )
+
+    def _insert(self, document: dict) -> Any:
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        doc = _to_bson(document)
+        key = self._id_key(doc["_id"])
+        if key in self._docs:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.name} index: _id_",
+                DUPLICATE_KEY,
+                {"keyPattern": {"_id": 1}, "keyValue": {"_id": doc["_id"]}},
+            )
+        self._check_unique(doc)
+        self._docs[key] = doc
+        return doc["_id"]
+
+    def _update(
+        self,
+        query: dict,
+        update: Any,
+        *,
+        multi: bool,
+        upsert: bool,
+        array_filters: Optional[List[dict]] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+    ) -> Tuple[int, int, Any, List[Tuple[dict, dict]]]:
+        """(matched, modified, upserted_id, [(before, after)])"""
+        query = _to_bson(query or {})
+        update = _to_bson(update)
+        targets = _sort_docs(self._matching(query), sort or [])
+        if not multi:
+            targets = targets[:1]
+        changes = []
+        modified = 0
+        for doc in targets:
+            before = copy.deepcopy(doc)
+            after = copy.deepcopy(doc)
+            apply_update(after, update, array_filters=array_filters, query=query)
+            after["_id"] = before["_id"]
+            if after != before:
+                self._check_unique(after, ignore_key=self._id_key(before["_id"]))
+                self._docs[self._id_key(before["_id"])] = after
+                modified += 1
+            changes.append((before, after))
+        if targets or not upsert:
+            return len(targets), modified, None, changes
+
+        new_doc = _upsert_seed(query)
+        apply_update(new_doc, update, inserting=True, array_filters=array_filters, query=query)
+        upserted_id = self._insert(new_doc)
+        return 0, 0, upserted_id, [(None, self._docs[self._id_key(upserted_id)])]
+
+    def _plan(self, query: dict, sort: List[Tuple[str, int]]) -> dict:
+        if "_id" in (query or {}):
+            return {"stage": "IDHACK"}
+        fields = {k for k in (query or {}) if not k.startswith("$")}
+        for branch in (query or {}).get("$or", []) + (query or {}).get("$and", []):
+            fields.update(k for k in branch if not k.startswith("$"))
+        sort_first = sort[0][0] if sort else None
+        for name, index in self._indexes.items():
+            first = index["key"][0][0]
+            if first in fields or (first == sort_first and not fields):
+                return {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": name}}
+        plan = {"stage": "COLLSCAN"}
+        return {"stage": "SORT", "inputStage": plan} if sort else plan
+
+    # ----- Motor API -----
+
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        await asyncio.sleep(0)
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True) -> InsertManyResult:
+        await asyncio.sleep(0)
+        documents = list(documents)
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            try:
+                inserted.append(self._insert(document))
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": e.code, "errmsg": str(e), "keyValue": e.details.get("keyValue")})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors, "writeConcernErrors": [], "nInserted": len(inserted),
+                "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": [],
+            })
+        return InsertManyResult(inserted, True)
+
+    async def find_one(self, filter: Optional[dict] = None, projection: Any = None, *args, sort=None, **kwargs):
+        await asyncio.sleep(0)
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        docs = _sort_docs(self._matching(filter), _normalize_sort(sort))
+        return _project(docs[0], projection) if docs else None
+
+    def find(self, filter: Optional[dict] = None, projection: Any = None, *args, sort=None, limit=0, skip=0, **kwargs):
+        cursor = MemoryCursor(self, filter or {}, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    async def update_one(self, filter: dict, update: Any, upsert: bool = False, array_filters=None, **kwargs) -> UpdateResult:
+        await asyncio.sleep(0)
+        matched, modified, upserted_id, _ = self._update(
+            filter, update, multi=False, upsert=upsert, array_filters=array_filters
+        )
+        raw = {"n": matched or (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def update_many(self, filter: dict, update: Any, upsert: bool = False, array_filters=None, **kwargs) -> UpdateResult:
+        await asyncio.sleep(0)
+        matched, modified, upserted_id, _ = self._update(
+            filter, update, multi=True, upsert=upsert, array_filters=array_filters
+        )
+        raw = {"n": matched or (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def replace_one(self, filter: dict, replacement: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        if any(k.startswith("$") for k in replacement):
+            raise ValueError("replacement can not include $ operators")
+        return await self.update_one(filter, replacement, upsert=upsert)
+
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: Any,
+        projection: Any = None,
+        sort=None,
+        upsert: bool = False,
+        return_document: bool = False,
+        array_filters=None,
+        **kwargs,
+    ):
+        await asyncio.sleep(0)
+        _, _, _, changes = self._update(
+            filter, update, multi=False, upsert=upsert,
+            array_filters=array_filters, sort=_normalize_sort(sort),
+        )
+        if not changes:
+            return None
+        before, after = changes[0]
+        doc = after if return_document else before
+        return None if doc is None else _project(doc, projection)
+
+    async def find_one_and_delete(self, filter: dict, projection: Any = None, sort=None, **kwargs):
+        await asyncio.sleep(0)
+        docs = _sort_docs(self._matching(filter), _normalize_sort(sort))
+        if not docs:
+            return None
+        self._docs.pop(self._id_key(docs[0]["_id"]))
+        return _project(docs[0], projection)
+
+    async def delete_one(self, filter: dict, **kwargs) -> DeleteResult:
+        await asyncio.sleep(0)
+        docs = self._matching(filter)[:1]
+        for doc in docs:
+            self._docs.pop(self._id_key(doc["_id"]))
+        return DeleteResult({"n": len(docs)}, True)
+
+    async def delete_many(self, filter: dict, **kwargs) -> DeleteResult:
+        await asyncio.sleep(0)
+        docs = self._matching(filter)
+        for doc in docs:
+            self._docs.pop(self._id_key(doc["_id"]))
+        return DeleteResult({"n": len(docs)}, True)
+
+    async def count_documents(self, filter: dict, limit: int = 0, skip: int = 0, **kwargs) -> int:
+        await asyncio.sleep(0)
+        count = max(0, len(self._matching(filter)) - skip)
+        return min(count, limit) if limit else count
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        await asyncio.sleep(0)
+        return len(self._docs)
+
+    async def distinct(self, key: str, filter: Optional[dict] = None, **kwargs) -> List[Any]:
+        await asyncio.sleep(0)
+        values: List[Any] = []
+        for doc in self._matching(filter):
+            for value in _expand(_resolve(doc, key.split("."))):
+                if value is _MISSING or isinstance(value, list):
+                    continue
+                if not any(_equals(value, v) for v in values):
+                    values.append(value)
+        return values
+
+    def aggregate(self, pipeline: List[dict], **kwargs) -> MemoryAggregateCursor:
+        docs = [copy.deepcopy(d) for d in self._matching({})]
+        return MemoryAggregateCursor(run_pipeline(docs, pipeline))
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **kwargs) -> BulkWriteResult:
+        await asyncio.sleep(0)
+        counts = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        errors = []
+        for index, op in enumerate(requests):
+            try:
+                if isinstance(op, InsertOne):
+                    self._insert(op._doc)
+                    counts["nInserted"] += 1
+                elif isinstance(op, (UpdateOne, UpdateMany, ReplaceOne)):
+                    matched, modified, upserted_id, _ = self._update(
+                        op._filter, op._doc,
+                        multi=isinstance(op, UpdateMany),
+                        upsert=bool(op._upsert),
+                        array_filters=getattr(op, "_array_filters", None),
+                    )
+                    counts["nMatched"] += matched
+                    counts["nModified"] += modified
+                    if upserted_id is not None:
+                        counts["nUpserted"] += 1
+                        counts["upserted"].append({"index": index, "_id": upserted_id})
+                elif isinstance(op, (DeleteOne, DeleteMany)):
+                    docs = self._matching(op._filter)
+                    if isinstance(op, DeleteOne):
+                        docs = docs[:1]
+                    for doc in docs:
+                        self._docs.pop(self._id_key(doc["_id"]))
+                    counts["nRemoved"] += len(docs)
+                else:
+                    raise OperationFailure(f"memory engine: unsupported bulk operation {type(op).__name__}")
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": e.code, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({**counts, "writeErrors": errors, "writeConcernErrors": []})
+        return BulkWriteResult(counts, True)
+
+    async def create_index(self, keys: Any, **kwargs) -> str:
+        await asyncio.sleep(0)
+        key = _normalize_sort(keys, 1)
+        name = kwargs.pop("name", None) or "_".join(f"{k}_{d}" for k, d in key)
+        spec = {"key": key, **kwargs}
+        existing = self._indexes.get(name)
+        if existing is not None and existing != spec:
+            raise OperationFailure(
+                f"An existing index has the same name as the requested index: {name}",
+                INDEX_OPTIONS_CONFLICT,
+            )
+        if spec.get("unique"):
+            seen: List[dict] = []
+            for doc in self._docs.values():
+                if spec.get("partialFilterExpression") and not matches(doc, spec["partialFilterExpression"]):
+                    continue
+                values = [_get_path(doc, f) for f, _ in key]
+                if any(all(_equals(a, b) for a, b in zip(values, other)) for other in seen):
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name}")
+                seen.append(values)
+        self._indexes[name] = spec
+        return name
+
+    async def drop_index(self, name: str, **kwargs) -> None:
+        await asyncio.sleep(0)
+        if name not in self._indexes:
+            raise OperationFailure(f"index not found with name [{name}]", 27)
+        del self._indexes[name]
+
+    async def index_information(self) -> Dict[str, dict]:
+        await asyncio.sleep(0)
+        return copy.deepcopy(self._indexes)
+
+    async def drop(self) -> None:
+        await self.database.drop_collection(self.name)
+
+
+class MemoryDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name: str) -> MemoryCollection:
+        return self[name]
+
+    async def list_collection_names(self) -> List[str]:
+        return list(self._collections)
+
+    async def drop_collection(self, name: str) -> None:
+        self._collections.pop(name, None)
+
+    async def command(self, command: Any, **kwargs) -> dict:
+        return {"ok": 1.0}
+
+
+class MemoryClient:
+    def __init__(self):
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(name)
+        return self._databases[name]
+
+    def get_database(self, name: str) -> MemoryDatabase:
+        return self[name]
+
+    def drop_database(self, name: str) -> None:
+        self._databases.pop(name, None)
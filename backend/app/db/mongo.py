@@ -5,6 +5,12 @@ from functools import lru_cache
 @lru_cache
 def get_client() -> AsyncIOMotorClient:
     settings = get_settings()
+    if settings.storage_backend == "memory":
+        from db.memory import MemoryClient
+        return MemoryClient()
+    if settings.metrics_enabled:
+        from core.metrics import mongo_command_listener
+        return AsyncIOMotorClient(settings.mongo_uri, event_listeners=[mongo_command_listener])
     return AsyncIOMotorClient(settings.mongo_uri)
 
 def get_db():
@@ -0,0 +1,187 @@
+"""
+notification_settings 컬렉션 관리
+- 목록은 (saved_at desc, _id desc) 키셋 페이지네이션으로 읽는다.
+- 위치 알림은 has_location 플래그로 구분하고, 부분(partial) 인덱스로 위치 알림만 색인한다.
+  (latitude/longitude 두 필드에 대한 $ne: None 조건은 인덱스 범위로 좁혀지지 않는다)
+- 좌표는 latitude/longitude와 함께 GeoJSON Point(geo)로도 저장하고 2dsphere 인덱스로
+  주변 알림 조회($nearSphere)와 근접 중복 판단에 쓴다.
+- 같은 알림으로 보는 기준은 dedup_key 하나로 저장하고 (user_id, abc_id, dedup_key) unique 부분 인덱스로 보장한다.
+  시간만 있는 알림은 time_key, 위치 알림은 좌표 격자(소수 GEO_CELL_DECIMALS자리) + 진입/이탈 조건이다.
+"""
+import math
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from db.indexes import register_index, register_query
+
+NOTIFICATION_COLLECTION = "notification_settings"
+
+# 목록 정렬: 저장 시각 최신순, 같은 시각이면 _id 역순
+NOTIFICATION_LIST_SORT = [("saved_at", DESCENDING), ("_id", DESCENDING)]
+
+
+# 이 거리(m) 안의 같은 조건 위치 알림은 같은 알림으로 본다 (GPS 오차로 좌표가 조금씩 달라지는 경우)
+DUPLICATE_RADIUS_M = 10.0
+
+EARTH_RADIUS_M = 6_378_100.0
+
+# 위치 알림 dedup_key의 좌표 격자: 소수 4자리 ≈ 11 m (격자가 달라도 DUPLICATE_RADIUS_M 안이면 라우터에서 합친다)
+GEO_CELL_DECIMALS = 4
+
+
+def has_location(doc: dict) -> bool:
+    return doc.get("latitude") is not None and doc.get("longitude") is not None
+
+
+def geo_point(latitude: float, longitude: float) -> dict:
+    """GeoJSON Point (좌표 순서는 [경도, 위도])"""
+    return {"type": "Point", "coordinates": [float(longitude), float(latitude)]}
+
+
+def near_sphere(latitude: float, longitude: float, max_distance_m: float) -> dict:
+    return {"$nearSphere": {"$geometry": geo_point(latitude, longitude), "$maxDistance": max_distance_m}}
+
+
+def within_sphere(latitude: float, longitude: float, max_distance_m: float) -> dict:
+    """$or 안에서도 쓸 수 있는 반경 조건 ($nearSphere는 $or에 넣을 수 없다)"""
+    return {"$geoWithin": {"$centerSphere": [[float(longitude), float(latitude)], max_distance_m / EARTH_RADIUS_M]}}
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """두 좌표 사이의 대원 거리 (haversine, m)"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def location_fields(doc: dict) -> Optional[dict]:
+    """has_location / geo 갱신값. 좌표가 없으면 None (geo는 $unset 대상)"""
+    if not has_location(doc):
+        return None
+    return {"has_location": True, "geo": geo_point(doc["latitude"], doc["longitude"])}
+
+
+def dedup_key(doc: dict) -> Optional[str]:
+    """같은 알림 판단 키. 위치 알림 → 좌표 격자, 시간만 있는 알림 → time_key, 그 밖(주소만 등)은 None"""
+    if has_location(doc):
+        lat = round(float(doc["latitude"]), GEO_CELL_DECIMALS)
+        lng = round(float(doc["longitude"]), GEO_CELL_DECIMALS)
+        enter, exit_ = int(bool(doc.get("notify_enter"))), int(bool(doc.get("notify_exit")))
+        return f"geo={lat:.{GEO_CELL_DECIMALS}f},{lng:.{GEO_CELL_DECIMALS}f}|enter={enter}|exit={exit_}"
+    if doc.get("time_key") and not doc.get("location"):
+        return doc["time_key"]
+    return None
+
+
+register_index(NOTIFICATION_COLLECTION, [("user_id", ASCENDING), ("saved_at", DESCENDING), ("_id", DESCENDING)])
+register_index(
+    NOTIFICATION_COLLECTION,
+    [("user_id", ASCENDING), ("abc_id", ASCENDING), ("saved_at", DESCENDING), ("_id", DESCENDING)],
+)
+register_index(
+    NOTIFICATION_COLLECTION,
+    [("user_id", ASCENDING), ("saved_at", DESCENDING), ("_id", DESCENDING)],
+    partialFilterExpression={"has_location": True},
+    name="user_location_saved_at",
+)
+# 주변 알림 조회 / 위치 알림 근접 중복 확인 (geo가 없는 문서는 색인되지 않는다)
+register_index(NOTIFICATION_COLLECTION, [("user_id", ASCENDING), ("geo", GEOSPHERE)])
+# 중복 알림 upsert 대상 (dedup_key가 없는 알림은 색인되지 않는다)
+register_index(
+    NOTIFICATION_COLLECTION,
+    [("user_id", ASCENDING), ("abc_id", ASCENDING), ("dedup_key", ASCENDING)],
+    unique=True,
+    partialFilterExpression={"dedup_key": {"$exists": True}},
+    name="user_abc_dedup_unique",
+)
+# /sync 변경분 조회
+register_index(NOTIFICATION_COLLECTION, [("user_id", ASCENDING), ("updated_at", ASCENDING)])
+
+register_query("GET /notifications", NOTIFICATION_COLLECTION, {"user_id": "u"}, sort=NOTIFICATION_LIST_SORT)
+register_query(
+    "GET /notifications?abc_id", NOTIFICATION_COLLECTION, {"user_id": "u", "abc_id": "a"}, sort=NOTIFICATION_LIST_SORT
+)
+register_query(
+    "GET /notifications?location_only", NOTIFICATION_COLLECTION,
+    {"user_id": "u", "has_location": True}, sort=NOTIFICATION_LIST_SORT,
+)
+register_query(
+    "GET /notifications/latest", NOTIFICATION_COLLECTION,
+    {"user_id": "u"}, sort=[("saved_at", DESCENDING), ("updated_at", DESCENDING)],
+)
+register_query(
+    "POST /notifications upsert", NOTIFICATION_COLLECTION, {"user_id": "u", "abc_id": "a", "dedup_key": "k"}
+)
+register_query(
+    "POST /notifications nearby duplicates", NOTIFICATION_COLLECTION,
+    {"user_id": "u", "abc_id": "a", "$or": [{"geo": within_sphere(37.5, 127.0, DUPLICATE_RADIUS_M)}]},
+)
+register_query(
+    "GET /notifications/nearby", NOTIFICATION_COLLECTION, {"user_id": "u", "geo": near_sphere(37.5, 127.0, 1000)}
+)
+register_query(
+    "GET /sync notifications", NOTIFICATION_COLLECTION, {"user_id": "u", "updated_at": {"$gte": datetime(2025, 1, 1)}}
+)
+
+
+async def backfill_location_flags(db, batch_size: int = 500) -> int:
+    """
+    has_location / geo가 없는 기존 알림을 채운다 (재실행해도 안전). 갱신한 문서 수를 반환한다.
+    좌표가 있는 문서는 한 건씩 GeoJSON을 만들어야 하므로 bulk_write로 나눠서 쓴다.
+    """
+    collection = db[NOTIFICATION_COLLECTION]
+    updated = 0
+    ops = []
+    cursor = collection.find(
+        {"geo": {"$exists": False}, "latitude": {"$ne": None}, "longitude": {"$ne": None}},
+        {"latitude": 1, "longitude": 1},
+    )
+    async for doc in cursor:
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": location_fields(doc)}))
+        if len(ops) >= batch_size:
+            updated += (await collection.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        updated += (await collection.bulk_write(ops, ordered=False)).modified_count
+
+    without_location = await collection.update_many(
+        {"has_location": {"$exists": False}},
+        {"$set": {"has_location": False}},
+    )
+    return updated + without_location.modified_count
+
+
+async def backfill_dedup_keys(db, batch_size: int = 500) -> int:
+    """
+    dedup_key가 없는 기존 알림을 채운다 (재실행해도 안전). 갱신한 문서 수를 반환한다.
+    예전에 중복 확인 없이 쌓인 같은 알림은 먼저 채워진 한 건만 키를 갖고 나머지는 키 없이 남는다.
+    """
+    collection = db[NOTIFICATION_COLLECTION]
+    updated = 0
+    ops = []
+
+    async def flush() -> int:
+        try:
+            return (await collection.bulk_write(ops, ordered=False)).modified_count
+        except BulkWriteError as e:
+            return e.details.get("nModified", 0)
+
+    cursor = collection.find(
+        {"dedup_key": {"$exists": False}, "$or": [{"has_location": True}, {"time_key": {"$exists": True}}]},
+        {"latitude": 1, "longitude": 1, "notify_enter": 1, "notify_exit": 1, "time_key": 1, "location": 1},
+    )
+    async for doc in cursor:
+        key = dedup_key(doc)
+        if key is None:
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"], "dedup_key": {"$exists": False}}, {"$set": {"dedup_key": key}}))
+        if len(ops) >= batch_size:
+            updated += await flush()
+            ops = []
+    if ops:
+        updated += await flush()
+    return updated
@@ -0,0 +1,249 @@
+"""
+스크린타임 일별 집계 (KST 기준)
+- screen_time: 원본 세션
+- screen_time_daily: (user_id, day) 단위 합계. 자정을 넘는 세션은 날짜별로 나눠서 더한다.
+- screen_time_totals: 사용자별 누적 합계 / 세션 수 / 마지막 종료 시각
+
+세션을 저장할 때 $inc로 갱신하므로 요약 조회는 원본을 다시 훑지 않는다.
+집계가 없는 기존 사용자는 처음 접근할 때(또는 backfill 스크립트로) 원본에서 만든다.
+- 만드는 쪽은 totals 문서를 rebuilding 상태로 먼저 insert 해서 선점한 한 요청뿐이다 (_id unique).
+  나머지 요청(같은 사용자의 세션 저장 포함)은 선점이 풀릴 때까지 기다리므로 그 사이 $inc가 섞이지 않는다.
+- 결과는 (user_id, day) / _id 기준 $set upsert로 쓰고, 선점(claim_id)이 그대로일 때만 완료 처리한다.
+"""
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+except ModuleNotFoundError:  # pragma: no cover
+    ZoneInfo = None
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from db.indexes import apply_indexes, register_index, register_query
+
+SCREEN_TIME_COLLECTION = "screen_time"
+DAILY_COLLECTION = "screen_time_daily"
+TOTALS_COLLECTION = "screen_time_totals"
+
+
+def _get_kst_tz():
+    if ZoneInfo is not None:
+        try:
+            return ZoneInfo("Asia/Seoul")
+        except Exception:
+            pass
+    return timezone(timedelta(hours=9))
+
+
+KST = _get_kst_tz()
+
+# 이 프로세스에서 이미 집계 존재 여부를 확인한 사용자
+_ready_users: set[str] = set()
+
+# 집계를 만들던 프로세스가 죽었다고 보고 선점을 넘겨받기까지의 시간
+REBUILD_CLAIM_TTL = timedelta(seconds=60)
+# 다른 요청이 집계를 만드는 동안 확인 간격
+REBUILD_POLL_SECONDS = 0.05
+
+
+def _as_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def kst_day(dt: datetime) -> str:
+    return dt.astimezone(KST).date().isoformat()
+
+
+def _kst_day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=KST).astimezone(timezone.utc)
+
+
+def split_by_kst_day(start: datetime, end: datetime) -> Iterator[Tuple[str, float, bool]]:
+    """
+    세션을 KST 자정 기준으로 잘라 (day, minutes, continued)를 돌려준다.
+    continued는 전날부터 이어진 구간인지 여부 (기간 내 세션 수를 셀 때 중복 제거용).
+    """
+    start, end = _as_utc(start), _as_utc(end)
+    cursor = start
+    continued = False
+    while cursor < end:
+        day = cursor.astimezone(KST).date()
+        boundary = min(end, _kst_day_start(day + timedelta(days=1)))
+        yield day.isoformat(), (boundary - cursor).total_seconds() / 60, continued
+        cursor = boundary
+        continued = True
+
+
+register_index(SCREEN_TIME_COLLECTION, [("user_id", ASCENDING), ("end_time", DESCENDING)])
+# 재전송/일괄 업로드 중복 제거 (dedup_key가 없는 과거 세션은 제외)
+register_index(
+    SCREEN_TIME_COLLECTION,
+    [("user_id", ASCENDING), ("dedup_key", ASCENDING)],
+    unique=True,
+    partialFilterExpression={"dedup_key": {"$exists": True}},
+    name="user_dedup_key_unique",
+)
+register_index(DAILY_COLLECTION, [("user_id", ASCENDING), ("day", ASCENDING)], unique=True, name="user_day_unique")
+
+register_query("GET /screen-time", SCREEN_TIME_COLLECTION, {"user_id": "u"}, sort=[("end_time", DESCENDING)])
+register_query("screen-time dedup", SCREEN_TIME_COLLECTION, {"user_id": "u", "dedup_key": "k"})
+register_query("GET /screen-time/summary", DAILY_COLLECTION, {"user_id": "u", "day": {"$gte": "2025-01-01"}})
+
+
+async def ensure_screen_time_indexes(db) -> None:
+    await apply_indexes(db, [SCREEN_TIME_COLLECTION, DAILY_COLLECTION])
+
+
+def dedup_key(start: datetime, end: datetime, client_session_id: Optional[str] = None) -> str:
+    """같은 세션 재전송을 막는 키: 클라이언트 세션 ID가 있으면 그것, 없으면 시작/종료 시각"""
+    if client_session_id:
+        return f"client:{client_session_id}"
+    return f"span:{_as_utc(start).isoformat()}|{_as_utc(end).isoformat()}"
+
+
+def _summarize(sessions: Iterable[Tuple[datetime, datetime, float]]):
+    """(start, end, duration_minutes) 목록 → 일별 버킷, 누적 분, 세션 수, 마지막 종료 시각"""
+    daily: Dict[str, Dict[str, float]] = {}
+    total_minutes = 0.0
+    count = 0
+    last_entry_at: Optional[datetime] = None
+    for start, end, duration_minutes in sessions:
+        for day, minutes, continued in split_by_kst_day(start, end):
+            bucket = daily.setdefault(day, {"minutes": 0.0, "sessions": 0, "continued": 0})
+            bucket["minutes"] += minutes
+            bucket["sessions"] += 1
+            bucket["continued"] += int(continued)
+        total_minutes += duration_minutes
+        count += 1
+        end = _as_utc(end)
+        last_entry_at = end if last_entry_at is None else max(last_entry_at, end)
+    return daily, total_minutes, count, last_entry_at
+
+
+async def apply_sessions(db, user_id: str, sessions: Iterable[Tuple[datetime, datetime, float]]) -> None:
+    """새 세션들(start, end, duration_minutes)을 일별/누적 집계에 한 번에 더한다"""
+    daily, total_minutes, count, last_entry_at = _summarize(sessions)
+    if not count:
+        return
+
+    await db[DAILY_COLLECTION].bulk_write(
+        [
+            UpdateOne({"user_id": user_id, "day": day}, {"$inc": bucket}, upsert=True)
+            for day, bucket in daily.items()
+        ],
+        ordered=False,
+    )
+    await db[TOTALS_COLLECTION].update_one(
+        {"_id": user_id},
+        {
+            "$inc": {"total_minutes": total_minutes, "sessions": count},
+            "$max": {"last_entry_at": last_entry_at},
+        },
+        upsert=True,
+    )
+
+
+async def apply_session(db, user_id: str, start: datetime, end: datetime, duration_minutes: float) -> None:
+    """새 세션 하나를 일별/누적 집계에 더한다"""
+    await apply_sessions(db, user_id, [(start, end, duration_minutes)])
+
+
+async def _claim_rebuild(db, user_id: str) -> Optional[str]:
+    """
+    집계를 만들 권한을 선점한다. 선점하면 claim_id, 이미 집계가 있으면 None.
+    다른 요청이 만드는 중이면 끝날 때까지 기다리고, 선점이 REBUILD_CLAIM_TTL보다 오래되면 넘겨받는다.
+    """
+    totals = db[TOTALS_COLLECTION]
+    while True:
+        claim_id = uuid.uuid4().hex
+        now = datetime.now(timezone.utc)
+        try:
+            await totals.insert_one({"_id": user_id, "rebuilding": True, "claim_id": claim_id, "claimed_at": now})
+            return claim_id
+        except DuplicateKeyError:
+            pass
+
+        doc = await totals.find_one({"_id": user_id}, {"rebuilding": 1, "claimed_at": 1})
+        if doc is None:
+            continue
+        if not doc.get("rebuilding"):
+            return None
+        result = await totals.update_one(
+            {"_id": user_id, "rebuilding": True, "claimed_at": {"$lt": now - REBUILD_CLAIM_TTL}},
+            {"$set": {"claim_id": claim_id, "claimed_at": now}},
+        )
+        if result.modified_count:
+            return claim_id
+        await asyncio.sleep(REBUILD_POLL_SECONDS)
+
+
+async def _rebuild_claimed(db, user_id: str, claim_id: str) -> int:
+    """선점한 사용자의 집계를 원본 세션에서 만든다. 처리한 세션 수를 반환한다."""
+    cursor = db[SCREEN_TIME_COLLECTION].find(
+        {"user_id": user_id},
+        {"_id": 0, "start_time": 1, "end_time": 1, "duration_minutes": 1},
+    )
+    raw = [
+        (doc["start_time"], doc["end_time"], float(doc.get("duration_minutes", 0)))
+        async for doc in cursor
+        if isinstance(doc.get("start_time"), datetime) and isinstance(doc.get("end_time"), datetime)
+    ]
+    daily, total_minutes, sessions, last_entry_at = _summarize(raw)
+
+    # 다시 실행해도 결과가 같도록 날짜별 값은 $set upsert, 원본에 없는 날짜는 지운다
+    if daily:
+        await db[DAILY_COLLECTION].bulk_write(
+            [
+                UpdateOne({"user_id": user_id, "day": day}, {"$set": bucket}, upsert=True)
+                for day, bucket in daily.items()
+            ],
+            ordered=False,
+        )
+    await db[DAILY_COLLECTION].delete_many({"user_id": user_id, "day": {"$nin": list(daily)}})
+
+    totals = {"total_minutes": total_minutes, "sessions": sessions}
+    if last_entry_at is not None:
+        totals["last_entry_at"] = last_entry_at
+    await db[TOTALS_COLLECTION].update_one(
+        {"_id": user_id, "claim_id": claim_id},
+        {"$set": totals, "$unset": {"rebuilding": "", "claim_id": "", "claimed_at": ""}},
+    )
+    return sessions
+
+
+async def ensure_user_rollups(db, user_id: str) -> int:
+    """
+    집계가 아직 없는 사용자라면 원본에서 만든다 (다른 요청이 만드는 중이면 기다린다).
+    새로 만든 경우 처리한 세션 수, 아니면 0. 확인 결과는 프로세스 단위로 기억한다.
+    """
+    if user_id in _ready_users:
+        return 0
+    sessions = 0
+    existing = await db[TOTALS_COLLECTION].find_one({"_id": user_id}, {"rebuilding": 1})
+    if existing is None or existing.get("rebuilding"):
+        claim_id = await _claim_rebuild(db, user_id)
+        if claim_id is not None:
+            sessions = await _rebuild_claimed(db, user_id, claim_id)
+    _ready_users.add(user_id)
+    return sessions
+
+
+async def backfill_rollups(db) -> Tuple[int, int]:
+    """
+    screen_time에 세션이 있는데 집계가 없는 사용자의 집계를 만든다. (새로 만든 사용자 수, 세션 수)
+    이미 집계가 있는 사용자는 세션 저장 때 $inc로 유지되므로 건드리지 않는다 (서버가 떠 있어도 안전).
+    """
+    users = 0
+    sessions = 0
+    for user_id in await db[SCREEN_TIME_COLLECTION].distinct("user_id"):
+        if await db[TOTALS_COLLECTION].find_one({"_id": user_id, "rebuilding": {"$exists": False}}, {"_id": 1}):
+            continue
+        sessions += await ensure_user_rollups(db, user_id)
+        users += 1
+    return users, sessions
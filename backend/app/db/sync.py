@@ -0,0 +1,52 @@
+"""
+증분 동기화(/sync)용 변경 추적
+- 생성/수정은 각 엔티티의 updatedAt / updated_at으로 찾는다.
+- 하드 삭제는 sync_tombstones에 (user_id, entity, entity_id, deleted_at)로 남긴다.
+- 톰스톤은 TTL 인덱스로 일정 기간 뒤 지워지므로, 그보다 오래된 토큰은 전체 동기화로 처리한다.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from pymongo import ASCENDING
+
+from core.config import get_settings
+from db.indexes import register_index, register_query
+
+TOMBSTONE_COLLECTION = "sync_tombstones"
+
+# /sync가 다루는 엔티티 이름 (응답 키)
+SYNC_ENTITIES = ("diaries", "worry_groups", "practice_sessions", "notifications", "relaxation_tasks")
+
+settings = get_settings()
+
+
+register_index(TOMBSTONE_COLLECTION, [("user_id", ASCENDING), ("deleted_at", ASCENDING)])
+register_index(
+    TOMBSTONE_COLLECTION,
+    [("deleted_at", ASCENDING)],
+    expireAfterSeconds=settings.sync_tombstone_ttl_days * 24 * 3600,
+    name="tombstone_ttl",
+)
+register_query("GET /sync tombstones", TOMBSTONE_COLLECTION, {"user_id": "u", "deleted_at": {"$gte": datetime(2025, 1, 1)}})
+
+
+async def record_tombstone(db, user_id: str, entity: str, entity_id) -> None:
+    await db[TOMBSTONE_COLLECTION].insert_one({
+        "user_id": user_id,
+        "entity": entity,
+        "entity_id": str(entity_id),
+        "deleted_at": datetime.now(timezone.utc),
+    })
+
+
+async def load_tombstones(db, user_id: str, since: datetime) -> Dict[str, List[str]]:
+    deleted: Dict[str, List[str]] = {name: [] for name in SYNC_ENTITIES}
+    cursor = db[TOMBSTONE_COLLECTION].find(
+        {"user_id": user_id, "deleted_at": {"$gte": since}},
+        {"_id": 0, "entity": 1, "entity_id": 1},
+    ).sort("deleted_at", ASCENDING)
+    async for doc in cursor:
+        ids = deleted.setdefault(doc["entity"], [])
+        if doc["entity_id"] not in ids:
+            ids.append(doc["entity_id"])
+    return deleted
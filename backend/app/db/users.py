@@ -0,0 +1,42 @@
+"""
+users 컬렉션 조회 헬퍼
+- 엔드포인트마다 필요한 필드만 projection으로 선언해서 가져온다.
+- 설문/연습 세션/걱정 그룹 같은 큰 배열을 필드 하나 읽으려고 매번 전송하지 않기 위함.
+"""
+from typing import Any, Dict, Mapping, Optional
+
+from db.indexes import register_index, register_query
+from models.user import USER_COLLECTION
+
+Projection = Mapping[str, Any]
+
+# projection을 지정하지 않았을 때 기본값: 존재 확인용으로 _id만
+ID_ONLY: Dict[str, int] = {"_id": 1}
+
+# 가입 시 이메일 중복은 이 인덱스의 DuplicateKeyError로 판단한다
+register_index(USER_COLLECTION, [("email", 1)], unique=True)
+register_query("users by email", USER_COLLECTION, {"email": "a@b.c"})
+
+
+def fields(*names: str) -> Dict[str, int]:
+    """fields("value_goal", "survey_completed") → {"value_goal": 1, "survey_completed": 1}"""
+    return {name: 1 for name in names}
+
+
+def elem_match(array_field: str, condition: Mapping[str, Any]) -> Dict[str, Any]:
+    """배열에서 조건에 맞는 첫 요소만 가져오는 projection ($elemMatch)"""
+    return {array_field: {"$elemMatch": dict(condition)}}
+
+
+async def load_user(db, user_id: str, projection: Optional[Projection] = None) -> Optional[dict]:
+    return await db[USER_COLLECTION].find_one(
+        {"_id": user_id},
+        dict(projection) if projection else ID_ONLY,
+    )
+
+
+async def load_user_by_email(db, email: str, projection: Optional[Projection] = None) -> Optional[dict]:
+    return await db[USER_COLLECTION].find_one(
+        {"email": email},
+        dict(projection) if projection else ID_ONLY,
+    )
@@ -1,8 +1,16 @@
 import asyncio
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import get_settings
+from core.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, render_prometheus
+from core.password_hasher import password_hasher
+from core.scheduler import alarm_scheduler, build_sinks
 from db.mongo import get_db
+from db.alarms import backfill_next_fire_at
+from db.diaries import migrate_embedded_diaries
+from db.notifications import backfill_dedup_keys, backfill_location_flags
+from db.indexes import apply_indexes, failed_unique_indexes, find_duplicate_keys
 from routers.auth import router as auth_router
 from routers.users import router as users_router
 from routers.diaries import router as diaries_router
@@ -12,6 +20,7 @@ from routers.notifications import router as notifications_router
 from routers.relaxation_tasks import router as relaxation_router
 from routers.screen_time import router as screen_time_router
 from routers.schedule_events import router as schedule_events_router
+from routers.sync import router as sync_router
 
 settings = get_settings()
 
@@ -31,8 +40,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# 라우트별 지연/응답 크기 + 요청별 MongoDB 명령 수/시간 (/metrics, Server-Timing 헤더)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.server_timing_enabled)
+
 @app.get("/")
 async def root():
     return {
@@ -46,6 +60,21 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+@app.get("/health/password-hasher")
+async def password_hasher_stats():
+    """bcrypt 작업 풀 상태: 대기열 길이, 해시/대기 시간"""
+    return password_hasher.stats()
+
+@app.get("/health/alarm-scheduler")
+async def alarm_scheduler_stats():
+    """시간 알림 스케줄러 상태: 힙에 올린 알림 수, 발송/건너뜀/실패 수"""
+    return alarm_scheduler.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(diaries_router)
@@ -57,17 +86,79 @@ app.include_router(notifications_router)
 app.include_router(relaxation_router)
 app.include_router(screen_time_router)
 app.include_router(schedule_events_router)
+app.include_router(sync_router)
 
 
 @app.on_event("startup")
 async def create_indexes():
     """앱 시작 시 MongoDB 인덱스 생성"""
     db = get_db()
-    
-    # schedule_events 컬렉션 인덱스 생성
+
+    # 라우터/db 모듈이 db.indexes 레지스트리에 등록한 인덱스를 컬렉션별로 생성 (이미 있으면 그대로)
+    # 정의가 바뀐 인덱스는 여기서 다시 만들지 않는다: `python check_indexes.py --migrate`
+    index_result = await apply_indexes(db)
+    for collection, names in index_result.items():
+        failed = [n for n in names if n.startswith("!")]
+        dropped = [n[1:] for n in names if n.startswith("-")]
+        if dropped:
+            print(f"🗑️ {collection} 중복 인덱스 삭제: {dropped}")
+        if failed:
+            print(f"⚠️ {collection} 인덱스 생성 중 오류: {failed}")
+        else:
+            print(f"✅ {collection} 인덱스 {len(names) - len(dropped)}개 확인 완료")
+
+    # unique 인덱스가 없으면 가입 이메일 등 중복을 막을 방법이 없으므로 시작하지 않는다
+    broken = failed_unique_indexes(index_result)
+    for spec in broken:
+        duplicates = await find_duplicate_keys(db, spec)
+        print(f"❌ {spec.collection}.{spec.name} unique 인덱스 없음. 겹치는 키 {len(duplicates)}건: {duplicates}")
+    if broken:
+        raise RuntimeError(
+            "unique 인덱스를 만들지 못해 시작을 중단합니다: "
+            f"{[f'{s.collection}.{s.name}' for s in broken]} (중복 데이터를 정리한 뒤 `python check_indexes.py`로 확인)"
+        )
+
+    asyncio.create_task(_migrate_diaries_in_background(db))
+    asyncio.create_task(_backfill_notifications_in_background(db))
+    asyncio.create_task(_backfill_alarm_fire_times_in_background(db))
+
+    if settings.alarm_scheduler_enabled:
+        alarm_scheduler.start(db, build_sinks(settings.alarm_sinks, settings.alarm_webhook_url))
+        print(f"✅ 알림 스케줄러 시작 (sinks={[s.name for s in alarm_scheduler.sinks]})")
+
+
+@app.on_event("shutdown")
+async def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def shutdown_alarm_scheduler():
+    await alarm_scheduler.stop()
+
+
+async def _migrate_diaries_in_background(db):
+    try:
+        migrated = await migrate_embedded_diaries(db)
+        print(f"✅ diaries 마이그레이션 완료 ({migrated}건)")
+    except Exception as e:
+        print(f"⚠️ diaries 마이그레이션 중 오류 (다음 기동 시 이어서 진행): {e}")
+
+
+async def _backfill_notifications_in_background(db):
+    try:
+        updated = await backfill_location_flags(db)
+        print(f"✅ notification_settings 위치 필드(has_location/geo) 채우기 완료 ({updated}건)")
+        # 위치 필드가 채워진 뒤에 계산해야 위치 알림의 키가 맞게 나온다
+        keyed = await backfill_dedup_keys(db)
+        print(f"✅ notification_settings dedup_key 채우기 완료 ({keyed}건)")
+    except Exception as e:
+        print(f"⚠️ notification_settings 위치 필드 채우기 중 오류 (다음 기동 시 이어서 진행): {e}")
+
+
+async def _backfill_alarm_fire_times_in_background(db):
     try:
-        await db["schedule_events"].create_index("user_id")
-        await db["schedule_events"].create_index([("user_id", 1), ("start_date", 1)])
-        print("✅ schedule_events 인덱스 생성 완료")
+        updated = await backfill_next_fire_at(db)
+        print(f"✅ 알림 next_fire_at 채우기 완료 ({updated}건)")
     except Exception as e:
-        print(f"⚠️ schedule_events 인덱스 생성 중 오류 (이미 존재할 수 있음): {e}")
+        print(f"⚠️ 알림 next_fire_at 채우기 중 오류 (다음 기동 시 이어서 진행): {e}")
@@ -0,0 +1,21 @@
+"""
+users.diaries 배열 → diaries 컬렉션 마이그레이션 (수동 실행용)
+- 서버가 떠 있는 상태에서 실행해도 안전하며, 중단되면 다시 실행해서 이어가면 됨
+- 옮긴 뒤 createdAt이 날짜가 아닌(없거나 문자열) 일기도 고친다 (updatedAt → 문서 _id 시각 순으로 대체)
+- 실행: backend/app 디렉토리에서 `python migrate_diaries.py`
+"""
+import asyncio
+
+from db.mongo import get_db
+from db.diaries import ensure_diary_indexes, migrate_embedded_diaries
+
+
+async def main():
+    db = get_db()
+    await ensure_diary_indexes(db)
+    migrated = await migrate_embedded_diaries(db)
+    print(f"✅ diaries 마이그레이션 완료: {migrated}건")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
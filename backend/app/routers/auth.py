@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException
+from pymongo.errors import DuplicateKeyError
 from schemas.auth import (
     SignupRequest,
     LoginRequest,
@@ -10,14 +11,16 @@ from schemas.auth import (
 )
 from schemas.user import TokenPair
 from db.mongo import get_db
+from db.users import fields, load_user, load_user_by_email
 from core.security import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     create_refresh_token,
     create_email_verification_token,
     create_password_reset_token,
     decode_token,
+    get_current_user_id,
     hash_refresh_token,
     verify_refresh_token,
 )
@@ -28,62 +31,59 @@ import uuid
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-async def get_current_user_id(authorization: str | None = Header(default=None)) -> str:
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid access token")
-    return payload.get("sub")
-
 @router.post("/signup", response_model=TokenPair)
 async def signup(payload: SignupRequest, db=Depends(get_db)):
-    existing = await db["users"].find_one({"email": payload.email})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
     # 코드 검증 임시 비활성화 (개발용)
     # if payload.code:
     #     code_doc = await db["codes"].find_one({"_id": payload.code, "valid": True})
     #     if not code_doc:
     #         raise HTTPException(status_code=400, detail="Invalid or expired code")
 
+    # refresh token까지 미리 만들어 insert 한 번으로 끝낸다.
+    # 이메일 중복은 users.email unique 인덱스가 판단한다 (동시 가입 경쟁 포함).
     user_id = f"user_{uuid.uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    refresh_raw = create_refresh_token(user_id)
     doc = {
         "_id": user_id,
         "email": payload.email,
         "name": payload.name,
         "gender": payload.gender,
         "code": payload.code,
-        "password_hash": hash_password(payload.password),
+        "password_hash": await hash_password_async(payload.password),
         "survey_completed": False,
         "worry_groups": [
             {
                 "group_id": "1",
                 "group_title": "기본그룹",
                 "group_contents": "기본그룹 입니다",
-                "created_at": datetime.now(timezone.utc),
+                "created_at": now,
             }
         ],
+        # 기본그룹이 1번이라 다음 그룹은 2번부터
+        "worry_group_seq": 1,
         "relaxation_tasks": [],
         "surveys": [],
         "custom_tags": [],
         "practice_sessions": [],
         "email_verified": False,
-        "created_at": datetime.now(timezone.utc),
+        "created_at": now,
+        "refresh_hash": hash_refresh_token(refresh_raw),
+        "refresh_issued_at": now,
     }
-    await db["users"].insert_one(doc)
+    try:
+        await db["users"].insert_one(doc)
+    except DuplicateKeyError as e:
+        if "email" not in (e.details or {}).get("keyPattern", {"email": 1}):
+            raise
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Refresh token 저장 (hash)
-    refresh_raw = create_refresh_token(user_id)
-    await db["users"].update_one({"_id": user_id}, {"$set": {"refresh_hash": hash_refresh_token(refresh_raw), "refresh_issued_at": datetime.now(timezone.utc)}})
     return TokenPair(access_token=create_access_token(user_id), refresh_token=refresh_raw)
 
 @router.post("/login", response_model=TokenPair)
 async def login(payload: LoginRequest, db=Depends(get_db)):
-    user = await db["users"].find_one({"email": payload.email})
-    if not user or not verify_password(payload.password, user["password_hash"]):
+    user = await load_user_by_email(db, payload.email, fields("password_hash"))
+    if not user or not await verify_password_async(payload.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     refresh_raw = create_refresh_token(user["_id"])
     await db["users"].update_one({"_id": user["_id"]}, {"$set": {"refresh_hash": hash_refresh_token(refresh_raw), "refresh_issued_at": datetime.now(timezone.utc)}})
@@ -95,7 +95,7 @@ async def refresh(payload: RefreshRequest, db=Depends(get_db)):
     if not decoded or decoded.get("type") != "refresh":
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     sub = decoded.get("sub")
-    user = await db["users"].find_one({"_id": sub})
+    user = await load_user(db, sub, fields("refresh_hash"))
     if not user or "refresh_hash" not in user:
         raise HTTPException(status_code=401, detail="Invalid refresh state")
     if not verify_refresh_token(payload.refresh_token, user["refresh_hash"]):
@@ -111,19 +111,19 @@ async def change_password(
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    user = await db["users"].find_one({"_id": user_id})
-    if not user or not verify_password(payload.current_password, user["password_hash"]):
+    user = await load_user(db, user_id, fields("password_hash"))
+    if not user or not await verify_password_async(payload.current_password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Current password is incorrect")
 
     await db["users"].update_one(
         {"_id": user_id},
-        {"$set": {"password_hash": hash_password(payload.new_password)}}
+        {"$set": {"password_hash": await hash_password_async(payload.new_password)}}
     )
     return {"success": True}
 
 @router.post("/password/reset/start")
 async def password_reset_start(payload: PasswordResetStartRequest, db=Depends(get_db)):
-    user = await db["users"].find_one({"email": payload.email})
+    user = await load_user_by_email(db, payload.email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     token = create_password_reset_token(user["_id"])  # raw token
@@ -137,10 +137,10 @@ async def password_reset_finish(payload: PasswordResetFinishRequest, db=Depends(
     if not decoded or decoded.get("type") != "reset":
         raise HTTPException(status_code=400, detail="Invalid reset token")
     sub = decoded.get("sub")
-    user = await db["users"].find_one({"_id": sub})
+    user = await load_user(db, sub, fields("password_reset_token"))
     if not user or user.get("password_reset_token") != payload.token:
         raise HTTPException(status_code=400, detail="Reset token mismatch")
-    await db["users"].update_one({"_id": sub}, {"$set": {"password_hash": hash_password(payload.new_password), "password_reset_token": None}})
+    await db["users"].update_one({"_id": sub}, {"$set": {"password_hash": await hash_password_async(payload.new_password), "password_reset_token": None}})
     return {"success": True, "message": "Password updated"}
 
 @router.post("/verify/email")
@@ -149,7 +149,7 @@ async def verify_email(payload: EmailVerifyRequest, db=Depends(get_db)):
     if not decoded or decoded.get("type") != "verify":
         raise HTTPException(status_code=400, detail="Invalid verification token")
     sub = decoded.get("sub")
-    user = await db["users"].find_one({"_id": sub})
+    user = await load_user(db, sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     await db["users"].update_one({"_id": sub}, {"$set": {"email_verified": True}})
@@ -1,11 +1,16 @@
 from datetime import datetime, timezone
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Header, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pymongo import ReturnDocument
 
 from db.mongo import get_db
-from core.security import decode_token
+from db.alarms import DIARY_ALARM_SCHEDULE_FIELDS, diary_alarm_next_fire_at, fill_alarm_fire_times
+from db.diaries import DIARY_COLLECTION, ensure_user_diaries, invalidate_group_stats
+from core.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter
+from core.scheduler import alarm_scheduler
+from core.security import get_current_user_id
 from schemas.diary import (
     DiaryCreate,
     DiaryResponse,
@@ -17,8 +22,6 @@ from schemas.diary import (
 
 router = APIRouter(prefix="/diaries", tags=["diaries"])
 
-USERS_COLLECTION = "users"
-
 
 def _ensure_tz(dt: datetime) -> datetime:
     if dt.tzinfo is None:
@@ -39,16 +42,6 @@ def _parse_datetime_value(value, fallback=None):
     return datetime.now(timezone.utc)
 
 
-async def get_current_user_id(authorization: str | None = Header(default=None)) -> str:
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid access token")
-    return payload.get("sub")
-
-
 def _parse_group(value):
     if isinstance(value, int):
         return value
@@ -163,7 +156,7 @@ def _serialize_sud_entry(doc: dict) -> dict:
     }
 
 
-def _serialize_diary(doc: dict, *, array_index: int | None = None) -> dict:
+def _serialize_diary(doc: dict) -> dict:
     alarms_raw = _normalize_alarms(doc.get("alarms", []))
     doc["alarms"] = alarms_raw
     sud_entries = _normalize_sud_scores(doc.get("sudScores", []))
@@ -189,29 +182,29 @@ def _serialize_diary(doc: dict, *, array_index: int | None = None) -> dict:
         "updatedAt": _parse_datetime_value(
             doc.get("updatedAt"), fallback=_parse_datetime_value(doc.get("createdAt"))
         ),
-        "arrayIndex": array_index,
     }
 
 
-async def _get_user_or_404(db, user_id: str) -> dict:
-    user = await db[USERS_COLLECTION].find_one({"_id": user_id})
-    if not user:
+async def _ensure_user_or_404(db, user_id: str) -> None:
+    if not await ensure_user_diaries(db, user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    return user
 
 
-def _find_diary_in_user(user: dict, diary_id: str) -> Optional[dict]:
-    for diary in user.get("diaries", []):
-        if diary.get("diary_id") == diary_id:
-            return diary
-    return None
+async def _get_diary_or_404(db, user_id: str, diary_id: str, projection: dict | None = None) -> dict:
+    await _ensure_user_or_404(db, user_id)
+    diary = await db[DIARY_COLLECTION].find_one(
+        {"user_id": user_id, "diary_id": diary_id},
+        projection,
+    )
+    if not diary:
+        raise HTTPException(status_code=404, detail="Diary not found")
+    return diary
 
 
-def _find_diary_index(diaries: List[dict], diary_id: str) -> int:
-    for idx, diary in enumerate(diaries):
-        if diary.get("diary_id") == diary_id:
-            return idx
-    return -1
+def _notify_alarm_scheduler(alarms: List[dict]) -> None:
+    fire_times = [a["next_fire_at"] for a in alarms if a.get("next_fire_at")]
+    if fire_times:
+        alarm_scheduler.notify_changed(min(fire_times))
 
 
 def _find_alarm_index(alarms: List[dict], alarm_id: str) -> int:
@@ -221,6 +214,28 @@ def _find_alarm_index(alarms: List[dict], alarm_id: str) -> int:
     return -1
 
 
+async def _load_alarms_or_404(db, user_id: str, diary_id: str) -> tuple[Any, List[dict]]:
+    """
+    (일기 _id, 알림 목록). 알림 하나하나를 alarm_id로 찾아 고치므로,
+    alarm_id가 없거나 dict 모양인 예전 alarms는 한 번 정규화해서 저장한다.
+    (읽은 값과 그대로일 때만 바꾼다. 예전 모양 알림은 스케줄러가 건드리지 않는다)
+    """
+    diary = await _get_diary_or_404(db, user_id, diary_id, {"alarms": 1})
+    raw = diary.get("alarms")
+    alarms = _normalize_alarms(raw or [])
+    legacy = isinstance(raw, dict) or (
+        isinstance(raw, list) and any(not isinstance(a, dict) or not a.get("alarm_id") for a in raw)
+    )
+    if legacy:
+        result = await db[DIARY_COLLECTION].update_one(
+            {"_id": diary["_id"], "alarms": raw},
+            {"$set": {"alarms": alarms}},
+        )
+        if not result.matched_count:
+            return await _load_alarms_or_404(db, user_id, diary_id)
+    return diary["_id"], alarms
+
+
 @router.post("", response_model=DiaryResponse, status_code=status.HTTP_201_CREATED)
 async def create_diary(
     payload: DiaryCreate,
@@ -242,7 +257,7 @@ async def create_diary(
         "alternativeThoughts": payload.alternative_thoughts,
         "realOddness": payload.real_oddness,
         "confrontAvoidLogs": payload.confront_avoid_logs,
-        "alarms": _normalize_alarms(payload.alarms),
+        "alarms": fill_alarm_fire_times(_normalize_alarms(payload.alarms), now),
         "latitude": payload.latitude,
         "longitude": payload.longitude,
         "addressName": payload.address_name,
@@ -250,38 +265,53 @@ async def create_diary(
         "updatedAt": now,
     }
 
-    user = await db[USERS_COLLECTION].find_one({"_id": user_id}, {"diaries": 1})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    await _ensure_user_or_404(db, user_id)
+    await db[DIARY_COLLECTION].insert_one({"user_id": user_id, **diary_doc})
+    invalidate_group_stats(user_id)
+    _notify_alarm_scheduler(diary_doc["alarms"])
 
-    diaries = list(user.get("diaries", []))
-    diaries.append(diary_doc)
+    return DiaryResponse(**_serialize_diary(diary_doc))
 
-    await db[USERS_COLLECTION].update_one(
-        {"_id": user_id},
-        {"$set": {"diaries": diaries}},
-    )
 
-    return DiaryResponse(**_serialize_diary(diary_doc))
+# 목록/최신 조회 공통 정렬: (user_id, createdAt, diary_id) 인덱스를 그대로 따라간다
+DIARY_LIST_SORT = [("createdAt", -1), ("diary_id", -1)]
 
 
 @router.get("", response_model=List[DiaryResponse])
 async def list_diaries(
+    response: Response,
     group_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    user = await _get_user_or_404(db, user_id)
-    diaries = user.get("diaries", [])
-
-    filtered = []
-    for idx, diary in enumerate(diaries):
-        if group_id is not None and diary.get("group_Id") != group_id:
-            continue
-        filtered.append(DiaryResponse(**_serialize_diary(diary, array_index=idx)))
-
-    filtered.sort(key=lambda d: d.created_at or datetime.now(timezone.utc), reverse=True)
-    return filtered
+    """
+    최신순 일기 목록.
+    - limit을 주면 한 페이지만 반환하고, 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서를 담는다.
+    - cursor는 이전 응답의 X-Next-Cursor 값, since/until은 createdAt 범위 (since 포함, until 제외).
+    - limit이 없으면 기존 클라이언트 호환을 위해 조건에 맞는 전체를 반환한다.
+    """
+    await _ensure_user_or_404(db, user_id)
+    query: dict = {"user_id": user_id}
+    if group_id is not None:
+        query["group_Id"] = group_id
+    query.update(keyset_filter("createdAt", "diary_id", cursor, since, until))
+
+    find = db[DIARY_COLLECTION].find(query).sort(DIARY_LIST_SORT)
+    if limit is None:
+        return [DiaryResponse(**_serialize_diary(diary)) async for diary in find]
+
+    # 한 건 더 읽어서 다음 페이지 존재 여부를 판단한다
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+    if len(docs) > limit:
+        # createdAt은 마이그레이션(db.diaries)이 항상 날짜로 저장한다: 커서에 현재 시각을 대신 쓰면 첫 페이지로 되돌아간다
+        last = docs[limit - 1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["createdAt"], last["diary_id"])
+        docs = docs[:limit]
+    return [DiaryResponse(**_serialize_diary(diary)) for diary in docs]
 
 
 @router.get("/latest", response_model=DiaryResponse)
@@ -290,26 +320,49 @@ async def get_latest_diary(
     user_id: str = Depends(get_current_user_id),
 ):
     """
-    사용자의 일기 배열에서 '마지막 요소'를 최신으로 간주하여 반환합니다.
-    정렬/타임스탬프와 무관하게 항상 배열 끝의 요소를 돌려줍니다.
+    가장 마지막에 작성된 일기를 반환합니다.
+    (user_id, createdAt) 인덱스를 따라 한 건만 읽습니다.
     """
-    user = await _get_user_or_404(db, user_id)
-    diaries = user.get("diaries", [])
-    if not diaries:
+    await _ensure_user_or_404(db, user_id)
+    latest = await db[DIARY_COLLECTION].find_one(
+        {"user_id": user_id},
+        sort=DIARY_LIST_SORT,
+    )
+    if not latest:
         raise HTTPException(status_code=404, detail="No diaries")
-    latest = diaries[-1]
-    return DiaryResponse(**_serialize_diary(latest, array_index=len(diaries) - 1))
+    return DiaryResponse(**_serialize_diary(latest))
+
+
+# 직면/회피 기록 정렬 키: 기록 시각(문자열/datetime 섞여 있음 → date), 같은 시각이면 (diary_id:배열 위치)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_LOG_AT = {
+    "$convert": {
+        "input": {"$ifNull": ["$log.created_at", "$log.createdAt"]},
+        "to": "date",
+        "onError": _EPOCH,
+        "onNull": _EPOCH,
+    }
+}
 
 
 @router.get("/confront-avoid-logs", response_model=List[Dict])
 async def get_all_confront_avoid_logs(
+    response: Response,
+    log_type: Optional[str] = Query(None, alias="type", description="confronted | avoided"),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
     """
-    모든 일기에서 confrontAvoidLogs를 수집하여 반환합니다.
+    모든 일기에서 confrontAvoidLogs를 수집하여 최신순으로 반환합니다.
     7주차에서 사용자가 분류한 모든 행동(직면/회피)을 조회할 때 사용됩니다.
-    
+    - 펼치기/정렬/자르기는 aggregation pipeline에서 하고, 응답할 페이지만 읽어온다.
+    - type으로 직면/회피만, since/until로 기록 시각 범위(since 포함, until 제외)를 고를 수 있다.
+    - limit을 주면 한 페이지만 반환하고, 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서를 담는다.
+
     반환 형식:
     [
         {
@@ -321,38 +374,34 @@ async def get_all_confront_avoid_logs(
         ...
     ]
     """
-    user = await _get_user_or_404(db, user_id)
-    diaries = user.get("diaries", [])
-    
-    all_logs = []
-    for diary in diaries:
-        diary_id = diary.get("diary_id")
-        logs = diary.get("confrontAvoidLogs", [])
-        if isinstance(logs, list):
-            for log in logs:
-                if isinstance(log, dict):
-                    # diary_id 추가하여 어느 일기에서 온 것인지 표시
-                    log_with_diary = dict(log)
-                    log_with_diary["diary_id"] = diary_id
-                    all_logs.append(log_with_diary)
-    
-    # created_at 기준으로 최신순 정렬
-    def _parse_date(v):
-        if isinstance(v, datetime):
-            return _ensure_tz(v)
-        if isinstance(v, str):
-            try:
-                return datetime.fromisoformat(v.replace('Z', '+00:00'))
-            except Exception:
-                pass
-        return datetime(1970, 1, 1, tzinfo=timezone.utc)
-    
-    all_logs.sort(
-        key=lambda log: _parse_date(log.get("created_at") or log.get("createdAt")),
-        reverse=True
-    )
-    
-    return all_logs
+    await _ensure_user_or_404(db, user_id)
+    diary_match: dict = {"user_id": user_id, "confrontAvoidLogs": {"$type": "object"}}
+    log_match: dict = {"log": {"$type": "object"}}
+    if log_type:
+        diary_match["confrontAvoidLogs.type"] = log_type
+        log_match["log.type"] = log_type
+    pipeline = [
+        {"$match": diary_match},
+        {"$project": {"_id": 0, "diary_id": 1, "log": "$confrontAvoidLogs"}},
+        {"$unwind": {"path": "$log", "includeArrayIndex": "position"}},
+        {"$match": log_match},
+        {"$addFields": {"at": _LOG_AT, "log_id": {"$concat": ["$diary_id", ":", {"$toString": "$position"}]}}},
+    ]
+    page = keyset_filter("at", "log_id", cursor, since, until)
+    if page:
+        pipeline.append({"$match": page})
+    pipeline.append({"$sort": {"at": -1, "log_id": -1}})
+    if limit is not None:
+        # 한 건 더 읽어서 다음 페이지 존재 여부를 판단한다
+        pipeline.append({"$limit": limit + 1})
+
+    rows = await db[DIARY_COLLECTION].aggregate(pipeline).to_list(length=None)
+    if limit is not None and len(rows) > limit:
+        last = rows[limit - 1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["at"], last["log_id"])
+        rows = rows[:limit]
+    # diary_id 추가하여 어느 일기에서 온 것인지 표시
+    return [{**row["log"], "diary_id": row.get("diary_id")} for row in rows]
 
 
 @router.get("/{diary_id}", response_model=DiaryResponse)
@@ -361,10 +410,7 @@ async def get_diary(
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    user = await _get_user_or_404(db, user_id)
-    diary = _find_diary_in_user(user, diary_id)
-    if not diary:
-        raise HTTPException(status_code=404, detail="Diary not found")
+    diary = await _get_diary_or_404(db, user_id, diary_id)
     return DiaryResponse(**_serialize_diary(diary))
 
 
@@ -382,93 +428,81 @@ async def update_diary(
     now = datetime.now(timezone.utc)
     update_data["updatedAt"] = now
     if "alarms" in update_data:
-        update_data["alarms"] = _normalize_alarms(update_data["alarms"])
+        update_data["alarms"] = fill_alarm_fire_times(_normalize_alarms(update_data["alarms"]), now)
     if "sudScores" in update_data:
         update_data["sudScores"] = _normalize_sud_scores(update_data["sudScores"])
 
-    user = await _get_user_or_404(db, user_id)
-    diaries = list(user.get("diaries", []))
-    updated = False
-    updated_diary = None
-    for idx, diary in enumerate(diaries):
-        if diary.get("diary_id") == diary_id:
-            # alternativeThoughts는 배열에 누적
-            if "alternativeThoughts" in update_data:
-                incoming = update_data.pop("alternativeThoughts") or []
-                existing = list(diary.get("alternativeThoughts", []))
-                # 중복 제거를 위해 set 사용 (문자열인 경우)
-                if isinstance(incoming, list):
-                    for item in incoming:
-                        if item not in existing:
-                            existing.append(item)
-                diary["alternativeThoughts"] = existing
-                diary["updatedAt"] = now
-            
-            # realOddness는 belief 기준 병합
-            if "realOddness" in update_data:
-                incoming = update_data.pop("realOddness") or []
-                existing = list(diary.get("realOddness", []))
-                by_belief: Dict[str, dict] = {}
-                for e in existing:
-                    if isinstance(e, dict) and e.get("belief"):
-                        by_belief[str(e.get("belief")).strip()] = dict(e)
-                for e in incoming:
-                    if isinstance(e, dict) and e.get("belief"):
-                        key = str(e.get("belief")).strip()
-                        prev = by_belief.get(key, {"belief": key})
-                        # before/after 각각 개별 필드만 갱신
-                        if "before" in e and e.get("before") is not None:
-                            prev["before"] = int(e.get("before"))
-                        if "after" in e and e.get("after") is not None:
-                            prev["after"] = int(e.get("after"))
-                        by_belief[key] = prev
-                merged_real = list(by_belief.values())
-                diary["realOddness"] = merged_real
-                diary["updatedAt"] = now
-            
-            # confrontAvoidLogs는 comment 기준으로 업데이트/추가 (옵션 B)
-            if "confrontAvoidLogs" in update_data:
-                incoming = update_data.pop("confrontAvoidLogs") or []
-                existing = list(diary.get("confrontAvoidLogs", []))
-                by_comment: Dict[str, dict] = {}
-                # 기존 로그를 comment 기준으로 인덱싱
-                for e in existing:
-                    if isinstance(e, dict) and e.get("comment"):
-                        comment_key = str(e.get("comment")).strip()
-                        by_comment[comment_key] = dict(e)
-                # 새로운 로그 처리: 같은 comment가 있으면 업데이트, 없으면 추가
-                for e in incoming:
-                    if isinstance(e, dict) and e.get("comment"):
-                        comment_key = str(e.get("comment")).strip()
-                        # 같은 comment가 있으면 type과 created_at 업데이트
-                        if comment_key in by_comment:
-                            by_comment[comment_key]["type"] = e.get("type")
-                            by_comment[comment_key]["created_at"] = e.get("created_at", now)
-                        else:
-                            # 새로운 comment는 추가
-                            by_comment[comment_key] = {
-                                "type": e.get("type"),
-                                "comment": comment_key,
-                                "created_at": e.get("created_at", now)
-                            }
-                diary["confrontAvoidLogs"] = list(by_comment.values())
-                diary["updatedAt"] = now
-            
-            # 나머지 필드(있다면) 평범 병합
-            diaries[idx] = {**diary, **update_data}
-            updated_diary = diaries[idx]
-            updated = True
-            break
-
-    if not updated or updated_diary is None:
-        raise HTTPException(status_code=404, detail="Diary not found")
-
-    await db[USERS_COLLECTION].update_one(
-        {"_id": user_id},
-        {"$set": {"diaries": diaries}},
+    diary = await _get_diary_or_404(db, user_id, diary_id)
+
+    # alternativeThoughts는 배열에 누적
+    if "alternativeThoughts" in update_data:
+        incoming = update_data.pop("alternativeThoughts") or []
+        existing = list(diary.get("alternativeThoughts", []))
+        # 중복 제거를 위해 set 사용 (문자열인 경우)
+        if isinstance(incoming, list):
+            for item in incoming:
+                if item not in existing:
+                    existing.append(item)
+        update_data["alternativeThoughts"] = existing
+    
+    # realOddness는 belief 기준 병합
+    if "realOddness" in update_data:
+        incoming = update_data.pop("realOddness") or []
+        existing = list(diary.get("realOddness", []))
+        by_belief: Dict[str, dict] = {}
+        for e in existing:
+            if isinstance(e, dict) and e.get("belief"):
+                by_belief[str(e.get("belief")).strip()] = dict(e)
+        for e in incoming:
+            if isinstance(e, dict) and e.get("belief"):
+                key = str(e.get("belief")).strip()
+                prev = by_belief.get(key, {"belief": key})
+                # before/after 각각 개별 필드만 갱신
+                if "before" in e and e.get("before") is not None:
+                    prev["before"] = int(e.get("before"))
+                if "after" in e and e.get("after") is not None:
+                    prev["after"] = int(e.get("after"))
+                by_belief[key] = prev
+        merged_real = list(by_belief.values())
+        update_data["realOddness"] = merged_real
+    
+    # confrontAvoidLogs는 comment 기준으로 업데이트/추가 (옵션 B)
+    if "confrontAvoidLogs" in update_data:
+        incoming = update_data.pop("confrontAvoidLogs") or []
+        existing = list(diary.get("confrontAvoidLogs", []))
+        by_comment: Dict[str, dict] = {}
+        # 기존 로그를 comment 기준으로 인덱싱
+        for e in existing:
+            if isinstance(e, dict) and e.get("comment"):
+                comment_key = str(e.get("comment")).strip()
+                by_comment[comment_key] = dict(e)
+        # 새로운 로그 처리: 같은 comment가 있으면 업데이트, 없으면 추가
+        for e in incoming:
+            if isinstance(e, dict) and e.get("comment"):
+                comment_key = str(e.get("comment")).strip()
+                # 같은 comment가 있으면 type과 created_at 업데이트
+                if comment_key in by_comment:
+                    by_comment[comment_key]["type"] = e.get("type")
+                    by_comment[comment_key]["created_at"] = e.get("created_at", now)
+                else:
+                    # 새로운 comment는 추가
+                    by_comment[comment_key] = {
+                        "type": e.get("type"),
+                        "comment": comment_key,
+                        "created_at": e.get("created_at", now)
+                    }
+        update_data["confrontAvoidLogs"] = list(by_comment.values())
+
+    # 나머지 필드(있다면)는 그대로 덮어쓰기 — 해당 일기 문서의 바뀐 필드만 $set
+    await db[DIARY_COLLECTION].update_one(
+        {"_id": diary["_id"]},
+        {"$set": update_data},
     )
+    invalidate_group_stats(user_id)
+    _notify_alarm_scheduler(update_data.get("alarms", []))
+    diary.update(update_data)
 
-    return DiaryResponse(**_serialize_diary(updated_diary))
+    return DiaryResponse(**_serialize_diary(diary))
 
 
 @router.get("/{diary_id}/alarms", response_model=List[AlarmResponse])
@@ -477,10 +511,7 @@ async def list_alarms(
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    user = await _get_user_or_404(db, user_id)
-    diary = _find_diary_in_user(user, diary_id)
-    if not diary:
-        raise HTTPException(status_code=404, detail="Diary not found")
+    diary = await _get_diary_or_404(db, user_id, diary_id, {"alarms": 1})
     alarms = _normalize_alarms(diary.get("alarms", []))
     return [AlarmResponse(**_serialize_alarm(a)) for a in alarms]
 
@@ -492,11 +523,7 @@ async def create_alarm(
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    user = await _get_user_or_404(db, user_id)
-    diaries = list(user.get("diaries", []))
-    diary_idx = _find_diary_index(diaries, diary_id)
-    if diary_idx == -1:
-        raise HTTPException(status_code=404, detail="Diary not found")
+    diary_oid, _ = await _load_alarms_or_404(db, user_id, diary_id)
 
     now = datetime.now(timezone.utc)
     alarm_id = f"alarm_{uuid.uuid4().hex[:6]}"
@@ -512,16 +539,16 @@ async def create_alarm(
         "createdAt": now,
         "updatedAt": now,
     }
+    fill_alarm_fire_times([alarm_doc], now)
 
-    alarms = _normalize_alarms(diaries[diary_idx].get("alarms", []))
-    alarms.append(alarm_doc)
-    diaries[diary_idx]["alarms"] = alarms
-
-    await db[USERS_COLLECTION].update_one(
-        {"_id": user_id},
-        {"$set": {"diaries": diaries}},
+    # 배열 전체를 다시 쓰지 않는다 (스케줄러의 alarms.$.next_fire_at 갱신과 겹쳐도 덮어쓰지 않도록)
+    await db[DIARY_COLLECTION].update_one(
+        {"_id": diary_oid},
+        {"$push": {"alarms": alarm_doc}, "$set": {"updatedAt": now}},
     )
 
+    _notify_alarm_scheduler([alarm_doc])
+
     return AlarmResponse(**_serialize_alarm(alarm_doc))
 
 
@@ -537,30 +564,34 @@ async def update_alarm(
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    user = await _get_user_or_404(db, user_id)
-    diaries = list(user.get("diaries", []))
-    diary_idx = _find_diary_index(diaries, diary_id)
-    if diary_idx == -1:
-        raise HTTPException(status_code=404, detail="Diary not found")
-
-    alarms = _normalize_alarms(diaries[diary_idx].get("alarms", []))
+    diary_oid, alarms = await _load_alarms_or_404(db, user_id, diary_id)
     alarm_idx = _find_alarm_index(alarms, alarm_id)
     if alarm_idx == -1:
         raise HTTPException(status_code=404, detail="Alarm not found")
 
-    alarms[alarm_idx] = {
-        **alarms[alarm_idx],
-        **update_data,
-        "updatedAt": datetime.now(timezone.utc),
-    }
-    diaries[diary_idx]["alarms"] = alarms
-
-    await db[USERS_COLLECTION].update_one(
-        {"_id": user_id},
-        {"$set": {"diaries": diaries}},
+    now = datetime.now(timezone.utc)
+    changes = {**update_data, "updatedAt": now}
+    if any(field in update_data for field in DIARY_ALARM_SCHEDULE_FIELDS):
+        changes["next_fire_at"] = diary_alarm_next_fire_at({**alarms[alarm_idx], **update_data}, now)
+
+    # 바뀐 필드만 alarms.$[a]로 쓴다 (일정이 그대로면 스케줄러가 넘긴 next_fire_at을 유지)
+    updated = await db[DIARY_COLLECTION].find_one_and_update(
+        {"_id": diary_oid, "alarms.alarm_id": alarm_id},
+        {"$set": {
+            **{f"alarms.$[a].{name}": value for name, value in changes.items()},
+            "updatedAt": now,
+        }},
+        array_filters=[{"a.alarm_id": alarm_id}],
+        projection={"_id": 0, "alarms": {"$elemMatch": {"alarm_id": alarm_id}}},
+        return_document=ReturnDocument.AFTER,
     )
+    if not updated or not updated.get("alarms"):
+        raise HTTPException(status_code=404, detail="Alarm not found")
+    alarm = updated["alarms"][0]
+
+    _notify_alarm_scheduler([alarm])
 
-    return AlarmResponse(**_serialize_alarm(alarms[alarm_idx]))
+    return AlarmResponse(**_serialize_alarm(alarm))
 
 
 @router.delete("/{diary_id}/alarms/{alarm_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -570,23 +601,13 @@ async def delete_alarm(
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    user = await _get_user_or_404(db, user_id)
-    diaries = list(user.get("diaries", []))
-    diary_idx = _find_diary_index(diaries, diary_id)
-    if diary_idx == -1:
-        raise HTTPException(status_code=404, detail="Diary not found")
+    diary_oid, _ = await _load_alarms_or_404(db, user_id, diary_id)
 
-    alarms = _normalize_alarms(diaries[diary_idx].get("alarms", []))
-    alarm_idx = _find_alarm_index(alarms, alarm_id)
-    if alarm_idx == -1:
-        raise HTTPException(status_code=404, detail="Alarm not found")
-
-    alarms.pop(alarm_idx)
-    diaries[diary_idx]["alarms"] = alarms
-
-    await db[USERS_COLLECTION].update_one(
-        {"_id": user_id},
-        {"$set": {"diaries": diaries}},
+    result = await db[DIARY_COLLECTION].update_one(
+        {"_id": diary_oid, "alarms.alarm_id": alarm_id},
+        {"$pull": {"alarms": {"alarm_id": alarm_id}}, "$set": {"updatedAt": datetime.now(timezone.utc)}},
     )
+    if not result.matched_count:
+        raise HTTPException(status_code=404, detail="Alarm not found")
 
     return None
@@ -1,13 +1,30 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
-
-from core.security import decode_token
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from core.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter
+from core.scheduler import alarm_scheduler
+from core.security import get_current_user_id
+from core.streaming import stream_json_array
+from db.alarms import NOTIFICATION_SCHEDULE_FIELDS, notification_next_fire_at
 from db.mongo import get_db
+from db.notifications import (
+    DUPLICATE_RADIUS_M,
+    NOTIFICATION_COLLECTION,
+    NOTIFICATION_LIST_SORT,
+    dedup_key,
+    distance_m,
+    location_fields,
+    near_sphere,
+    within_sphere,
+)
+from db.sync import record_tombstone
 from schemas.notification import (
     NotificationCreate,
     NotificationDescriptionUpdate,
@@ -17,17 +34,10 @@ from schemas.notification import (
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
-COLLECTION = "notification_settings"
+COLLECTION = NOTIFICATION_COLLECTION
 
-
-async def get_current_user_id(authorization: str | None = Header(default=None)) -> str:
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid access token")
-    return payload.get("sub")
+# POST /notifications/{abc_id}/bulk 한 번에 받는 최대 개수
+MAX_BULK_NOTIFICATIONS = 100
 
 
 def _object_id(value: str) -> ObjectId:
@@ -89,29 +99,57 @@ def _time_key(time_value: Optional[str], repeat_option: str, weekdays: List[int]
     return f"t={time_value}|rep={repeat_for_key}|wd={wd_csv}"
 
 
-def _duplicate_filter(doc: dict) -> Optional[dict]:
-    time_value = doc.get("time")
-    has_time = bool(time_value)
-    has_coords = doc.get("latitude") is not None and doc.get("longitude") is not None
-    has_addr = bool(doc.get("location"))
-    if has_time and not has_coords and not has_addr:
-        time_key_value = doc.get("time_key")
-        if time_key_value:
-            return {
-                "user_id": doc["user_id"],
-                "abc_id": doc["abc_id"],
-                "time_key": time_key_value,
-            }
-    if has_coords:
-        return {
-            "user_id": doc["user_id"],
-            "abc_id": doc["abc_id"],
-            "latitude": doc.get("latitude"),
-            "longitude": doc.get("longitude"),
-            "notify_enter": doc.get("notify_enter", False),
-            "notify_exit": doc.get("notify_exit", False),
-        }
-    return None
+def _nearest_duplicate(doc: dict, candidates: List[Tuple[dict, dict]]) -> Optional[dict]:
+    """DUPLICATE_RADIUS_M 안에서 진입/이탈 조건이 같은 가장 가까운 후보의 저장 필터"""
+    best = None
+    for candidate, target in candidates:
+        if (
+            bool(candidate.get("notify_enter")) != bool(doc.get("notify_enter"))
+            or bool(candidate.get("notify_exit")) != bool(doc.get("notify_exit"))
+        ):
+            continue
+        distance = distance_m(doc["latitude"], doc["longitude"], candidate["latitude"], candidate["longitude"])
+        if distance <= DUPLICATE_RADIUS_M and (best is None or distance < best[0]):
+            best = (distance, target)
+    return best[1] if best else None
+
+
+async def _plan_upserts(db, user_id: str, abc_id: str, docs: List[dict], now: datetime) -> List[Tuple[dict, dict]]:
+    """
+    저장할 알림마다 (upsert 필터, 갱신 내용)을 만든다. 같은 알림이면 기존 문서를 덮어쓰고 saved_at은 유지한다.
+    - 위치 알림: DUPLICATE_RADIUS_M 안의 기존 알림(또는 같은 요청의 앞선 알림)이 있으면 그 문서로 합친다.
+      좌표 격자(dedup_key)가 달라도 가까우면 같은 알림이다. 기존 알림은 $geoWithin 한 번으로 모두 읽는다.
+    - 그 밖에 dedup_key가 있으면 (user_id, abc_id, dedup_key), 없으면 새 _id로 넣는다.
+    """
+    located = [doc for doc in docs if doc.get("has_location")]
+    candidates: List[Tuple[dict, dict]] = []
+    if located:
+        cursor = db[COLLECTION].find(
+            {
+                "user_id": user_id,
+                "abc_id": abc_id,
+                "$or": [{"geo": within_sphere(d["latitude"], d["longitude"], DUPLICATE_RADIUS_M)} for d in located],
+            },
+            {"latitude": 1, "longitude": 1, "notify_enter": 1, "notify_exit": 1},
+        )
+        async for existing in cursor:
+            candidates.append((existing, {"_id": existing["_id"]}))
+
+    plans = []
+    for doc in docs:
+        fields = {k: v for k, v in doc.items() if k != "saved_at"}
+        target = _nearest_duplicate(doc, candidates) if doc.get("has_location") else None
+        if target is not None:
+            # 합쳐지는 문서의 격자 키는 그대로 둔다 (옆 격자의 다른 알림과 부딪히지 않도록)
+            fields.pop("dedup_key", None)
+        elif doc.get("dedup_key"):
+            target = {"user_id": user_id, "abc_id": abc_id, "dedup_key": doc["dedup_key"]}
+        else:
+            target = {"_id": ObjectId()}
+        if doc.get("has_location"):
+            candidates.append((doc, target))
+        plans.append((target, {"$set": fields, "$setOnInsert": {"saved_at": now}}))
+    return plans
 
 
 def _build_doc_from_payload(
@@ -141,6 +179,8 @@ def _build_doc_from_payload(
     time_key_value = _time_key(normalized_time, repeat_option, weekdays)
     if time_key_value:
         doc["time_key"] = time_key_value
+    doc.update(location_fields(doc) or {"has_location": False})
+    doc["dedup_key"] = dedup_key(doc)
     return {k: v for k, v in doc.items() if v is not None}
 
 
@@ -149,6 +189,7 @@ def _serialize_notification(doc: dict) -> dict:
         return {}
     saved_at = doc.get("saved_at")
     updated_at = doc.get("updated_at")
+    next_fire_at = doc.get("next_fire_at")
     return {
         "_id": str(doc.get("_id")),
         "id": str(doc.get("_id")),
@@ -168,6 +209,7 @@ def _serialize_notification(doc: dict) -> dict:
         "time_key": doc.get("time_key"),
         "saved_at": saved_at.isoformat() if saved_at else None,
         "updated_at": updated_at.isoformat() if updated_at else None,
+        "next_fire_at": next_fire_at.isoformat() if next_fire_at else None,
     }
 
 
@@ -181,22 +223,61 @@ async def _get_notification_or_404(db, user_id: str, abc_id: str, setting_id: st
 
 @router.get("")
 async def list_notifications(
+    response: Response,
     abc_id: Optional[str] = Query(None, alias="abc_id"),
     location_only: bool = Query(False, alias="location_only"),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    query = {"user_id": user_id}
+    """
+    최신순(saved_at, _id) 알림 목록.
+    - limit을 주면 한 페이지만 반환하고, 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서를 담는다.
+    - limit이 없으면 전체를 반환한다 (개수 제한 없음, 한 건씩 직렬화해서 흘려보낸다).
+    """
+    query: dict = {"user_id": user_id}
     if abc_id:
         query["abc_id"] = abc_id
     if location_only:
-        query["latitude"] = {"$ne": None}
-        query["longitude"] = {"$ne": None}
-    cursor = db[COLLECTION].find(query).sort("saved_at", -1)
-    docs = await cursor.to_list(length=200)
+        query["has_location"] = True
+    query.update(keyset_filter("saved_at", "_id", cursor, id_type=ObjectId))
+
+    find = db[COLLECTION].find(query).sort(NOTIFICATION_LIST_SORT)
+    if limit is None:
+        return stream_json_array(find, _serialize_notification)
+
+    # 한 건 더 읽어서 다음 페이지 존재 여부를 판단한다
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+    if len(docs) > limit:
+        last = docs[limit - 1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["saved_at"], last["_id"])
+        docs = docs[:limit]
     return [_serialize_notification(doc) for doc in docs]
 
 
+@router.get("/nearby")
+async def nearby_notifications(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(1000, gt=0, le=50_000, description="반경 (m)"),
+    limit: int = Query(50, ge=1, le=200),
+    db=Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    현재 위치 반경 안의 위치 알림을 가까운 순으로 반환한다 (2dsphere 인덱스, $nearSphere).
+    각 항목에 현재 위치까지의 거리(distance_m)를 붙인다.
+    """
+    cursor = db[COLLECTION].find({"user_id": user_id, "geo": near_sphere(lat, lng, radius)}).limit(limit)
+    results = []
+    async for doc in cursor:
+        item = _serialize_notification(doc)
+        item["distance_m"] = round(distance_m(lat, lng, doc["latitude"], doc["longitude"]), 1)
+        results.append(item)
+    return results
+
+
 @router.get("/latest")
 async def latest_notification(
     db=Depends(get_db),
@@ -220,20 +301,69 @@ async def create_notification(
 ):
     base_doc = _build_doc_from_payload(payload, abc_id=abc_id, user_id=user_id)
     now = datetime.now(timezone.utc)
-    base_doc["saved_at"] = now
     base_doc["updated_at"] = now
-    duplicate_query = _duplicate_filter(base_doc) if base_doc else None
-    if duplicate_query:
-        existing = await db[COLLECTION].find_one(duplicate_query)
-        if existing:
-            base_doc["saved_at"] = existing.get("saved_at", now)
-            await db[COLLECTION].update_one({"_id": existing["_id"]}, {"$set": base_doc})
-            merged = {**existing, **base_doc}
-            return _serialize_notification(merged)
+    base_doc["next_fire_at"] = notification_next_fire_at(base_doc, now)
+    [(target, update)] = await _plan_upserts(db, user_id, abc_id, [base_doc], now)
+    try:
+        saved = await db[COLLECTION].find_one_and_update(
+            target, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Notification was modified concurrently, retry")
+    alarm_scheduler.notify_changed(base_doc["next_fire_at"])
+    return _serialize_notification(saved)
 
-    result = await db[COLLECTION].insert_one(base_doc)
-    base_doc["_id"] = result.inserted_id
-    return _serialize_notification(base_doc)
+
+@router.post("/{abc_id}/bulk")
+async def bulk_create_notifications(
+    abc_id: str,
+    payload: List[NotificationCreate] = Body(...),
+    db=Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    알림 여러 개를 한 번에 저장한다 (POST /notifications/{abc_id}를 차례로 부른 것과 같은 결과).
+    bulk_write 한 번의 upsert로 쓰고, 입력 순서대로 저장된 알림을 돌려준다.
+    """
+    if len(payload) > MAX_BULK_NOTIFICATIONS:
+        raise HTTPException(status_code=400, detail=f"Too many notifications (max {MAX_BULK_NOTIFICATIONS})")
+    if not payload:
+        return []
+    now = datetime.now(timezone.utc)
+    docs = []
+    for item in payload:
+        doc = _build_doc_from_payload(item, abc_id=abc_id, user_id=user_id)
+        doc["updated_at"] = now
+        doc["next_fire_at"] = notification_next_fire_at(doc, now)
+        docs.append(doc)
+    plans = await _plan_upserts(db, user_id, abc_id, docs, now)
+    try:
+        await db[COLLECTION].bulk_write(
+            [UpdateOne(target, update, upsert=True) for target, update in plans], ordered=True
+        )
+    except BulkWriteError:
+        raise HTTPException(status_code=409, detail="Notification was modified concurrently, retry")
+
+    ids = [target["_id"] for target, _ in plans if "_id" in target]
+    keys = [target["dedup_key"] for target, _ in plans if "dedup_key" in target]
+    by_id, by_key = {}, {}
+    cursor = db[COLLECTION].find({
+        "user_id": user_id,
+        "abc_id": abc_id,
+        "$or": [{"_id": {"$in": ids}}, {"dedup_key": {"$in": keys}}],
+    })
+    async for saved in cursor:
+        by_id[saved["_id"]] = saved
+        if saved.get("dedup_key"):
+            by_key[saved["dedup_key"]] = saved
+
+    fire_times = [doc["next_fire_at"] for doc in docs if doc.get("next_fire_at")]
+    if fire_times:
+        alarm_scheduler.notify_changed(min(fire_times))
+    return [
+        _serialize_notification(by_id.get(target["_id"]) if "_id" in target else by_key.get(target["dedup_key"]))
+        for target, _ in plans
+    ]
 
 
 @router.put("/{abc_id}/{setting_id}")
@@ -299,6 +429,12 @@ async def update_notification(
     candidate = {**doc, **updates}
     for key in unsets:
         candidate.pop(key, None)
+    location = location_fields(candidate)
+    if location:
+        updates.update(location)
+    else:
+        updates["has_location"] = False
+        unsets["geo"] = ""
 
     time_key_value = _time_key(
         candidate.get("time"),
@@ -309,9 +445,16 @@ async def update_notification(
         updates["time_key"] = time_key_value
     else:
         unsets["time_key"] = ""
+    key = dedup_key({**candidate, "time_key": time_key_value})
+    if key:
+        updates["dedup_key"] = key
+    else:
+        unsets["dedup_key"] = ""
 
     now = datetime.now(timezone.utc)
     updates["updated_at"] = now
+    if fields_set & set(NOTIFICATION_SCHEDULE_FIELDS):
+        updates["next_fire_at"] = notification_next_fire_at(candidate, now)
 
     update_ops = {}
     if updates:
@@ -319,10 +462,14 @@ async def update_notification(
     if unsets:
         update_ops["$unset"] = unsets
     if update_ops:
-        await db[COLLECTION].update_one({"_id": doc["_id"]}, update_ops)
+        try:
+            await db[COLLECTION].update_one({"_id": doc["_id"]}, update_ops)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="Duplicate notification")
         doc.update(updates)
         for key in unsets:
             doc.pop(key, None)
+        alarm_scheduler.notify_changed(updates.get("next_fire_at"))
 
     return _serialize_notification(doc)
 
@@ -344,22 +491,36 @@ async def update_notification_time(
     weekdays = _normalize_weekdays(weekdays_source)
     time_key_value = _time_key(time_value, repeat_option, weekdays)
 
+    now = datetime.now(timezone.utc)
     updates = {
         "time": time_value,
         "repeat_option": repeat_option,
         "weekdays": weekdays,
-        "updated_at": datetime.now(timezone.utc),
+        "updated_at": now,
     }
+    updates["next_fire_at"] = notification_next_fire_at(updates, now)
     update_ops = {"$set": updates}
+    unsets = {}
     if time_key_value:
         updates["time_key"] = time_key_value
     else:
-        update_ops["$unset"] = {"time_key": ""}
+        unsets["time_key"] = ""
+    key = dedup_key({**doc, **updates})
+    if key:
+        updates["dedup_key"] = key
+    else:
+        unsets["dedup_key"] = ""
+    if unsets:
+        update_ops["$unset"] = unsets
 
-    await db[COLLECTION].update_one({"_id": doc["_id"]}, update_ops)
+    try:
+        await db[COLLECTION].update_one({"_id": doc["_id"]}, update_ops)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Duplicate notification")
+    alarm_scheduler.notify_changed(updates["next_fire_at"])
     doc.update(updates)
-    if not time_key_value:
-        doc.pop("time_key", None)
+    for field in unsets:
+        doc.pop(field, None)
     return _serialize_notification(doc)
 
 
@@ -398,4 +559,5 @@ async def delete_notification(
 ):
     doc = await _get_notification_or_404(db, user_id, abc_id, setting_id)
     await db[COLLECTION].delete_one({"_id": doc["_id"]})
+    await record_tombstone(db, user_id, "notifications", doc["_id"])
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -4,24 +4,50 @@ try:
 except ModuleNotFoundError:  # pragma: no cover
     ZoneInfo = None
 
-from typing import List, Optional, Any
+from typing import List, Literal, Optional, Any, Union
 from bson import ObjectId
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pymongo import ReturnDocument
 from schemas.relaxation import (
+    RelaxationAutosaveResponse,
+    RelaxationLogAppend,
     RelaxationLogEntry,
     RelaxationTaskCreate,
     RelaxationTaskResponse,
+    RelaxationTaskSummary,
     RelaxationScoreUpdate,
+    RelaxationStatsResponse,
 )
 
+from db.indexes import register_index, register_query
 from db.mongo import get_db
-from core.security import decode_token
+from core.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter
+from core.security import get_current_user_id
 
 
 router = APIRouter(prefix="/relaxation_tasks", tags=["relaxation_tasks"])
 
 COLLECTION = "relaxation_tasks"
 
+# 목록 정렬: 시작 시각 최신순, 같은 시각이면 _id 역순 (키셋 페이지네이션)
+LIST_SORT = [("start_time", -1), ("_id", -1)]
+
+register_index(COLLECTION, [("user_id", 1), ("start_time", -1), ("_id", -1)])
+register_index(COLLECTION, [("user_id", 1), ("week_number", 1), ("start_time", -1), ("_id", -1)])
+register_index(COLLECTION, [("user_id", 1), ("task_id", 1), ("start_time", -1), ("_id", -1)])
+# /sync 변경분 조회
+register_index(COLLECTION, [("user_id", 1), ("updated_at", 1)])
+
+register_query("GET /relaxation_tasks", COLLECTION, {"user_id": "u"}, sort=LIST_SORT)
+register_query("GET /relaxation_tasks?week_number", COLLECTION, {"user_id": "u", "week_number": 1}, sort=LIST_SORT)
+register_query("GET /relaxation_tasks?task_id", COLLECTION, {"user_id": "u", "task_id": "t"}, sort=LIST_SORT)
+register_query("GET /relaxation_tasks/{relax_id}", COLLECTION, {"_id": ObjectId(), "user_id": "u"})
+register_query(
+    "GET /relaxation_tasks/stats", COLLECTION,
+    {"user_id": "u", "start_time": {"$gte": datetime(2025, 1, 1), "$lt": datetime(2025, 2, 1)}},
+)
+register_query("GET /sync relaxation_tasks", COLLECTION, {"user_id": "u", "updated_at": {"$gte": datetime(2025, 1, 1)}})
+
 
 # ========= 공통 유틸 =========
 
@@ -59,14 +85,25 @@ def _parse_datetime_value(value: Any, fallback: Optional[datetime] = None) -> da
     return datetime.now(timezone.utc)
 
 
-async def get_current_user_id(authorization: str | None = Header(default=None)) -> str:
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid access token")
-    return payload.get("sub")
+def _object_id(relax_id: str) -> ObjectId:
+    try:
+        return ObjectId(relax_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid relax_id",
+        )
+
+
+def _log_docs(entries: List[RelaxationLogEntry]) -> List[dict]:
+    return [
+        {
+            "action": entry.action,
+            "timestamp": _ensure_tz(entry.timestamp),
+            "elapsed_seconds": entry.elapsed_seconds,
+        }
+        for entry in entries
+    ]
 
 
 def _serialize_task(doc: dict) -> dict:
@@ -100,6 +137,7 @@ def _serialize_task(doc: dict) -> dict:
             for entry in (doc.get("logs") or [])
             if isinstance(entry, dict)
         ],
+        "logs_count": doc.get("logs_count", len(doc.get("logs") or [])),
         "latitude": doc.get("latitude"),
         "longitude": doc.get("longitude"),
         "address_name": doc.get("address_name"),
@@ -108,6 +146,13 @@ def _serialize_task(doc: dict) -> dict:
     }
 
 
+def _serialize_summary(doc: dict) -> dict:
+    """목록(fields=summary) 응답: logs 빼고 나머지는 _serialize_task와 같다"""
+    summary = _serialize_task(doc)
+    summary.pop("logs")
+    return summary
+
+
 # ========= Endpoints =========
 
 @router.post(
@@ -142,42 +187,23 @@ async def update_relaxation_task(
                 if payload.end_time is not None
                 else None
             ),
-            "logs": [
-                {
-                    "action": entry.action,
-                    "timestamp": _ensure_tz(entry.timestamp),
-                    "elapsed_seconds": entry.elapsed_seconds,
-                }
-                for entry in payload.logs
-            ],
+            "logs": _log_docs(payload.logs),
+            "logs_count": len(payload.logs),
             "latitude": payload.latitude,
             "longitude": payload.longitude,
             "address_name": payload.address_name,
             "duration_time": payload.duration_time,
             "relaxation_score": None,  # 점수는 나중에 별도 PATCH로
+            "updated_at": datetime.now(timezone.utc),
         }
         result = await collection.insert_one(log_doc)
-        saved = await collection.find_one({"_id": result.inserted_id})
-        return RelaxationTaskResponse(**_serialize_task(saved))
-
-    # ✅ 기존 세션 업데이트 (autosave 등)
-    try:
-        obj_id = ObjectId(payload.relax_id)
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid relax_id",
-        )
-
-    existing = await collection.find_one({"_id": obj_id, "user_id": user_id})
-    if existing is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Relaxation session not found for update",
-        )
+        log_doc["_id"] = result.inserted_id
+        return RelaxationTaskResponse(**_serialize_task(log_doc))
 
-    existing_score = existing.get("relaxation_score")
+    # ✅ 기존 세션 전체 덮어쓰기 (진행 중 autosave는 POST /{relax_id}/logs 사용)
+    obj_id = _object_id(payload.relax_id)
 
+    # 점수는 $set에 넣지 않아서 기존 값이 유지된다
     log_doc = {
         "user_id": user_id,
         "task_id": payload.task_id,
@@ -188,47 +214,120 @@ async def update_relaxation_task(
             if payload.end_time is not None
             else None
         ),
-        "logs": [
-            {
-                "action": entry.action,
-                "timestamp": _ensure_tz(entry.timestamp),
-                "elapsed_seconds": entry.elapsed_seconds,
-            }
-            for entry in payload.logs
-        ],
+        "logs": _log_docs(payload.logs),
+        "logs_count": len(payload.logs),
         "latitude": payload.latitude,
         "longitude": payload.longitude,
         "address_name": payload.address_name,
         "duration_time": payload.duration_time,
-        # 점수는 유지
-        "relaxation_score": existing_score,
+        "updated_at": datetime.now(timezone.utc),
     }
 
-    await collection.update_one(
+    saved = await collection.find_one_and_update(
         {"_id": obj_id, "user_id": user_id},
         {"$set": log_doc},
+        return_document=ReturnDocument.AFTER,
     )
-    saved = await collection.find_one({"_id": obj_id, "user_id": user_id})
+    if saved is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Relaxation session not found for update",
+        )
     return RelaxationTaskResponse(**_serialize_task(saved))
 
 
+@router.post(
+    "/{relax_id}/logs",
+    response_model=RelaxationAutosaveResponse,
+    summary="이완 세션 autosave: 새 로그만 이어 붙이기",
+)
+async def append_relaxation_logs(
+        relax_id: str,
+        payload: RelaxationLogAppend,
+        user_id: str = Depends(get_current_user_id),
+        db=Depends(get_db),
+):
+    """
+    진행 중인 세션에 마지막 저장 이후의 로그만 이어 붙이고 end_time/duration_time을 갱신한다.
+    - since_seq는 클라이언트가 알고 있는 서버의 logs_count. 서버 값과 같을 때만 붙인다
+      (재전송/순서 꼬임으로 같은 로그가 두 번 붙지 않도록). 다르면 409와 함께 X-Logs-Count 헤더로 서버 값을 준다.
+    - 한 번의 find_one_and_update로 처리하고, 응답에는 로그 전체 대신 logs_count만 담는다
+      (세션이 길어져도 autosave 한 번의 비용이 같다).
+    """
+    collection = db[COLLECTION]
+    obj_id = _object_id(relax_id)
+    new_count = payload.since_seq + len(payload.logs)
+
+    updates: dict[str, Any] = {"logs_count": new_count, "updated_at": datetime.now(timezone.utc)}
+    if payload.end_time is not None:
+        updates["end_time"] = _ensure_tz(payload.end_time)
+    if payload.duration_time is not None:
+        updates["duration_time"] = payload.duration_time
+    update: dict[str, Any] = {"$set": updates}
+    if payload.logs:
+        update["$push"] = {"logs": {"$each": _log_docs(payload.logs)}}
+
+    saved = await collection.find_one_and_update(
+        {
+            "_id": obj_id,
+            "user_id": user_id,
+            # logs_count가 없는 예전 세션은 배열 길이로 비교한다
+            "$or": [
+                {"logs_count": payload.since_seq},
+                {"logs_count": {"$exists": False}, "logs": {"$size": payload.since_seq}},
+            ],
+        },
+        update,
+        projection={"logs": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if saved is None:
+        current = await collection.find_one({"_id": obj_id, "user_id": user_id}, {"logs_count": 1, "logs": 1})
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Relaxation session not found",
+            )
+        logs_count = current.get("logs_count", len(current.get("logs") or []))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"since_seq {payload.since_seq} does not match server logs_count {logs_count}",
+            headers={"X-Logs-Count": str(logs_count)},
+        )
+
+    end_time = saved.get("end_time")
+    return RelaxationAutosaveResponse(
+        relax_id=str(saved["_id"]),
+        logs_count=saved["logs_count"],
+        end_time=_parse_datetime_value(end_time).astimezone(KST) if end_time is not None else None,
+        duration_time=saved.get("duration_time"),
+    )
+
+
 @router.get(
     "",
-    response_model=List[RelaxationTaskResponse],
+    response_model=Union[List[RelaxationTaskResponse], List[RelaxationTaskSummary]],
     summary="이완 세션 로그 목록 조회 (별도 컬렉션)",
 )
 async def list_relaxation_tasks(
+        response: Response,
         week_number: Optional[int] = None,
         task_id: Optional[str] = None,
+        fields: Literal["summary", "full"] = "summary",
+        limit: Optional[int] = Query(None, ge=1, le=200),
+        cursor: Optional[str] = None,
         user_id: str = Depends(get_current_user_id),
         db=Depends(get_db),
 ):
     """
-    사용자의 이완 세션 로그를 모두 조회합니다.
+    사용자의 이완 세션 로그를 조회합니다.
 
     - `week_number` 쿼리 파라미터로 특정 주차만 필터링 가능
     - `task_id` 쿼리 파라미터로 특정 task_id만 필터링 가능 (예: 특정 알람 ID)
     - start_time 기준 **최신순** 정렬
+    - `fields=summary`(기본): logs 없이 logs_count만. 로그는 GET /relaxation_tasks/{relax_id}로 세션별로 받는다.
+      `fields=full`: 예전처럼 logs 포함.
+    - limit을 주면 한 페이지만 반환하고, 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서를 담는다.
     """
     collection = db[COLLECTION]
 
@@ -237,13 +336,156 @@ async def list_relaxation_tasks(
         query["week_number"] = int(week_number)
     if task_id is not None:
         query["task_id"] = task_id
+    query.update(keyset_filter("start_time", "_id", cursor, id_type=ObjectId))
+
+    pipeline: List[dict] = [{"$match": query}, {"$sort": dict(LIST_SORT)}]
+    if limit is not None:
+        # 한 건 더 읽어서 다음 페이지 존재 여부를 판단한다
+        pipeline.append({"$limit": limit + 1})
+    if fields == "summary":
+        # logs는 DB에서 잘라내고 개수만 남긴다 (logs_count가 없는 예전 세션은 배열 길이)
+        pipeline += [
+            {"$addFields": {"logs_count": {"$ifNull": ["$logs_count", {"$size": {"$ifNull": ["$logs", []]}}]}}},
+            {"$unset": "logs"},
+        ]
+    docs = await collection.aggregate(pipeline).to_list(length=None)
+
+    if limit is not None and len(docs) > limit:
+        last = docs[limit - 1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            _parse_datetime_value(last.get("start_time")), last["_id"]
+        )
+        docs = docs[:limit]
+    if fields == "summary":
+        return [RelaxationTaskSummary(**_serialize_summary(doc)) for doc in docs]
+    return [RelaxationTaskResponse(**_serialize_task(doc)) for doc in docs]
+
+
+def _stats_pipeline(match: dict) -> List[dict]:
+    """통계용 $facet 파이프라인. logs는 처음 $project에서 버린다."""
+    duration = {"$sum": "$duration_time"}
+    completed = {"$sum": "$completed"}
+    return [
+        {"$match": match},
+        {"$project": {
+            "_id": 0,
+            "week_number": 1,
+            "duration_time": 1,
+            "score": "$relaxation_score",
+            "start": {"$convert": {"input": "$start_time", "to": "date", "onError": None, "onNull": None}},
+            # 필드가 없을 때도 0이 되도록 $ne 대신 $gt null로 비교
+            "completed": {"$cond": [{"$gt": ["$end_time", None]}, 1, 0]},
+        }},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "completed": completed,
+                    "total_duration": duration,
+                    "avg_duration": {"$avg": "$duration_time"},
+                    "scored": {"$sum": {"$cond": [{"$gt": ["$score", None]}, 1, 0]}},
+                    "avg_score": {"$avg": "$score"},
+                }},
+            ],
+            "by_week": [
+                {"$group": {
+                    "_id": "$week_number",
+                    "count": {"$sum": 1},
+                    "completed": completed,
+                    "total_duration": duration,
+                    "avg_duration": {"$avg": "$duration_time"},
+                    "avg_score": {"$avg": "$score"},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+            "by_day": [
+                {"$match": {"start": {"$ne": None}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$start", "timezone": "Asia/Seoul"}},
+                    "count": {"$sum": 1},
+                    "completed": completed,
+                    "total_duration": duration,
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+            "scores": [
+                {"$match": {"score": {"$ne": None}}},
+                {"$group": {"_id": {"$floor": "$score"}, "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}},
+            ],
+        }},
+    ]
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return round(value, digits) if value is not None else None
 
-    cursor = collection.find(query).sort("start_time", -1)
 
-    tasks: List[RelaxationTaskResponse] = []
-    async for doc in cursor:
-        tasks.append(RelaxationTaskResponse(**_serialize_task(doc)))
-    return tasks
+@router.get(
+    "/stats",
+    response_model=RelaxationStatsResponse,
+    summary="이완 세션 통계 (주차별/일별 횟수, 수행 시간, 점수 분포, 완료율)",
+)
+async def get_relaxation_stats(
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        user_id: str = Depends(get_current_user_id),
+        db=Depends(get_db),
+):
+    """
+    진행 현황 화면용 통계를 서버에서 한 번의 $facet 집계로 계산한다 (로그 배열은 내려보내지 않는다).
+    - `since` 이상 `until` 미만의 start_time만 집계 (생략하면 전체)
+    - 일별(by_day)은 한국시간 날짜 기준, 점수 분포는 정수 구간(0~5)별 세션 수
+    - 완료율 = end_time이 있는 세션 / 전체 세션
+    """
+    match: dict[str, Any] = {"user_id": user_id}
+    if since is not None or until is not None:
+        match["start_time"] = {}
+        if since is not None:
+            match["start_time"]["$gte"] = _ensure_tz(since)
+        if until is not None:
+            match["start_time"]["$lt"] = _ensure_tz(until)
+
+    rows = await db[COLLECTION].aggregate(_stats_pipeline(match)).to_list(length=1)
+    facets = rows[0] if rows else {}
+    totals = (facets.get("totals") or [{}])[0]
+    count = totals.get("count", 0)
+    completed = totals.get("completed", 0)
+
+    return RelaxationStatsResponse(
+        total_sessions=count,
+        completed_sessions=completed,
+        completion_rate=round(completed / count, 4) if count else 0.0,
+        total_duration=totals.get("total_duration", 0),
+        avg_duration=_round(totals.get("avg_duration")),
+        scored_sessions=totals.get("scored", 0),
+        avg_score=_round(totals.get("avg_score")),
+        by_week=[
+            {
+                "week_number": row["_id"],
+                "count": row["count"],
+                "completed": row["completed"],
+                "total_duration": row["total_duration"],
+                "avg_duration": _round(row.get("avg_duration")),
+                "avg_score": _round(row.get("avg_score")),
+            }
+            for row in facets.get("by_week", [])
+        ],
+        by_day=[
+            {
+                "date": row["_id"],
+                "count": row["count"],
+                "completed": row["completed"],
+                "total_duration": row["total_duration"],
+            }
+            for row in facets.get("by_day", [])
+        ],
+        score_distribution=[
+            {"score": int(row["_id"]), "count": row["count"]}
+            for row in facets.get("scores", [])
+        ],
+    )
 
 
 @router.get(
@@ -280,6 +522,25 @@ async def get_latest_relaxation_task(
     return RelaxationTaskResponse(**_serialize_task(doc))
 
 
+@router.get(
+    "/{relax_id}",
+    response_model=RelaxationTaskResponse,
+    summary="이완 세션 1개 조회 (logs 포함)",
+)
+async def get_relaxation_task(
+        relax_id: str,
+        user_id: str = Depends(get_current_user_id),
+        db=Depends(get_db),
+):
+    doc = await db[COLLECTION].find_one({"_id": _object_id(relax_id), "user_id": user_id})
+    if doc is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Relaxation session not found",
+        )
+    return RelaxationTaskResponse(**_serialize_task(doc))
+
+
 @router.patch(
     "/{relax_id}/score",
     response_model=RelaxationTaskResponse,
@@ -298,18 +559,14 @@ async def update_relaxation_score(
     - 찾으면 해당 항목의 `relaxation_score`만 변경.
     """
     collection = db[COLLECTION]
-
-    try:
-        obj_id = ObjectId(relax_id)
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid relax_id",
-        )
+    obj_id = _object_id(relax_id)
 
     result = await collection.find_one_and_update(
         {"_id": obj_id, "user_id": user_id},
-        {"$set": {"relaxation_score": payload.relaxation_score}},
+        {"$set": {
+            "relaxation_score": payload.relaxation_score,
+            "updated_at": datetime.now(timezone.utc),
+        }},
         return_document=True,
     )
 
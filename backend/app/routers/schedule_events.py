@@ -5,12 +5,19 @@ import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
 
+from db.indexes import register_index, register_query
 from db.mongo import get_db
 from core.security import get_current_user
 
 
 COLLECTION_NAME = "schedule_events"
 
+register_index(COLLECTION_NAME, [("user_id", 1), ("start_date", 1)])
+register_index(COLLECTION_NAME, [("user_id", 1), ("event_id", 1)])
+
+register_query("GET /schedule-events", COLLECTION_NAME, {"user_id": "u"}, sort=[("start_date", 1)])
+register_query("schedule event by id", COLLECTION_NAME, {"user_id": "u", "event_id": "e"})
+
 router = APIRouter(prefix="/schedule-events", tags=["schedule-events"])
 
 
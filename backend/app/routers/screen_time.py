@@ -1,40 +1,41 @@
+import asyncio
+import json
 from datetime import datetime, timezone, timedelta
-try:
-    from zoneinfo import ZoneInfo
-except ModuleNotFoundError:  # pragma: no cover
-    ZoneInfo = None
-from typing import Tuple
+from typing import Any, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
-from core.security import decode_token
+from core.security import get_current_user_id
 from db.mongo import get_db
-from schemas.screen_time import ScreenTimeCreate, ScreenTimeEntry, ScreenTimeSummary
+from db.screen_time import (
+    DAILY_COLLECTION,
+    KST,
+    SCREEN_TIME_COLLECTION,
+    TOTALS_COLLECTION,
+    apply_session,
+    apply_sessions,
+    dedup_key,
+    ensure_user_rollups,
+    kst_day,
+)
+from schemas.screen_time import (
+    ScreenTimeBatchItemResult,
+    ScreenTimeBatchResult,
+    ScreenTimeCreate,
+    ScreenTimeEntry,
+    ScreenTimeSummary,
+)
 
 router = APIRouter(prefix="/users/me/screen-time", tags=["screen-time"])
 
-COLLECTION = "screen_time"
+COLLECTION = SCREEN_TIME_COLLECTION
 
-def _get_kst_tz():
-    if ZoneInfo is not None:
-        try:
-            return ZoneInfo("Asia/Seoul")
-        except Exception:
-            pass
-    return timezone(timedelta(hours=9))
-
-
-KST = _get_kst_tz()
+# 한 번의 일괄 업로드에서 받는 최대 세션 수
+MAX_BATCH_SIZE = 1000
 
-
-async def get_current_user_id(authorization: str | None = Header(default=None)) -> str:
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid access token")
-    return payload.get("sub")
+DUPLICATE_KEY_ERROR = 11000
 
 
 def _ensure_utc(dt: datetime) -> datetime:
@@ -59,6 +60,7 @@ def _serialize_entry(doc: dict) -> dict:
         "duration_minutes": float(doc.get("duration_minutes", 0)),
         "created_at": _coerce_datetime(doc.get("created_at")),
         "platform": doc.get("platform"),
+        "client_session_id": doc.get("client_session_id"),
     }
 
 
@@ -67,44 +69,15 @@ def _kst_midnight(now_utc: datetime) -> datetime:
     return datetime(now_kst.year, now_kst.month, now_kst.day, tzinfo=KST)
 
 
-async def _window_minutes(collection, user_id: str, start_utc: datetime, end_utc: datetime) -> Tuple[float, int]:
-    total = 0.0
-    sessions = 0
-    cursor = collection.find(
-        {
-            "user_id": user_id,
-            "end_time": {"$gt": start_utc},
-            "start_time": {"$lt": end_utc},
-        }
-    )
-    async for doc in cursor:
-        st = _coerce_datetime(doc.get("start_time"))
-        et = _coerce_datetime(doc.get("end_time"))
-        if not isinstance(st, datetime) or not isinstance(et, datetime):
-            continue
-        overlap_start = max(st, start_utc)
-        overlap_end = min(et, end_utc)
-        if overlap_end <= overlap_start:
-            continue
-        total += (overlap_end - overlap_start).total_seconds() / 60
-        sessions += 1
-    return total, sessions
-
-
-@router.post("", response_model=ScreenTimeEntry)
-async def create_screen_time_entry(
-    payload: ScreenTimeCreate,
-    db=Depends(get_db),
-    user_id: str = Depends(get_current_user_id),
-):
+def _build_session_doc(user_id: str, payload: ScreenTimeCreate) -> dict:
     start = _ensure_utc(payload.start_time)
     end = _ensure_utc(payload.end_time)
     if end <= start:
-        raise HTTPException(status_code=400, detail="end_time must be after start_time")
+        raise ValueError("end_time must be after start_time")
 
     duration = (end - start).total_seconds() / 60
     if duration <= 0:
-        raise HTTPException(status_code=400, detail="duration must be positive")
+        raise ValueError("duration must be positive")
 
     doc = {
         "user_id": user_id,
@@ -113,12 +86,131 @@ async def create_screen_time_entry(
         "duration_minutes": round(duration, 2),
         "platform": payload.platform,
         "created_at": datetime.now(timezone.utc),
+        "dedup_key": dedup_key(start, end, payload.client_session_id),
     }
-    result = await db[COLLECTION].insert_one(doc)
+    if payload.client_session_id:
+        doc["client_session_id"] = payload.client_session_id
+    return doc
+
+
+@router.post("", response_model=ScreenTimeEntry)
+async def create_screen_time_entry(
+    payload: ScreenTimeCreate,
+    db=Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    세션 하나를 저장합니다.
+    같은 세션(client_session_id 또는 시작/종료 시각)이 이미 있으면 새로 만들지 않고 기존 항목을 반환합니다.
+    """
+    try:
+        doc = _build_session_doc(user_id, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await ensure_user_rollups(db, user_id)
+    try:
+        result = await db[COLLECTION].insert_one(doc)
+    except DuplicateKeyError:
+        existing = await db[COLLECTION].find_one({"user_id": user_id, "dedup_key": doc["dedup_key"]})
+        return _serialize_entry(existing or doc)
     doc["_id"] = result.inserted_id
+    await apply_session(db, user_id, doc["start_time"], doc["end_time"], doc["duration_minutes"])
     return _serialize_entry(doc)
 
 
+async def _read_batch_items(request: Request) -> List[Any]:
+    """JSON 배열 또는 NDJSON(application/x-ndjson, 한 줄에 세션 하나) 본문을 읽는다"""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body or b"[]")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of sessions")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} sessions per batch")
+    return items
+
+
+@router.post("/batch", response_model=ScreenTimeBatchResult)
+async def create_screen_time_entries_batch(
+    request: Request,
+    db=Depends(get_db),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    오프라인 동안 쌓인 세션을 한 번에 업로드합니다.
+    - 본문: 세션 배열(JSON) 또는 NDJSON
+    - 항목별로 created / duplicate / invalid / error 결과를 요청 순서대로 돌려줍니다.
+      error는 저장 중 실패한 항목이며 error 필드에 사유가 담깁니다 (나머지 항목은 저장됨).
+    - 이미 저장된 세션을 다시 보내도 중복 저장되지 않으므로 실패 시 그대로 재전송하면 됩니다.
+    """
+    items = await _read_batch_items(request)
+    results: List[Optional[ScreenTimeBatchItemResult]] = [None] * len(items)
+
+    # 1. 한 번에 검증
+    pending: List[Tuple[int, dict]] = []
+    for index, item in enumerate(items):
+        try:
+            pending.append((index, _build_session_doc(user_id, ScreenTimeCreate.model_validate(item))))
+        except ValidationError as e:
+            results[index] = ScreenTimeBatchItemResult(
+                index=index, status="invalid", error=e.errors()[0].get("msg", "invalid")
+            )
+        except ValueError as e:
+            results[index] = ScreenTimeBatchItemResult(index=index, status="invalid", error=str(e))
+
+    # 2. 순서 없이 한 번에 저장: 오류가 난 항목만 건너뛰고 나머지는 저장된다
+    duplicate_positions: set[int] = set()
+    error_messages: dict[int, str] = {}
+    if pending:
+        await ensure_user_rollups(db, user_id)
+        try:
+            await db[COLLECTION].insert_many([doc for _, doc in pending], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") == DUPLICATE_KEY_ERROR:
+                    duplicate_positions.add(error["index"])
+                else:
+                    error_messages[error["index"]] = error.get("errmsg") or "write error"
+
+    created = [
+        doc for pos, (_, doc) in enumerate(pending)
+        if pos not in duplicate_positions and pos not in error_messages
+    ]
+    await apply_sessions(db, user_id, [(d["start_time"], d["end_time"], d["duration_minutes"]) for d in created])
+
+    # 3. 중복 항목은 기존 문서 ID를 알려준다
+    existing_ids = {}
+    if duplicate_positions:
+        keys = [pending[pos][1]["dedup_key"] for pos in duplicate_positions]
+        cursor = db[COLLECTION].find({"user_id": user_id, "dedup_key": {"$in": keys}}, {"dedup_key": 1})
+        existing_ids = {doc["dedup_key"]: str(doc["_id"]) async for doc in cursor}
+
+    for pos, (index, doc) in enumerate(pending):
+        if pos in error_messages:
+            results[index] = ScreenTimeBatchItemResult(index=index, status="error", error=error_messages[pos])
+        elif pos in duplicate_positions:
+            results[index] = ScreenTimeBatchItemResult(
+                index=index, status="duplicate", id=existing_ids.get(doc["dedup_key"])
+            )
+        else:
+            results[index] = ScreenTimeBatchItemResult(index=index, status="created", id=str(doc["_id"]))
+
+    return ScreenTimeBatchResult(
+        created=len(created),
+        duplicates=len(duplicate_positions),
+        invalid=len(items) - len(pending),
+        errors=len(error_messages),
+        results=results,
+    )
+
+
 @router.get("", response_model=list[ScreenTimeEntry])
 async def list_screen_time_entries(
     limit: int = Query(20, ge=1, le=200),
@@ -142,33 +234,40 @@ async def get_screen_time_summary(
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    collection = db[COLLECTION]
-    now_utc = datetime.now(timezone.utc)
-    today_start_kst = _kst_midnight(now_utc)
-    today_end_kst = today_start_kst + timedelta(days=1)
-    week_start_kst = today_start_kst - timedelta(days=6)
-
-    today_start_utc = today_start_kst.astimezone(timezone.utc)
-    today_end_utc = today_end_kst.astimezone(timezone.utc)
-    week_start_utc = week_start_kst.astimezone(timezone.utc)
-
-    today_minutes, _ = await _window_minutes(collection, user_id, today_start_utc, today_end_utc)
-    week_minutes, week_sessions = await _window_minutes(collection, user_id, week_start_utc, today_end_utc)
+    """
+    오늘/최근 7일(KST)/누적 사용 시간.
+    원본 세션 대신 일별 집계 최대 7건과 누적 합계 1건만 읽는다.
+    """
+    await ensure_user_rollups(db, user_id)
 
-    total_pipeline = [
-        {"$match": {"user_id": user_id}},
-        {"$group": {"_id": None, "sum": {"$sum": "$duration_minutes"}}},
-    ]
-    total_docs = await collection.aggregate(total_pipeline).to_list(length=1)
-    total_minutes = float(total_docs[0]["sum"]) if total_docs else 0.0
+    today_start_kst = _kst_midnight(datetime.now(timezone.utc))
+    week_start_kst = today_start_kst - timedelta(days=6)
+    today = kst_day(today_start_kst)
+    week_first_day = kst_day(week_start_kst)
+
+    daily_docs, totals = await asyncio.gather(
+        db[DAILY_COLLECTION]
+        .find(
+            {"user_id": user_id, "day": {"$gte": week_first_day, "$lte": today}},
+            {"_id": 0, "day": 1, "minutes": 1, "sessions": 1, "continued": 1},
+        )
+        .to_list(length=7),
+        db[TOTALS_COLLECTION].find_one({"_id": user_id}),
+    )
 
-    last_entry = await collection.find_one({"user_id": user_id}, sort=[("end_time", -1)])
-    last_entry_at = _coerce_datetime(last_entry.get("end_time")) if last_entry else None
+    today_minutes = sum(d.get("minutes", 0) for d in daily_docs if d["day"] == today)
+    week_minutes = sum(d.get("minutes", 0) for d in daily_docs)
+    # 전날에서 이어진 구간은 이미 센 세션이므로 빼되, 기간 첫날 이전에서 이어진 세션은 한 번 센다
+    week_sessions = sum(
+        d.get("sessions", 0) - (d.get("continued", 0) if d["day"] != week_first_day else 0)
+        for d in daily_docs
+    )
 
+    totals = totals or {}
     return ScreenTimeSummary(
-        totalMinutes=round(total_minutes, 2),
+        totalMinutes=round(float(totals.get("total_minutes", 0)), 2),
         todayMinutes=round(today_minutes, 2),
         weekMinutes=round(week_minutes, 2),
         sessions=week_sessions,
-        lastEntryAt=last_entry_at,
+        lastEntryAt=_coerce_datetime(totals.get("last_entry_at")),
     )
@@ -2,16 +2,16 @@ from datetime import datetime, timezone
 from typing import List
 import uuid
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from pymongo import ReturnDocument
 
-from core.security import decode_token
+from core.security import get_current_user_id
+from db.diaries import DIARY_COLLECTION, ensure_user_diaries, invalidate_group_stats
 from db.mongo import get_db
 from schemas.sud import SudScoreCreate, SudScoreResponse, SudScoreUpdate
 
 router = APIRouter(prefix="/sud-scores", tags=["sud_scores"])
 
-USERS_COLLECTION = "users"
-
 
 def _ensure_tz(dt: datetime | None) -> datetime:
     if dt is None:
@@ -21,35 +21,30 @@ def _ensure_tz(dt: datetime | None) -> datetime:
     return dt
 
 
-async def get_current_user_id(authorization: str | None = Header(default=None)) -> str:
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid access token")
-    return payload.get("sub")
-
-
-async def _get_user_or_404(db, user_id: str) -> dict:
-    user = await db[USERS_COLLECTION].find_one({"_id": user_id})
-    if not user:
+async def _ensure_user_or_404(db, user_id: str) -> None:
+    if not await ensure_user_diaries(db, user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    return user
 
 
-def _find_diary_index(diaries: List[dict], diary_id: str) -> int:
-    for idx, diary in enumerate(diaries):
-        if diary.get("diary_id") == diary_id:
-            return idx
-    return -1
+async def _get_diary_or_404(db, user_id: str, diary_id: str) -> dict:
+    await _ensure_user_or_404(db, user_id)
+    diary = await db[DIARY_COLLECTION].find_one(
+        {"user_id": user_id, "diary_id": diary_id},
+        {"sudScores": 1},
+    )
+    if not diary:
+        raise HTTPException(status_code=404, detail="Diary not found")
+    return diary
 
 
-def _find_sud_index(entries: List[dict], sud_id: str) -> int:
-    for idx, entry in enumerate(entries):
-        if entry.get("sud_id") == sud_id:
-            return idx
-    return -1
+def _matched_entry(doc: dict | None, sud_id: str) -> dict | None:
+    """$elemMatch 프로젝션으로 돌려받은 sudScores에서 대상 항목만 꺼낸다."""
+    if not doc:
+        return None
+    for entry in doc.get("sudScores") or []:
+        if isinstance(entry, dict) and entry.get("sud_id") == sud_id:
+            return entry
+    return None
 
 
 def _serialize_entry(doc: dict) -> dict:
@@ -69,11 +64,7 @@ async def create_sud_score(
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    user = await _get_user_or_404(db, user_id)
-    diaries = list(user.get("diaries", []))
-    diary_idx = _find_diary_index(diaries, payload.diary_id)
-    if diary_idx == -1:
-        raise HTTPException(status_code=404, detail="Diary not found")
+    await _ensure_user_or_404(db, user_id)
 
     now = datetime.now(timezone.utc)
     sud_id = f"sud_{uuid.uuid4().hex[:8]}"
@@ -86,18 +77,19 @@ async def create_sud_score(
         "updated_at": now,
     }
 
-    entries = list(diaries[diary_idx].get("sudScores", []))
-    entries.append(entry)
-
-    diaries[diary_idx]["sudScores"] = entries
-    diaries[diary_idx]["updatedAt"] = now
-
-    await db[USERS_COLLECTION].update_one(
-        {"_id": user_id},
-        {"$set": {"diaries": diaries}},
+    # 배열 전체를 다시 쓰지 않고 $push 한 번으로 추가 → 동시 요청에서도 유실 없음
+    updated = await db[DIARY_COLLECTION].find_one_and_update(
+        {"user_id": user_id, "diary_id": payload.diary_id},
+        {"$push": {"sudScores": entry}, "$set": {"updatedAt": now}},
+        projection={"_id": 0, "sudScores": {"$elemMatch": {"sud_id": sud_id}}},
+        return_document=ReturnDocument.AFTER,
     )
+    saved = _matched_entry(updated, sud_id)
+    if saved is None:
+        raise HTTPException(status_code=404, detail="Diary not found")
+    invalidate_group_stats(user_id)
 
-    return SudScoreResponse(**_serialize_entry(entry))
+    return SudScoreResponse(**_serialize_entry(saved))
 
 
 @router.get("/{diary_id}", response_model=List[SudScoreResponse])
@@ -106,10 +98,7 @@ async def list_sud_scores(
     db=Depends(get_db),
     user_id: str = Depends(get_current_user_id),
 ):
-    user = await _get_user_or_404(db, user_id)
-    diary = next((d for d in user.get("diaries", []) if d.get("diary_id") == diary_id), None)
-    if not diary:
-        raise HTTPException(status_code=404, detail="Diary not found")
+    diary = await _get_diary_or_404(db, user_id, diary_id)
 
     entries = list(diary.get("sudScores", []))
     entries.sort(key=lambda e: _ensure_tz(e.get("created_at")), reverse=True)
@@ -128,29 +117,29 @@ async def update_sud_score(
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    user = await _get_user_or_404(db, user_id)
-    diaries = list(user.get("diaries", []))
-    diary_idx = _find_diary_index(diaries, diary_id)
-    if diary_idx == -1:
-        raise HTTPException(status_code=404, detail="Diary not found")
-
-    entries = list(diaries[diary_idx].get("sudScores", []))
-    sud_idx = _find_sud_index(entries, sud_id)
-    if sud_idx == -1:
-        raise HTTPException(status_code=404, detail="SUD record not found")
+    await _ensure_user_or_404(db, user_id)
 
     now = datetime.now(timezone.utc)
-    entries[sud_idx] = {
-        **entries[sud_idx],
-        **update_data,
-        "updated_at": now,
-    }
-    diaries[diary_idx]["sudScores"] = entries
-    diaries[diary_idx]["updatedAt"] = now
-
-    await db[USERS_COLLECTION].update_one(
-        {"_id": user_id},
-        {"$set": {"diaries": diaries}},
+    set_fields = {f"sudScores.$[s].{key}": value for key, value in update_data.items()}
+    set_fields["sudScores.$[s].updated_at"] = now
+    set_fields["updatedAt"] = now
+
+    # 대상 항목의 필드만 arrayFilters로 갱신
+    updated = await db[DIARY_COLLECTION].find_one_and_update(
+        {"user_id": user_id, "diary_id": diary_id, "sudScores.sud_id": sud_id},
+        {"$set": set_fields},
+        array_filters=[{"s.sud_id": sud_id}],
+        projection={"_id": 0, "sudScores": {"$elemMatch": {"sud_id": sud_id}}},
+        return_document=ReturnDocument.AFTER,
     )
+    saved = _matched_entry(updated, sud_id)
+    if saved is None:
+        exists = await db[DIARY_COLLECTION].count_documents(
+            {"user_id": user_id, "diary_id": diary_id}, limit=1
+        )
+        if not exists:
+            raise HTTPException(status_code=404, detail="Diary not found")
+        raise HTTPException(status_code=404, detail="SUD record not found")
+    invalidate_group_stats(user_id)
 
-    return SudScoreResponse(**_serialize_entry(entries[sud_idx]))
+    return SudScoreResponse(**_serialize_entry(saved))
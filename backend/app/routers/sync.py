@@ -0,0 +1,150 @@
+"""
+증분 동기화 API
+- GET /sync            → 전체 스냅샷 + next_token
+- GET /sync?since=토큰 → 토큰 이후 생성/수정된 항목과 삭제된 ID만 반환
+
+토큰은 서버 시각 기반이며, 요청 처리 중 커밋된 쓰기를 놓치지 않도록 조회 시작 시각보다
+SYNC_SAFETY_WINDOW만큼 앞선 값을 돌려준다. 그 구간의 항목은 다음 호출에서 한 번 더 올 수 있으므로
+클라이언트는 ID 기준 upsert로 반영한다.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from core.config import get_settings
+from core.security import get_current_user
+from db.diaries import DIARY_COLLECTION, ensure_user_diaries
+from db.mongo import get_db
+from db.sync import SYNC_ENTITIES, load_tombstones
+from models.user import USER_COLLECTION
+from routers.diaries import DIARY_LIST_SORT, _serialize_diary
+from routers.notifications import COLLECTION as NOTIFICATION_COLLECTION, _serialize_notification
+from routers.relaxation_tasks import COLLECTION as RELAXATION_COLLECTION, _serialize_task
+from routers.user_data import PracticeSessionResponse, serialize_worry_group
+from schemas.diary import DiaryResponse
+from schemas.relaxation import RelaxationTaskResponse
+from schemas.sync import SyncResponse
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+settings = get_settings()
+
+SYNC_SAFETY_WINDOW = timedelta(seconds=5)
+
+
+def _encode_token(value: datetime) -> str:
+    return str(int(value.timestamp() * 1000))
+
+
+def _decode_token(token: str) -> datetime:
+    try:
+        return datetime.fromtimestamp(int(token) / 1000, tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def _changed_since(field: str, since: datetime) -> Dict[str, Any]:
+    """배열 요소 중 field(없으면 created_at)가 since 이후인 것만 남기는 $filter"""
+    return {
+        "$filter": {
+            "input": {"$ifNull": [f"${field}", []]},
+            "as": "item",
+            "cond": {"$gte": [{"$ifNull": ["$$item.updated_at", "$$item.created_at"]}, since]},
+        }
+    }
+
+
+async def _load_diaries(db, user_id: str, since: Optional[datetime]) -> List[dict]:
+    query: Dict[str, Any] = {"user_id": user_id}
+    if since is not None:
+        query["updatedAt"] = {"$gte": since}
+    cursor = db[DIARY_COLLECTION].find(query).sort(DIARY_LIST_SORT)
+    return [
+        DiaryResponse(**_serialize_diary(doc)).model_dump(mode="json", by_alias=True)
+        async for doc in cursor
+    ]
+
+
+async def _load_embedded(db, user_id: str, since: Optional[datetime]) -> Dict[str, List[dict]]:
+    """users 문서에 들어 있는 걱정 그룹/연습 세션은 한 번의 조회로 변경분만 가져온다"""
+    if since is None:
+        user = await db[USER_COLLECTION].find_one(
+            {"_id": user_id}, {"_id": 0, "worry_groups": 1, "practice_sessions": 1}
+        )
+    else:
+        docs = await db[USER_COLLECTION].aggregate([
+            {"$match": {"_id": user_id}},
+            {"$project": {
+                "_id": 0,
+                "worry_groups": _changed_since("worry_groups", since),
+                "practice_sessions": _changed_since("practice_sessions", since),
+            }},
+        ]).to_list(length=1)
+        user = docs[0] if docs else None
+    user = user or {}
+    return {
+        "worry_groups": [serialize_worry_group(g) for g in user.get("worry_groups") or []],
+        "practice_sessions": [
+            PracticeSessionResponse(**s).model_dump(mode="json")
+            for s in user.get("practice_sessions") or []
+        ],
+    }
+
+
+async def _load_collection(db, collection: str, user_id: str, since: Optional[datetime]) -> List[dict]:
+    query: Dict[str, Any] = {"user_id": user_id}
+    if since is not None:
+        query["updated_at"] = {"$gte": since}
+    return await db[collection].find(query).sort("updated_at", 1).to_list(length=None)
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    since 토큰 이후 변경분을 반환합니다.
+    - 토큰이 없거나 삭제 기록 보관 기간보다 오래되면 full=true로 전체 스냅샷을 돌려줍니다.
+    - 응답의 next_token을 다음 호출의 since로 사용합니다.
+    """
+    user_id = current_user["_id"]
+    started = datetime.now(timezone.utc)
+
+    since_at = _decode_token(since) if since else None
+    if since_at is not None and since_at < started - timedelta(days=settings.sync_tombstone_ttl_days):
+        since_at = None
+
+    if not await ensure_user_diaries(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    diaries, embedded, notifications, relaxations = await asyncio.gather(
+        _load_diaries(db, user_id, since_at),
+        _load_embedded(db, user_id, since_at),
+        _load_collection(db, NOTIFICATION_COLLECTION, user_id, since_at),
+        _load_collection(db, RELAXATION_COLLECTION, user_id, since_at),
+    )
+    deleted = (
+        await load_tombstones(db, user_id, since_at)
+        if since_at is not None
+        else {name: [] for name in SYNC_ENTITIES}
+    )
+
+    return SyncResponse(
+        next_token=_encode_token(started - SYNC_SAFETY_WINDOW),
+        full=since_at is None,
+        changes={
+            "diaries": diaries,
+            "worry_groups": embedded["worry_groups"],
+            "practice_sessions": embedded["practice_sessions"],
+            "notifications": [_serialize_notification(doc) for doc in notifications],
+            "relaxation_tasks": [
+                RelaxationTaskResponse(**_serialize_task(doc)).model_dump(mode="json")
+                for doc in relaxations
+            ],
+        },
+        deleted=deleted,
+    )
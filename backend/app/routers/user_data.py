@@ -9,15 +9,141 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
 import uuid
 
 from db.mongo import get_db
+from db.diaries import DIARY_COLLECTION, diary_group_stats, ensure_user_diaries
+from db.sync import record_tombstone
+from db.users import elem_match, fields, load_user
 from core.security import get_current_user
 from models.user import USER_COLLECTION
 
 router = APIRouter(prefix="/users/me", tags=["user-data"])
 
 
+# ============= Projections =============
+# 각 엔드포인트가 users 문서에서 실제로 읽는 필드만 선언
+
+VALUE_GOAL_PROJECTION = fields("value_goal")
+SURVEYS_PROJECTION = fields("surveys")
+CUSTOM_TAGS_PROJECTION = fields("custom_tags")
+WORRY_GROUPS_PROJECTION = fields("worry_groups")
+PROGRESS_PROJECTION = fields("value_goal", "survey_completed", "week_progress")
+WEEK_PROGRESS_PROJECTION = fields("week_progress")
+ABC_MODELS_PROJECTION = fields("abc_models")
+PRACTICE_SESSIONS_PROJECTION = fields("practice_sessions")
+
+
+def _group_id_candidates(group_id: str) -> List[Any]:
+    """group_id가 문자열/숫자로 섞여 저장된 과거 데이터 대응"""
+    candidates: List[Any] = [group_id]
+    if group_id.isdigit():
+        candidates.append(int(group_id))
+    return candidates
+
+
+def worry_group_projection(group_id: str) -> Dict[str, Any]:
+    return elem_match("worry_groups", {"group_id": {"$in": _group_id_candidates(group_id)}})
+
+
+# 새 걱정 그룹 번호는 users 문서의 카운터를 $inc 해서 받는다 (그룹 배열을 읽지 않음)
+WORRY_GROUP_SEQ_FIELD = "worry_group_seq"
+# 카운터가 없던 예전 사용자는 첫 충돌 때 기존 최대 번호로 한 번 맞추므로 보통 2번 안에 끝난다
+GROUP_ID_MAX_ATTEMPTS = 5
+
+
+async def _next_group_id(db, user_id: str) -> str:
+    user = await db[USER_COLLECTION].find_one_and_update(
+        {"_id": user_id},
+        {"$inc": {WORRY_GROUP_SEQ_FIELD: 1}},
+        projection=fields(WORRY_GROUP_SEQ_FIELD),
+        return_document=ReturnDocument.AFTER,
+    )
+    if user is None:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    return str(user[WORRY_GROUP_SEQ_FIELD])
+
+
+async def _seed_group_seq(db, user_id: str) -> None:
+    """카운터를 기존 그룹 번호의 최댓값 이상으로 올린다 (최댓값은 서버에서 계산, $max라 되돌아가지 않음)"""
+    rows = await db[USER_COLLECTION].aggregate([
+        {"$match": {"_id": user_id}},
+        {"$project": {"max_id": {"$max": {"$map": {
+            "input": {"$ifNull": ["$worry_groups", []]},
+            "as": "g",
+            "in": {"$convert": {"input": "$$g.group_id", "to": "int", "onError": 0, "onNull": 0}},
+        }}}}},
+    ]).to_list(length=1)
+    max_id = (rows[0].get("max_id") if rows else None) or 0
+    await db[USER_COLLECTION].update_one({"_id": user_id}, {"$max": {WORRY_GROUP_SEQ_FIELD: max_id}})
+
+
+async def _push_worry_group(db, user_id: str, group: dict) -> bool:
+    """같은 group_id가 없을 때만 추가한다. 이미 있으면 False"""
+    result = await db[USER_COLLECTION].update_one(
+        {"_id": user_id, "worry_groups.group_id": {"$nin": _group_id_candidates(str(group["group_id"]))}},
+        {"$push": {"worry_groups": group}},
+    )
+    return result.matched_count == 1
+
+
+async def _update_worry_group(db, user_id: str, group_id: str, changes: Dict[str, Any]) -> dict:
+    """
+    group_id 항목의 필드만 arrayFilters로 바꾸고, 바뀐 그룹 하나만 $elemMatch projection으로 돌려받는다.
+    (배열 전체를 읽어서 다시 $set 하지 않으므로 다른 그룹에 대한 동시 수정을 덮어쓰지 않는다)
+    """
+    candidates = _group_id_candidates(group_id)
+    user = await db[USER_COLLECTION].find_one_and_update(
+        {"_id": user_id, "worry_groups.group_id": {"$in": candidates}},
+        {"$set": {f"worry_groups.$[g].{name}": value for name, value in changes.items()}},
+        projection=worry_group_projection(group_id),
+        array_filters=[{"g.group_id": {"$in": candidates}}],
+        return_document=ReturnDocument.AFTER,
+    )
+    if user is None or not user.get("worry_groups"):
+        raise HTTPException(status_code=404, detail="그룹을 찾을 수 없습니다")
+    return user["worry_groups"][0]
+
+
+async def _load_user_or_404(db, user_id: str, projection) -> dict:
+    user = await load_user(db, user_id, projection)
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    return user
+
+
+def _iso(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _worry_group_detail(group: dict) -> dict:
+    """걱정 그룹 단건 조회/수정 응답 형태"""
+    return {
+        "group_id": group.get("group_id"),
+        "group_title": group.get("group_name") or group.get("group_title"),
+        "group_contents": group.get("description") or group.get("group_contents"),
+        "character_id": group.get("character_id"),
+        "created_at": _iso(group.get("created_at")),
+        "archived": group.get("archived", False),
+    }
+
+
+def serialize_worry_group(group: dict) -> dict:
+    """걱정 그룹 목록/동기화 응답 형태"""
+    return {
+        "group_id": group.get("group_id"),
+        "group_title": group.get("group_name") or group.get("group_title"),
+        "group_contents": group.get("description") or group.get("group_contents"),
+        "character_id": group.get("character_id"),
+        "created_at": _iso(group.get("created_at")),
+        "archived": group.get("archived", False),
+        "archived_at": _iso(group.get("archived_at")),
+    }
+
+
 # ============= Schemas =============
 
 class ValueGoalUpdate(BaseModel):
@@ -190,10 +316,7 @@ async def get_value_goal(
     - **value_goal**: 사용자가 설정한 핵심 가치 문구
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, VALUE_GOAL_PROJECTION)
     
     value_goal = user.get("value_goal")
 
@@ -272,10 +395,7 @@ async def get_surveys(
     - 최신순으로 정렬되어 반환
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, SURVEYS_PROJECTION)
     
     surveys = user.get("surveys", [])
     # 최신순 정렬 (completed_at 기준, 과거 데이터 호환)
@@ -317,9 +437,7 @@ async def add_survey(
     }
     
     # 중복 체크: 동일한 type이 이미 있으면 업데이트
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, SURVEYS_PROJECTION)
     
     existing_surveys = user.get("surveys", [])
     survey_exists = False
@@ -355,10 +473,7 @@ async def get_custom_tags(
     db = Depends(get_db)
 ):
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, CUSTOM_TAGS_PROJECTION)
 
     tags = []
     for raw in user.get("custom_tags", []):
@@ -410,9 +525,7 @@ async def create_custom_tag(
         "created_at": now,
     }
 
-    user = await db[USER_COLLECTION].find_one({"_id": user_id}, {"custom_tags": 1})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, CUSTOM_TAGS_PROJECTION)
 
     tags = list(user.get("custom_tags", []))
     tags.append(tag_doc)
@@ -425,9 +538,13 @@ async def create_custom_tag(
     return CustomTagResponse(**tag_doc)
 
 
+EMPTY_GROUP_STATS = {"diary_count": 0, "last_diary_at": None, "avg_before_sud": None, "avg_after_sud": None}
+
+
 @router.get("/worry-groups", summary="걱정 그룹 목록 조회")
 async def get_worry_groups(
     include_archived: bool = False,
+    with_stats: bool = False,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
@@ -435,30 +552,22 @@ async def get_worry_groups(
     사용자의 걱정 그룹 목록을 반환합니다.
     
     - **include_archived**: True면 아카이브된 그룹도 포함
+    - **with_stats**: True면 그룹마다 일기 수(diary_count), 마지막 일기 작성 시각(last_diary_at),
+      평균 SUD(avg_before_sud, avg_after_sud)를 붙인다 (diaries 컬렉션 집계 한 번, 캐시됨)
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, WORRY_GROUPS_PROJECTION)
 
-    def _iso(value):
-        if isinstance(value, datetime):
-            return value.isoformat()
-        return value
-
-    groups = []
-    for group in user.get("worry_groups", []):
-        if not include_archived and group.get("archived"):
-            continue
-        groups.append({
-            "group_id": group.get("group_id"),
-            "group_title": group.get("group_name") or group.get("group_title"),
-            "group_contents": group.get("description") or group.get("group_contents"),
-            "character_id": group.get("character_id"),
-            "created_at": _iso(group.get("created_at")),
-            "archived": group.get("archived", False),
-            "archived_at": _iso(group.get("archived_at")),
-        })
+    groups = [
+        serialize_worry_group(group)
+        for group in user.get("worry_groups", [])
+        if include_archived or not group.get("archived")
+    ]
+    if with_stats:
+        await ensure_user_diaries(db, user_id)
+        stats = await diary_group_stats(db, user_id)
+        for group in groups:
+            group.update(stats.get(str(group["group_id"]), EMPTY_GROUP_STATS))
 
     groups.sort(
         key=lambda g: g.get("created_at") or "",
@@ -477,22 +586,13 @@ async def get_worry_group(
     특정 걱정 그룹의 상세 정보를 반환합니다.
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, worry_group_projection(group_id))
 
-    for group in user.get("worry_groups", []):
-        if str(group.get("group_id")) == str(group_id):
-            return {
-                "group_id": group.get("group_id"),
-                "group_title": group.get("group_name") or group.get("group_title"),
-                "group_contents": group.get("description") or group.get("group_contents"),
-                "character_id": group.get("character_id"),
-                "created_at": group.get("created_at").isoformat() if isinstance(group.get("created_at"), datetime) else group.get("created_at"),
-                "archived": group.get("archived", False),
-            }
-    
-    raise HTTPException(status_code=404, detail="그룹을 찾을 수 없습니다")
+    # $elemMatch projection이라 맞는 그룹 하나만 온다
+    groups = user.get("worry_groups") or []
+    if not groups:
+        raise HTTPException(status_code=404, detail="그룹을 찾을 수 없습니다")
+    return _worry_group_detail(groups[0])
 
 
 @router.post("/worry-groups", status_code=status.HTTP_201_CREATED, summary="걱정 그룹 생성")
@@ -503,26 +603,37 @@ async def create_worry_group(
 ):
     """
     새로운 걱정 그룹을 생성합니다.
+
+    - group_id를 보내면 그 번호로 만들고, 이미 있으면 409
+    - group_id가 없으면 서버가 사용자별 카운터로 새 번호를 정한다
     """
     user_id = current_user["_id"]
-    
+    now = datetime.now(timezone.utc)
+
     new_group = {
         "group_id": group_data.get("group_id"),
         "group_title": group_data.get("group_title", ""),
         "group_contents": group_data.get("group_contents", ""),
         "character_id": group_data.get("character_id"),
-        "created_at": datetime.now(timezone.utc),
+        "created_at": now,
+        "updated_at": now,
         "archived": False,
     }
-    
-    result = await db[USER_COLLECTION].update_one(
-        {"_id": user_id},
-        {"$push": {"worry_groups": new_group}}
-    )
-    
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
-    
+
+    if new_group["group_id"] is not None:
+        if not await _push_worry_group(db, user_id, new_group):
+            await _load_user_or_404(db, user_id, None)
+            raise HTTPException(status_code=409, detail="이미 있는 그룹 번호입니다")
+    else:
+        for attempt in range(GROUP_ID_MAX_ATTEMPTS):
+            new_group["group_id"] = await _next_group_id(db, user_id)
+            if await _push_worry_group(db, user_id, new_group):
+                break
+            if attempt == 0:
+                await _seed_group_seq(db, user_id)
+        else:
+            raise HTTPException(status_code=409, detail="그룹 번호를 정하지 못했습니다. 다시 시도해 주세요")
+
     return {
         "group_id": new_group["group_id"],
         "group_title": new_group["group_title"],
@@ -544,42 +655,16 @@ async def update_worry_group(
     걱정 그룹 정보를 수정합니다.
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
-    
-    worry_groups = list(user.get("worry_groups", []))
-    group_found = False
-    
-    for i, group in enumerate(worry_groups):
-        if str(group.get("group_id")) == str(group_id):
-            if "group_title" in updates:
-                worry_groups[i]["group_title"] = updates["group_title"]
-            if "group_contents" in updates:
-                worry_groups[i]["group_contents"] = updates["group_contents"]
-            if "character_id" in updates:
-                worry_groups[i]["character_id"] = updates["character_id"]
-            
-            worry_groups[i]["updated_at"] = datetime.now(timezone.utc)
-            group_found = True
-            
-            result = await db[USER_COLLECTION].update_one(
-                {"_id": user_id},
-                {"$set": {"worry_groups": worry_groups}}
-            )
-            
-            return {
-                "group_id": worry_groups[i].get("group_id"),
-                "group_title": worry_groups[i].get("group_title"),
-                "group_contents": worry_groups[i].get("group_contents"),
-                "character_id": worry_groups[i].get("character_id"),
-                "created_at": worry_groups[i].get("created_at").isoformat() if isinstance(worry_groups[i].get("created_at"), datetime) else worry_groups[i].get("created_at"),
-                "archived": worry_groups[i].get("archived", False),
-            }
-    
-    if not group_found:
-        raise HTTPException(status_code=404, detail="그룹을 찾을 수 없습니다")
+
+    changes: Dict[str, Any] = {
+        name: updates[name]
+        for name in ("group_title", "group_contents", "character_id")
+        if name in updates
+    }
+    changes["updated_at"] = datetime.now(timezone.utc)
+
+    group = await _update_worry_group(db, user_id, group_id, changes)
+    return _worry_group_detail(group)
 
 
 @router.post("/worry-groups/{group_id}/archive", summary="걱정 그룹 아카이브")
@@ -592,31 +677,17 @@ async def archive_worry_group(
     걱정 그룹을 아카이브합니다 (소프트 삭제).
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
-    
-    worry_groups = list(user.get("worry_groups", []))
-    
-    for i, group in enumerate(worry_groups):
-        if str(group.get("group_id")) == str(group_id):
-            worry_groups[i]["archived"] = True
-            worry_groups[i]["archived_at"] = datetime.now(timezone.utc)
-            
-            await db[USER_COLLECTION].update_one(
-                {"_id": user_id},
-                {"$set": {"worry_groups": worry_groups}}
-            )
-            
-            return {
-                "group_id": worry_groups[i].get("group_id"),
-                "group_title": worry_groups[i].get("group_title"),
-                "archived": True,
-                "archived_at": worry_groups[i]["archived_at"].isoformat(),
-            }
-    
-    raise HTTPException(status_code=404, detail="그룹을 찾을 수 없습니다")
+    now = datetime.now(timezone.utc)
+
+    group = await _update_worry_group(
+        db, user_id, group_id, {"archived": True, "archived_at": now, "updated_at": now}
+    )
+    return {
+        "group_id": group.get("group_id"),
+        "group_title": group.get("group_name") or group.get("group_title"),
+        "archived": True,
+        "archived_at": now.isoformat(),
+    }
 
 
 @router.delete("/worry-groups/{group_id}", status_code=status.HTTP_204_NO_CONTENT, summary="걱정 그룹 삭제")
@@ -632,11 +703,13 @@ async def delete_worry_group(
     
     result = await db[USER_COLLECTION].update_one(
         {"_id": user_id},
-        {"$pull": {"worry_groups": {"group_id": group_id}}}
+        {"$pull": {"worry_groups": {"group_id": {"$in": _group_id_candidates(group_id)}}}}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    if result.modified_count:
+        await record_tombstone(db, user_id, "worry_groups", group_id)
 
 
 @router.get("/worry-groups/archived", summary="아카이브된 걱정 그룹 조회")
@@ -648,14 +721,7 @@ async def get_archived_worry_groups(
     사용자가 아카이브한 걱정(ABC) 그룹 목록을 반환합니다.
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
-
-    def _iso(value):
-        if isinstance(value, datetime):
-            return value.isoformat()
-        return value
+    user = await _load_user_or_404(db, user_id, WORRY_GROUPS_PROJECTION)
 
     groups = []
     for group in user.get("worry_groups", []):
@@ -694,10 +760,7 @@ async def get_user_progress(
     - **total_relaxations**: 완료한 이완 훈련 수
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, PROGRESS_PROJECTION)
     
     # 주차별 진행도 계산
     week_progress_data = user.get("week_progress", [])
@@ -718,7 +781,8 @@ async def get_user_progress(
         current_week = 8  # 모두 완료시
     
     # 다이어리 및 이완 훈련 카운트
-    total_diaries = len(user.get("diaries", []))
+    await ensure_user_diaries(db, user_id)
+    total_diaries = await db[DIARY_COLLECTION].count_documents({"user_id": user_id})
     relaxation_collection = db["relaxation_tasks"]
     total_relaxations = await relaxation_collection.count_documents(
         {
@@ -754,10 +818,7 @@ async def update_week_progress(
     - **progress_percent**: 진행률 (0-100)
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, WEEK_PROGRESS_PROJECTION)
     
     week_progress_data = user.get("week_progress", [])
     
@@ -820,10 +881,7 @@ async def get_abc_models(
     - **created_at**: 생성 시각
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, ABC_MODELS_PROJECTION)
     
     abc_models = user.get("abc_models", [])
     
@@ -901,9 +959,7 @@ async def create_practice_session(
     if session.completed_at:
         session_doc["completed_at"] = session.completed_at
     
-    user = await db[USER_COLLECTION].find_one({"_id": user_id}, {"practice_sessions": 1})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, PRACTICE_SESSIONS_PROJECTION)
     
     sessions = list(user.get("practice_sessions", []))
     sessions.append(session_doc)
@@ -933,10 +989,7 @@ async def get_practice_sessions(
     - 최신순으로 정렬되어 반환
     """
     user_id = current_user["_id"]
-    user = await db[USER_COLLECTION].find_one({"_id": user_id})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, PRACTICE_SESSIONS_PROJECTION)
     
     sessions = user.get("practice_sessions", [])
     
@@ -965,9 +1018,7 @@ async def get_practice_sessions(
 
 async def _ensure_week7_session(db, user_id: str):
     """7주차 연습 세션이 없으면 생성한 뒤 (메모리 상으로) 반환합니다."""
-    user = await db[USER_COLLECTION].find_one({"_id": user_id}, {"practice_sessions": 1})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, PRACTICE_SESSIONS_PROJECTION)
 
     sessions = list(user.get("practice_sessions", []))
     for idx, session in enumerate(sessions):
@@ -1092,9 +1143,7 @@ async def update_week7_completion(
 
 async def _ensure_week8_session(db, user_id: str):
     """8주차 연습 세션이 없으면 생성한 뒤 (메모리 상으로) 반환합니다."""
-    user = await db[USER_COLLECTION].find_one({"_id": user_id}, {"practice_sessions": 1})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user = await _load_user_or_404(db, user_id, PRACTICE_SESSIONS_PROJECTION)
 
     sessions = list(user.get("practice_sessions", []))
     for idx, session in enumerate(sessions):
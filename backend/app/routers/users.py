@@ -1,23 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException
+from pymongo import ReturnDocument
 from db.mongo import get_db
+from db.users import fields, load_user
 from schemas.user import UserMe, UpdateUser
-from core.security import decode_token
+from core.security import get_current_user_id
 from datetime import datetime, timezone
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-async def get_current_user_id(authorization: str | None = Header(default=None)) -> str:
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid access token")
-    return payload.get("sub")
+# /users/me 응답에 필요한 필드만 조회
+ME_PROJECTION = fields("email", "name", "gender", "survey_completed", "email_verified", "created_at")
 
 @router.get("/me", response_model=UserMe)
 async def me(db=Depends(get_db), user_id: str = Depends(get_current_user_id)):
-    user = await db["users"].find_one({"_id": user_id})
+    user = await load_user(db, user_id, ME_PROJECTION)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {
@@ -35,8 +31,14 @@ async def update_me(payload: UpdateUser, db=Depends(get_db), user_id: str = Depe
     update_fields = {k: v for k, v in payload.dict().items() if v is not None}
     if update_fields:
         update_fields["updated_at"] = datetime.now(timezone.utc)
-        await db["users"].update_one({"_id": user_id}, {"$set": update_fields})
-    user = await db["users"].find_one({"_id": user_id})
+        user = await db["users"].find_one_and_update(
+            {"_id": user_id},
+            {"$set": update_fields},
+            projection=ME_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+    else:
+        user = await load_user(db, user_id, ME_PROJECTION)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {
@@ -52,6 +52,8 @@ class RelaxationTaskResponse(BaseModel):
     start_time: datetime
     end_time: Optional[datetime] = None
     logs: List[RelaxationLogEntry]
+    # 서버에 저장된 로그 개수 (autosave의 since_seq)
+    logs_count: Optional[int] = None
 
     # ✅ 같은 필드들 응답에도 포함
     latitude: Optional[float] = None
@@ -66,6 +68,48 @@ class RelaxationTaskResponse(BaseModel):
     )
 
 
+class RelaxationTaskSummary(BaseModel):
+    """
+    목록(fields=summary)용: logs 대신 logs_count만 담는다 (로그는 GET /relaxation_tasks/{relax_id}로)
+    """
+    relax_id: str
+    task_id: str
+    week_number: Optional[int] = None
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    logs_count: int = 0
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    address_name: Optional[str] = None
+    duration_time: Optional[int] = None
+    relaxation_score: Optional[float] = None
+
+
+class RelaxationLogAppend(BaseModel):
+    """
+    autosave: 마지막으로 저장된 뒤 새로 생긴 로그만 보낸다
+    """
+    since_seq: int = Field(
+        ...,
+        ge=0,
+        description="클라이언트가 알고 있는 서버의 로그 개수 (logs_count). 이 위치부터 이어 붙인다",
+    )
+    logs: List[RelaxationLogEntry] = Field(default_factory=list, max_length=500)
+    # 주지 않으면(null) 기존 값 유지
+    end_time: Optional[datetime] = None
+    duration_time: Optional[int] = Field(default=None, ge=0)
+
+
+class RelaxationAutosaveResponse(BaseModel):
+    """
+    autosave 응답: 로그 전체 대신 다음 호출에 쓸 logs_count만 돌려준다
+    """
+    relax_id: str
+    logs_count: int
+    end_time: Optional[datetime] = None
+    duration_time: Optional[int] = None
+
+
 class RelaxationScoreUpdate(BaseModel):
     """
     이완 점수만 업데이트할 때 사용하는 모델
@@ -74,3 +118,42 @@ class RelaxationScoreUpdate(BaseModel):
         None,
         description="이완 점수 (0~5)",
     )
+
+
+class RelaxationWeekStats(BaseModel):
+    week_number: Optional[int] = None
+    count: int
+    completed: int
+    total_duration: int
+    avg_duration: Optional[float] = None
+    avg_score: Optional[float] = None
+
+
+class RelaxationDayStats(BaseModel):
+    """date는 한국시간(KST) 기준 YYYY-MM-DD"""
+    date: str
+    count: int
+    completed: int
+    total_duration: int
+
+
+class RelaxationScoreBucket(BaseModel):
+    """score 이상 score+1 미만 (5점은 5)"""
+    score: int
+    count: int
+
+
+class RelaxationStatsResponse(BaseModel):
+    """
+    GET /relaxation_tasks/stats 응답 (완료 = end_time이 있는 세션)
+    """
+    total_sessions: int = 0
+    completed_sessions: int = 0
+    completion_rate: float = 0.0
+    total_duration: int = 0
+    avg_duration: Optional[float] = None
+    scored_sessions: int = 0
+    avg_score: Optional[float] = None
+    by_week: List[RelaxationWeekStats] = Field(default_factory=list)
+    by_day: List[RelaxationDayStats] = Field(default_factory=list)
+    score_distribution: List[RelaxationScoreBucket] = Field(default_factory=list)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from pydantic import BaseModel, Field
 
 
@@ -7,6 +7,8 @@ class ScreenTimeCreate(BaseModel):
     start_time: datetime = Field(..., description="Session start in UTC")
     end_time: datetime = Field(..., description="Session end in UTC")
     platform: Optional[Literal["android", "ios", "web", "desktop"]] = None
+    # 재전송 중복 제거 키. 없으면 (start_time, end_time)으로 판단
+    client_session_id: Optional[str] = Field(None, min_length=1, max_length=128)
 
 
 class ScreenTimeEntry(BaseModel):
@@ -16,6 +18,7 @@ class ScreenTimeEntry(BaseModel):
     duration_minutes: float
     created_at: datetime
     platform: Optional[str] = None
+    client_session_id: Optional[str] = None
 
 
 class ScreenTimeSummary(BaseModel):
@@ -24,3 +27,18 @@ class ScreenTimeSummary(BaseModel):
     weekMinutes: float = 0
     sessions: int = 0
     lastEntryAt: Optional[datetime] = None
+
+
+class ScreenTimeBatchItemResult(BaseModel):
+    index: int
+    status: Literal["created", "duplicate", "invalid", "error"]
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ScreenTimeBatchResult(BaseModel):
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: int = 0  # 검증은 통과했지만 저장 중 중복 키가 아닌 오류가 난 항목
+    results: List[ScreenTimeBatchItemResult] = Field(default_factory=list)
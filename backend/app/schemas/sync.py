@@ -0,0 +1,11 @@
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+
+
+class SyncResponse(BaseModel):
+    next_token: str = Field(..., description="다음 /sync 호출 때 since로 보낼 토큰")
+    full: bool = Field(False, description="True면 전체 스냅샷: 로컬 데이터를 통째로 교체")
+    # 엔티티별 생성/수정된 항목 (각 목록 API와 같은 응답 형태)
+    changes: Dict[str, List[Any]] = Field(default_factory=dict)
+    # 엔티티별 삭제된 ID. 클라이언트는 deleted를 먼저 적용한 뒤 changes를 반영한다.
+    deleted: Dict[str, List[str]] = Field(default_factory=dict)
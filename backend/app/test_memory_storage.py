@@ -0,0 +1,336 @@
+"""
+인메모리 스토리지 엔진 테스트 (STORAGE_BACKEND=memory)
+MongoDB 없이 실행 가능: backend/app 디렉토리에서 `python test_memory_storage.py`
+
+1. 라우터가 쓰는 쿼리/업데이트 연산자가 Motor와 같은 결과를 내는지 확인
+2. 앱을 in-process(ASGI)로 띄워 가입 → 일기/SUD → 스크린타임 → 동기화 흐름을 돌려본다
+"""
+import asyncio
+import os
+
+os.environ["STORAGE_BACKEND"] = "memory"
+
+from datetime import datetime, timezone
+
+import httpx
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from core.password_hasher import pwd_context
+from db.memory import MemoryClient
+
+
+async def check_engine():
+    print("\n1️⃣ 엔진 연산자 확인...")
+    col = MemoryClient()["test"]["docs"]
+    await col.create_index([("user_id", 1), ("key", 1)], unique=True, partialFilterExpression={"key": {"$exists": True}})
+
+    await col.insert_one({"user_id": "u", "key": "a", "items": [{"id": 1, "v": 0}, {"id": 2, "v": 0}], "n": 1})
+    await col.insert_one({"user_id": "u", "n": 2, "at": datetime(2025, 1, 1, 9, 0, 0, 123456, tzinfo=timezone.utc)})
+    await col.insert_one({"user_id": "u", "n": 3})  # key 없음: partial unique 대상 아님
+    try:
+        await col.insert_one({"user_id": "u", "key": "a"})
+        raise AssertionError("unique 인덱스 위반이 통과됨")
+    except DuplicateKeyError as e:
+        assert e.details["keyValue"] == {"user_id": "u", "key": "a"}
+
+    try:
+        await col.insert_many([{"user_id": "u", "key": "a"}, {"user_id": "u", "key": "b"}], ordered=False)
+        raise AssertionError("BulkWriteError가 나지 않음")
+    except BulkWriteError as e:
+        assert [w["index"] for w in e.details["writeErrors"]] == [0]
+        assert e.details["nInserted"] == 1
+
+    doc = await col.find_one({"n": 2})
+    assert doc["at"] == datetime(2025, 1, 1, 9, 0, 0, 123000), doc["at"]  # UTC naive + 밀리초
+
+    assert await col.count_documents({"n": {"$gte": 2}, "key": {"$exists": False}}) == 2
+    assert await col.count_documents({"key": None}) == 2
+    assert await col.count_documents({"items.id": 2}) == 1
+    assert await col.count_documents({"$or": [{"n": 1}, {"n": 3}]}) == 2
+
+    await col.update_one(
+        {"key": "a"},
+        {"$set": {"items.$[it].v": 9}, "$inc": {"n": 10}},
+        array_filters=[{"it.id": 2}],
+    )
+    await col.update_one({"key": "a", "items.id": 1}, {"$set": {"items.$.v": 5}})
+    doc = await col.find_one({"key": "a"}, {"_id": 0, "items": 1, "n": 1})
+    assert doc == {"items": [{"id": 1, "v": 5}, {"id": 2, "v": 9}], "n": 11}, doc
+
+    await col.update_one({"key": "a"}, {"$push": {"items": {"$each": [{"id": 3, "v": 1}], "$slice": -2}}})
+    await col.update_one({"key": "a"}, {"$pull": {"items": {"id": 2}}})
+    doc = await col.find_one({"key": "a"}, {"items": {"$elemMatch": {"id": 3}}})
+    assert doc["items"] == [{"id": 3, "v": 1}], doc
+
+    result = await col.update_one({"user_id": "v", "key": "z"}, {"$inc": {"n": 1}, "$setOnInsert": {"new": True}}, upsert=True)
+    assert result.upserted_id is not None
+    doc = await col.find_one({"_id": result.upserted_id}, {"_id": 0})
+    assert doc == {"user_id": "v", "key": "z", "n": 1, "new": True}, doc
+
+    result = await col.bulk_write([
+        UpdateOne({"user_id": "w", "key": "d1"}, {"$inc": {"n": 1}}, upsert=True),
+        UpdateOne({"user_id": "w", "key": "d1"}, {"$inc": {"n": 1}}, upsert=True),
+    ])
+    assert result.upserted_count == 1 and result.modified_count == 1
+
+    names = [d["n"] for d in await col.find({"user_id": "u"}).sort([("n", -1)]).limit(2).to_list(None)]
+    assert names == [11, 3], names
+
+    rows = await col.aggregate([
+        {"$match": {"user_id": {"$in": ["u", "w"]}}},
+        {"$group": {"_id": "$user_id", "total": {"$sum": "$n"}, "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ]).to_list(None)
+    assert rows == [{"_id": "u", "total": 16, "count": 4}, {"_id": "w", "total": 2, "count": 1}], rows
+
+    plan = await col.find({"user_id": "u"}).explain()
+    assert plan["queryPlanner"]["winningPlan"]["inputStage"]["stage"] == "IXSCAN"
+    plan = await col.find({"n": 1}).explain()
+    assert plan["queryPlanner"]["winningPlan"]["stage"] == "COLLSCAN"
+    print("   ✅ 쿼리/업데이트/집계/unique 인덱스 동작 일치")
+
+
+async def check_app():
+    print("\n2️⃣ 앱 흐름 확인 (in-process)...")
+    from main import app, create_indexes
+
+    await create_indexes()
+    async with httpx.AsyncClient(app=app, base_url="http://memory", timeout=None) as client:
+        body = {"email": "memory@example.com", "password": "Passw0rd!", "name": "메모리"}
+        r = await client.post("/auth/signup", json=body)
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        r = await client.post("/auth/signup", json=body)
+        assert r.status_code == 400, r.text
+
+        r = await client.post("/diaries", headers=headers, json={"group_Id": 1, "activating_events": "메모리"})
+        r.raise_for_status()
+        diary_id = r.json()["diaryId"]
+
+        responses = await asyncio.gather(*[
+            client.post("/sud-scores", headers=headers, json={"diaryId": diary_id, "before_sud": i % 11})
+            for i in range(20)
+        ])
+        assert all(r.status_code == 201 for r in responses)
+        r = await client.get(f"/sud-scores/{diary_id}", headers=headers)
+        assert len(r.json()) == 20, r.text
+
+        session = {"start_time": "2025-05-01T14:00:00Z", "end_time": "2025-05-01T16:00:00Z", "duration_minutes": 120}
+        r = await client.post("/users/me/screen-time/batch", headers=headers, json=[session, session])
+        assert (r.json()["created"], r.json()["duplicates"]) == (1, 1), r.text
+        r = await client.get("/users/me/screen-time/summary", headers=headers)
+        assert r.json()["totalMinutes"] == 120, r.text
+
+        r = await client.get("/sync", headers=headers)
+        assert len(r.json()["changes"]["diaries"]) == 1, r.text
+    print("   ✅ 가입/일기/SUD/스크린타임/동기화 정상")
+
+
+async def check_screen_time_first_access():
+    print("\n3️⃣ 스크린타임 집계 첫 접근 동시 요청 확인...")
+    from jose import jwt
+    from db.mongo import get_db
+    from db.screen_time import DAILY_COLLECTION, SCREEN_TIME_COLLECTION, TOTALS_COLLECTION
+    from main import app
+
+    db = get_db()
+    async with httpx.AsyncClient(app=app, base_url="http://memory", timeout=None) as client:
+        body = {"email": "rollup@example.com", "password": "Passw0rd!", "name": "집계"}
+        r = await client.post("/auth/signup", json=body)
+        r.raise_for_status()
+        token = r.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        user_id = jwt.get_unverified_claims(token)["sub"]
+
+        # 집계 도입 전에 저장된 세션 (totals/daily 없음)
+        await db[SCREEN_TIME_COLLECTION].insert_many([
+            {
+                "user_id": user_id,
+                "start_time": datetime(2025, 5, day, 1, 0, tzinfo=timezone.utc),
+                "end_time": datetime(2025, 5, day, 2, 0, tzinfo=timezone.utc),
+                "duration_minutes": 60,
+            }
+            for day in range(1, 11)
+        ])
+
+        # 첫 접근이 동시에 몰려도 집계는 한 번만 만들고, 그 사이 저장된 세션도 한 번씩만 더해진다
+        posts = [
+            client.post("/users/me/screen-time", headers=headers, json={
+                "start_time": f"2025-06-{day:02d}T01:00:00Z", "end_time": f"2025-06-{day:02d}T01:30:00Z",
+            })
+            for day in range(1, 11)
+        ]
+        summaries = [client.get("/users/me/screen-time/summary", headers=headers) for _ in range(10)]
+        responses = await asyncio.gather(*posts, *summaries)
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+
+        totals = await db[TOTALS_COLLECTION].find_one({"_id": user_id})
+        assert totals["total_minutes"] == 10 * 60 + 10 * 30, totals
+        assert totals["sessions"] == 20 and "rebuilding" not in totals, totals
+        assert await db[DAILY_COLLECTION].count_documents({"user_id": user_id}) == 20
+    print("   ✅ 집계 한 번만 생성, 동시 저장 세션 유실/중복 없음")
+
+
+async def check_screen_time_batch_partial_failure():
+    print("\n4️⃣ 스크린타임 배치 업로드 부분 실패 확인...")
+    from jose import jwt
+    from db.mongo import get_db
+    from db.screen_time import SCREEN_TIME_COLLECTION, TOTALS_COLLECTION
+    from main import app
+
+    db = get_db()
+    collection = db[SCREEN_TIME_COLLECTION]
+    insert_many = collection.insert_many
+
+    async def insert_many_failing_second(documents, ordered=True):
+        # 두 번째 문서만 중복 키가 아닌 오류(문서 검증 실패)로 거부하고 나머지는 저장한다
+        documents = list(documents)
+        errors = [{"index": 1, "code": 121, "errmsg": "Document failed validation"}]
+        rest = documents[:1] + documents[2:]
+        try:
+            await insert_many(rest, ordered=ordered)
+        except BulkWriteError as e:
+            errors += [
+                {**error, "index": error["index"] + (error["index"] >= 1)}
+                for error in e.details["writeErrors"]
+            ]
+        raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], "nInserted": len(documents) - len(errors)})
+
+    async with httpx.AsyncClient(app=app, base_url="http://memory", timeout=None) as client:
+        body = {"email": "batch@example.com", "password": "Passw0rd!", "name": "배치"}
+        r = await client.post("/auth/signup", json=body)
+        r.raise_for_status()
+        token = r.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        user_id = jwt.get_unverified_claims(token)["sub"]
+
+        sessions = [
+            {"start_time": f"2025-07-{day:02d}T01:00:00Z", "end_time": f"2025-07-{day:02d}T01:30:00Z"}
+            for day in range(1, 5)
+        ]
+        r = await client.post("/users/me/screen-time", headers=headers, json=sessions[3])
+        assert r.status_code == 200, r.text
+
+        collection.insert_many = insert_many_failing_second
+        try:
+            r = await client.post("/users/me/screen-time/batch", headers=headers, json=sessions)
+        finally:
+            del collection.insert_many
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert (body["created"], body["duplicates"], body["errors"]) == (2, 1, 1), body
+        statuses = [item["status"] for item in body["results"]]
+        assert statuses == ["created", "error", "created", "duplicate"], statuses
+        assert body["results"][1]["error"] == "Document failed validation", body
+
+        # 저장된 두 건(1, 3번째)은 집계에 반영되고, 실패/중복 항목은 더해지지 않는다
+        assert await collection.count_documents({"user_id": user_id}) == 3
+        totals = await db[TOTALS_COLLECTION].find_one({"_id": user_id})
+        assert totals["sessions"] == 3 and totals["total_minutes"] == 90, totals
+    print("   ✅ 실패 항목은 항목별 error로 응답, 저장된 항목만 집계에 반영")
+
+
+async def check_index_conflicts():
+    print("\n5️⃣ 인덱스 정의 충돌 / 중복 인덱스 처리 확인...")
+    from db.diaries import DIARY_COLLECTION
+    from db.indexes import apply_indexes, failed_unique_indexes, find_duplicate_keys
+    from models.user import USER_COLLECTION
+
+    db = MemoryClient()["test_indexes"]
+    diaries = db[DIARY_COLLECTION]
+    await diaries.create_index([("user_id", 1), ("createdAt", -1)])
+    await diaries.create_index([("user_id", 1), ("diary_id", 1)], name="user_diary_unique")  # unique 빠진 예전 정의
+
+    # 시작 시: 정의가 다른 인덱스는 건드리지 않고 실패로만 표시, 중복 인덱스는 삭제
+    result = await apply_indexes(db, [DIARY_COLLECTION])
+    names = result[DIARY_COLLECTION]
+    assert [s.name for s in failed_unique_indexes(result)] == ["user_diary_unique"]
+    assert any(n.startswith("!user_diary_unique") for n in names), names
+    assert "-user_id_1_createdAt_-1" in names, names
+    info = await diaries.index_information()
+    assert not info["user_diary_unique"].get("unique") and "user_id_1_createdAt_-1" not in info, info
+
+    # check_indexes.py --migrate 경로에서만 다시 만든다
+    names = (await apply_indexes(db, [DIARY_COLLECTION], migrate=True))[DIARY_COLLECTION]
+    assert not any(n.startswith(("!", "-")) for n in names), names
+    assert (await diaries.index_information())["user_diary_unique"]["unique"]
+
+    # 이메일이 겹치는 사용자가 있으면 users.email unique 인덱스를 만들지 못하고 겹치는 문서를 찾아 준다
+    await db[USER_COLLECTION].insert_many([
+        {"_id": "u1", "email": "same@example.com"},
+        {"_id": "u2", "email": "same@example.com"},
+        {"_id": "u3", "email": "other@example.com"},
+    ])
+    result = await apply_indexes(db, [USER_COLLECTION])
+    broken = failed_unique_indexes(result)
+    assert [s.name for s in broken] == ["email_1"], result
+    duplicates = await find_duplicate_keys(db, broken[0])
+    assert duplicates == [{"key": {"email": "same@example.com"}, "count": 2, "ids": ["u1", "u2"]}], duplicates
+    print("   ✅ 시작 시 재생성 없음, --migrate에서만 재생성, 중복 인덱스 삭제, unique 실패 시 겹치는 키 보고")
+
+
+async def check_legacy_diary_paging():
+    print("\n6️⃣ 예전 일기(createdAt 없음/문자열) 마이그레이션 후 페이지 끝까지 조회 확인...")
+    from bson import ObjectId
+    from jose import jwt
+    from db.diaries import DIARY_COLLECTION, migrate_embedded_diaries
+    from db.mongo import get_db
+    from main import app
+    from models.user import USER_COLLECTION
+
+    db = get_db()
+    async with httpx.AsyncClient(app=app, base_url="http://memory", timeout=None) as client:
+        body = {"email": "legacy@example.com", "password": "Passw0rd!", "name": "예전"}
+        r = await client.post("/auth/signup", json=body)
+        r.raise_for_status()
+        token = r.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        user_id = jwt.get_unverified_claims(token)["sub"]
+
+        await db[USER_COLLECTION].update_one({"_id": user_id}, {"$set": {"diaries": [
+            {"diary_id": "d1", "createdAt": "2024-03-01T09:00:00"},
+            {"diary_id": "d2"},  # 시각 정보 없음
+            {"diary_id": "d3", "createdAt": "어제", "updatedAt": "2024-02-01T09:00:00Z"},
+            {"_id": ObjectId.from_datetime(datetime(2024, 1, 1, tzinfo=timezone.utc)), "diary_id": "d4"},
+            {"diary_id": "d5", "created_at": datetime(2023, 12, 1)},
+        ]}})
+        # 예전 마이그레이션이 문자열 createdAt을 그대로 옮겨 둔 일기
+        await db[DIARY_COLLECTION].insert_one({"user_id": user_id, "diary_id": "d6", "createdAt": "2023-11-01 09:00:00"})
+        await migrate_embedded_diaries(db)
+
+        docs = await db[DIARY_COLLECTION].find({"user_id": user_id}).to_list(None)
+        assert len(docs) == 6 and all(isinstance(d["createdAt"], datetime) for d in docs), docs
+
+        seen, cursor = [], None
+        for _ in range(10):
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            r = await client.get("/diaries", headers=headers, params=params)
+            assert r.status_code == 200, r.text
+            seen += [d["diaryId"] for d in r.json()]
+            cursor = r.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert sorted(seen) == ["d1", "d2", "d3", "d4", "d5", "d6"], seen
+        assert seen[-4:] == ["d3", "d4", "d5", "d6"], seen
+    print("   ✅ createdAt이 모두 날짜로 저장되고, 페이지를 끝까지 넘기면 빠짐/반복 없이 끝난다")
+
+
+async def main():
+    pwd_context.update(bcrypt__rounds=4)
+    print("=" * 60)
+    print("🔍 인메모리 스토리지 엔진 테스트")
+    print("=" * 60)
+    await check_engine()
+    await check_app()
+    await check_screen_time_first_access()
+    await check_screen_time_batch_partial_failure()
+    await check_index_conflicts()
+    await check_legacy_diary_paging()
+    print("\n" + "=" * 60)
+    print("✅ 모든 확인 통과")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+SUD 점수 동시 쓰기 테스트
+백엔드 서버가 실행 중이어야 함 (http://localhost:8050)
+
+같은 일기에 SUD 추가/수정 요청을 동시에 보내고, 유실된 쓰기가 없는지 확인한다.
+"""
+import asyncio
+from datetime import datetime, timezone
+import httpx
+
+PARALLEL = 50
+
+
+async def main():
+    base_url = "http://localhost:8050"
+    email = f"sud_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')}@example.com"
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        print("=" * 60)
+        print("🔍 SUD 동시 쓰기 테스트 시작")
+        print("=" * 60)
+
+        r = await client.post("/auth/signup", json={
+            "email": email,
+            "password": "Passw0rd!",
+            "name": "동시성테스트",
+        })
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        r = await client.post("/diaries", headers=headers, json={
+            "group_Id": 1,
+            "activating_events": "동시성 테스트",
+        })
+        r.raise_for_status()
+        diary_id = r.json()["diaryId"]
+
+        # 1. 동시에 SUD 추가
+        print(f"\n1️⃣ SUD {PARALLEL}건 동시 추가...")
+        responses = await asyncio.gather(*[
+            client.post("/sud-scores", headers=headers, json={
+                "diaryId": diary_id,
+                "before_sud": i % 11,
+            })
+            for i in range(PARALLEL)
+        ])
+        assert all(r.status_code == 201 for r in responses), [r.text for r in responses if r.status_code != 201]
+        created_ids = {r.json()["sud_id"] for r in responses}
+
+        r = await client.get(f"/sud-scores/{diary_id}", headers=headers)
+        stored_ids = {entry["sud_id"] for entry in r.json()}
+        missing = created_ids - stored_ids
+        print(f"   생성 {len(created_ids)}건 / 저장 {len(stored_ids)}건 / 유실 {len(missing)}건")
+        assert not missing, f"유실된 SUD: {missing}"
+
+        # 2. 서로 다른 항목을 동시에 수정
+        print(f"\n2️⃣ SUD {PARALLEL}건 동시 수정...")
+        responses = await asyncio.gather(*[
+            client.put(f"/sud-scores/{diary_id}/{sud_id}", headers=headers, json={"after_sud": 7})
+            for sud_id in created_ids
+        ])
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+
+        r = await client.get(f"/sud-scores/{diary_id}", headers=headers)
+        not_updated = [e["sud_id"] for e in r.json() if e["after_sud"] != 7]
+        print(f"   수정 누락 {len(not_updated)}건")
+        assert not not_updated, f"수정이 유실된 SUD: {not_updated}"
+
+        print("\n" + "=" * 60)
+        print("✅ 유실된 쓰기 없음")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+걱정 그룹 동시 수정 테스트
+백엔드 서버가 실행 중이어야 함 (http://localhost:8050)
+
+걱정 그룹 생성/수정/아카이브 요청을 동시에 보내고, 번호가 겹치거나 유실된 쓰기가 없는지 확인한다.
+"""
+import asyncio
+from datetime import datetime, timezone
+import httpx
+
+PARALLEL = 30
+
+
+async def main():
+    base_url = "http://localhost:8050"
+    email = f"worry_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')}@example.com"
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        print("=" * 60)
+        print("🔍 걱정 그룹 동시 수정 테스트 시작")
+        print("=" * 60)
+
+        r = await client.post("/auth/signup", json={
+            "email": email,
+            "password": "Passw0rd!",
+            "name": "동시성테스트",
+        })
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        # 1. group_id 없이 동시에 생성 → 서버가 서로 다른 번호를 줘야 한다
+        print(f"\n1️⃣ 걱정 그룹 {PARALLEL}건 동시 생성...")
+        responses = await asyncio.gather(*[
+            client.post("/users/me/worry-groups", headers=headers, json={"group_title": f"그룹 {i}"})
+            for i in range(PARALLEL)
+        ])
+        assert all(r.status_code == 201 for r in responses), [r.text for r in responses if r.status_code != 201]
+        created_ids = [str(r.json()["group_id"]) for r in responses]
+        assert len(set(created_ids)) == PARALLEL, f"겹친 group_id: {sorted(created_ids)}"
+        assert "1" not in created_ids, "기본그룹 번호(1)가 다시 배정됨"
+
+        r = await client.get("/users/me/worry-groups", headers=headers)
+        stored_ids = {str(g["group_id"]) for g in r.json()}
+        missing = set(created_ids) - stored_ids
+        print(f"   생성 {len(created_ids)}건 / 저장 {len(stored_ids)}건 (기본그룹 포함) / 유실 {len(missing)}건")
+        assert not missing, f"유실된 그룹: {missing}"
+
+        # 2. 서로 다른 그룹을 동시에 수정
+        print(f"\n2️⃣ 걱정 그룹 {PARALLEL}건 동시 수정...")
+        responses = await asyncio.gather(*[
+            client.put(f"/users/me/worry-groups/{group_id}", headers=headers, json={"group_contents": f"수정 {group_id}"})
+            for group_id in created_ids
+        ])
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+
+        r = await client.get("/users/me/worry-groups", headers=headers)
+        not_updated = [
+            g["group_id"] for g in r.json()
+            if str(g["group_id"]) in created_ids and g["group_contents"] != f"수정 {g['group_id']}"
+        ]
+        print(f"   수정 누락 {len(not_updated)}건")
+        assert not not_updated, f"수정이 유실된 그룹: {not_updated}"
+
+        # 3. 같은 그룹의 서로 다른 필드를 동시에 수정 + 아카이브
+        print("\n3️⃣ 같은 그룹에 제목 수정 / 캐릭터 수정 / 아카이브 동시 요청...")
+        target = created_ids[0]
+        responses = await asyncio.gather(
+            client.put(f"/users/me/worry-groups/{target}", headers=headers, json={"group_title": "새 제목"}),
+            client.put(f"/users/me/worry-groups/{target}", headers=headers, json={"character_id": "c7"}),
+            client.post(f"/users/me/worry-groups/{target}/archive", headers=headers),
+        )
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses]
+
+        r = await client.get(f"/users/me/worry-groups/{target}", headers=headers)
+        group = r.json()
+        print(f"   결과: {group}")
+        assert group["group_title"] == "새 제목"
+        assert group["character_id"] == "c7"
+        assert group["archived"] is True
+        assert group["group_contents"] == f"수정 {target}"
+
+        print("\n" + "=" * 60)
+        print("✅ 유실된 쓰기 없음")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())